@@ -1,6 +1,14 @@
 # redriver/api.py
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Optional, Sequence, Tuple
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import joblib
 import json
@@ -8,14 +16,126 @@ import numpy as np
 
 from redriver.config import (
     MODEL_PATH,
+    ONNX_MODEL_PATH,
     FEATURE_COLUMNS_PATH,
+    PREDICT_MAX_BATCH_SIZE,
+    PREDICT_MAX_WAIT_MS,
 )
 
 # ---------------------------------------------------------
 # Load model + column order + label decoder
 # ---------------------------------------------------------
 
-MODEL = joblib.load(MODEL_PATH)
+
+# The model is loaded lazily, once per process, on first use (the API's
+# startup hook warms it). Importing this module - from tests, batch jobs,
+# other tools - no longer pays for reading the model on every import path.
+
+
+@lru_cache(maxsize=1)
+def get_onnx_session():
+    """
+    Open the ONNX export of the model with onnxruntime, if there is one.
+
+    Returns None when onnxruntime isn't installed or training didn't export
+    model.onnx; the API then falls back to the joblib model. onnxruntime is
+    preferred: loading it skips unpickling the whole sklearn model, and it
+    scores all trees in one compiled op.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    if not ONNX_MODEL_PATH.exists():
+        return None
+
+    return ort.InferenceSession(str(ONNX_MODEL_PATH), providers=["CPUExecutionProvider"])
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    """
+    The trained scikit-learn model, loaded once.
+
+    mmap_mode="r" memory-maps the numpy arrays inside the trees from
+    model.joblib instead of copying them onto the heap, so several API
+    workers share the same physical pages. (Works because save_artifacts
+    writes the model uncompressed.)
+    """
+    model = joblib.load(MODEL_PATH, mmap_mode="r")
+
+    # We always pass plain numpy rows in FEATURE_COLUMNS order, so the
+    # stored column names only trigger "missing feature names" warnings.
+    if hasattr(model, "feature_names_in_"):
+        del model.feature_names_in_
+
+    # A RandomForest trained with n_jobs=N_PHYS would start a joblib thread
+    # pool on every call; for request-sized inputs that costs more than the
+    # trees themselves. Serve single-threaded and scale with workers
+    # instead (uvicorn --workers / gunicorn).
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+
+    return model
+
+
+@lru_cache(maxsize=1)
+def get_flat_forest() -> Optional[SimpleNamespace]:
+    """
+    The RandomForest's trees packed into flat node arrays, or None if the
+    loaded model is not a RandomForest.
+
+    sklearn's predict_proba visits the trees one at a time (one Cython call
+    plus a joblib dispatch each), which is a fixed cost per request no
+    matter how few rows there are. With every tree's nodes laid end to end
+    in shared arrays, a small batch can instead walk *all* trees one level
+    per step, as a handful of whole-array NumPy operations.
+
+    Leaves point back at themselves, so rows that reach a leaf early simply
+    stay there for the remaining steps.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = get_model()
+    if not isinstance(model, RandomForestClassifier):
+        return None
+
+    trees = [est.tree_ for est in model.estimators_]
+    offsets = np.cumsum([0] + [t.node_count for t in trees])
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for t, off in zip(trees, offsets):
+        node_ids = np.arange(t.node_count) + off
+        is_leaf = t.children_left < 0
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        left.append(np.where(is_leaf, node_ids, t.children_left + off))
+        right.append(np.where(is_leaf, node_ids, t.children_right + off))
+        # Per-leaf class fractions, normalized the way tree.predict_proba does.
+        v = t.value[:, 0, :]
+        value.append(v / v.sum(axis=1, keepdims=True))
+
+    return SimpleNamespace(
+        roots=offsets[:-1],
+        depth=max(t.max_depth for t in trees),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        value=np.concatenate(value),
+    )
+
+
+def _flat_forest_proba(forest: SimpleNamespace, X: np.ndarray) -> np.ndarray:
+    """Same probabilities as RandomForestClassifier.predict_proba(X)."""
+    rows = np.arange(len(X))[:, None]
+    nodes = np.repeat(forest.roots[None, :], len(X), axis=0)
+    for _ in range(forest.depth):
+        go_left = X[rows, forest.feature[nodes]] <= forest.threshold[nodes]
+        nodes = np.where(go_left, forest.left[nodes], forest.right[nodes])
+    return forest.value[nodes].mean(axis=1)
+
 
 with open(FEATURE_COLUMNS_PATH, "r") as f:
     meta = json.load(f)
@@ -39,9 +159,34 @@ def decode_label(idx: int) -> str:
     return LABEL_DECODER.get(str(idx), str(idx))
 
 
-# Model classes (these are the integer codes we trained on)
-CLASS_INDEXES = [int(i) for i in MODEL.classes_]
-CLASS_NAMES = [decode_label(i) for i in CLASS_INDEXES]
+@lru_cache(maxsize=1)
+def get_classes() -> Tuple[Tuple[int, ...], Tuple[str, ...]]:
+    """
+    Model classes (the integer codes we trained on) and their label names,
+    in the column order of predict_proba().
+    """
+    session = get_onnx_session()
+    if session is not None:
+        classes = json.loads(session.get_modelmeta().custom_metadata_map["classes"])
+    else:
+        classes = get_model().classes_
+
+    # Tuples: these are cached and shared by every request, so they must
+    # not be mutable.
+    class_indexes = tuple(int(i) for i in classes)
+    class_names = tuple(decode_label(i) for i in class_indexes)
+    return class_indexes, class_names
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model before serving so the first request doesn't pay for it.
+    get_classes()
+    if get_onnx_session() is None:
+        get_flat_forest()
+    _BATCHER.start()
+    yield
+    await _BATCHER.stop()
 
 # ---------------------------------------------------------
 # FastAPI app
@@ -51,6 +196,10 @@ app = FastAPI(
     title="RedRiver Network Flow Classifier",
     description="AI-driven network flow scoring engine",
     version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes the response dicts in C, much faster than the
+    # stdlib encoder for these small payloads.
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -70,6 +219,15 @@ class FlowInput(BaseModel):
     bytes_received: int
     packets: int
 
+    @property
+    def proto(self) -> str:
+        """Protocol normalized to lower case, as used by the features."""
+        return self.protocol.lower()
+
+
+class FlowBatch(BaseModel):
+    flows: List[FlowInput]
+
 
 # ---------------------------------------------------------
 # Helper: convert raw flow → feature vector
@@ -77,48 +235,211 @@ class FlowInput(BaseModel):
 # ---------------------------------------------------------
 
 
+# How to compute each feature from a flow `f` (must mirror redriver.features).
+# IPs were dropped during training, so they have no entry here.
+# Each expression works on a single FlowInput (scalars) and on the column
+# view from _flow_columns() (numpy arrays), so both paths share one
+# definition of every feature.
+_FEATURE_EXPRS = {
+    # raw fields
+    "src_port": "f.src_port",
+    "dst_port": "f.dst_port",
+    "duration": "f.duration",
+    "bytes_sent": "f.bytes_sent",
+    "bytes_received": "f.bytes_received",
+    "packets": "f.packets",
+    # protocol one-hot
+    "proto_tcp": "f.proto == 'tcp'",
+    "proto_udp": "f.proto == 'udp'",
+    # engineered features
+    "kb_sent": "f.bytes_sent / 1024.0",
+    "kb_received": "f.bytes_received / 1024.0",
+    "bytes_total": "f.bytes_sent + f.bytes_received",
+    "rate_packets": "f.packets / (f.duration + 0.1)",
+    "rate_bytes": "(f.bytes_sent + f.bytes_received) / (f.duration + 0.1)",
+    "src_port_privileged": "f.src_port < 1024",
+    "dst_port_privileged": "f.dst_port < 1024",
+}
+
+N_FEATURES = len(FEATURE_COLUMNS)
+
+
+def _compile_feature_filler(columns: Sequence[str], rows: str):
+    """
+    Generate a function that writes every feature straight into X for this
+    exact column layout.
+
+    FEATURE_COLUMNS is fixed once the model is loaded, so instead of looping
+    over (index, function) pairs per request we write out one straight-line
+    assignment per column, e.g. for rows="0":
+
+        def _fill(f, X):
+            X[0, 0] = f.src_port
+            X[0, 1] = f.dst_port
+            X[0, 2] = f.bytes_sent / 1024.0
+            ...
+
+    rows=":" gives the batch version, filling whole columns at once.
+    Columns with no expression are never written and stay 0.
+    """
+    lines = ["def _fill(f, X):"]
+    lines += [
+        f"    X[{rows}, {i}] = {_FEATURE_EXPRS[col]}"
+        for i, col in enumerate(columns)
+        if col in _FEATURE_EXPRS
+    ]
+    if len(lines) == 1:
+        lines.append("    pass")
+
+    namespace: dict = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_fill"]
+
+
+_fill_row = _compile_feature_filler(FEATURE_COLUMNS, "0")
+_fill_matrix = _compile_feature_filler(FEATURE_COLUMNS, ":")
+
+
 def build_features(flow: FlowInput) -> np.ndarray:
     """
     Re-implement the same feature engineering done in redriver.features.compute_features
     so online scoring uses the exact same columns and semantics as training.
+
+    The (1, n_features) row is allocated once and filled in place by the
+    generated _fill_row(), in the exact column order the model expects.
     """
+    # float32: what onnxruntime expects, and what the trees compare against.
+    X = np.zeros((1, N_FEATURES), dtype=np.float32)
+    _fill_row(flow, X)
+    return X
+
+
+_NUMERIC_FIELDS = ("src_port", "dst_port", "duration", "bytes_sent", "bytes_received", "packets")
 
-    proto = flow.protocol.lower()
-
-    # Base numeric / derived fields
-    bytes_total = flow.bytes_sent + flow.bytes_received
-
-    base = {
-        # raw fields (note: IPs were dropped during training, so they won't be used
-        # unless FEATURE_COLUMNS explicitly contain them)
-        "src_ip": flow.src_ip,
-        "dst_ip": flow.dst_ip,
-        "src_port": flow.src_port,
-        "dst_port": flow.dst_port,
-        "duration": flow.duration,
-        "bytes_sent": flow.bytes_sent,
-        "bytes_received": flow.bytes_received,
-        "packets": flow.packets,
-        # protocol one-hot
-        "proto_tcp": 1 if proto == "tcp" else 0,
-        "proto_udp": 1 if proto == "udp" else 0,
-        # engineered features (must mirror redriver.features)
-        "kb_sent": flow.bytes_sent / 1024.0,
-        "kb_received": flow.bytes_received / 1024.0,
-        "bytes_total": bytes_total,
-        "rate_packets": flow.packets / (flow.duration + 0.1),
-        "rate_bytes": bytes_total / (flow.duration + 0.1),
-        "src_port_privileged": 1 if flow.src_port < 1024 else 0,
-        "dst_port_privileged": 1 if flow.dst_port < 1024 else 0,
+
+def _flow_columns(flows: Sequence[FlowInput]) -> SimpleNamespace:
+    """Column-wise view of many flows: one numpy array per input field."""
+    cols = {
+        name: np.array([getattr(f, name) for f in flows], dtype=np.float64)
+        for name in _NUMERIC_FIELDS
     }
+    cols["proto"] = np.array([f.proto for f in flows])
+    return SimpleNamespace(**cols)
+
 
-    # Assemble vector in the exact column order the model expects
-    vector = []
-    for col in FEATURE_COLUMNS:
-        value = base.get(col, 0.0)  # default 0.0 for any missing fields
-        vector.append(value)
+def build_feature_matrix(flows: Sequence[FlowInput]) -> np.ndarray:
+    """
+    Batch version of build_features(): an (N, n_features) float32 matrix.
+
+    Each feature is computed once for the whole batch as a numpy column
+    operation, instead of once per flow.
+    """
+    X = np.zeros((len(flows), N_FEATURES), dtype=np.float32)
+    _fill_matrix(_flow_columns(flows), X)
+    return X
 
-    return np.array(vector, dtype=float).reshape(1, -1)
+
+@lru_cache(maxsize=1)
+def _onnx_input_name() -> str:
+    return get_onnx_session().get_inputs()[0].name
+
+
+def predict_proba(X: np.ndarray) -> np.ndarray:
+    """Class probabilities (columns in get_classes() order) for a float32 matrix."""
+    session = get_onnx_session()
+    if session is not None:
+        _, proba = session.run(None, {_onnx_input_name(): X})
+        return proba
+
+    # Micro-batches from /predict are small: walk the flattened forest
+    # rather than paying sklearn's per-tree overhead. Large /predict_batch
+    # calls still go through sklearn.
+    forest = get_flat_forest()
+    if forest is not None and len(X) <= PREDICT_MAX_BATCH_SIZE:
+        return _flat_forest_proba(forest, X)
+    return get_model().predict_proba(X)
+
+
+class _MicroBatcher:
+    """
+    Collects concurrent /predict rows and scores them in one model call.
+
+    In plain English:
+    - Each request puts its (1, n_features) row on a queue and waits.
+    - A background task takes the first row, then keeps taking rows until
+      it has max_batch_size of them or max_wait_ms has passed.
+    - It stacks them into one matrix, runs predict_proba once (in a worker
+      thread), and hands each request back its own row of probabilities.
+
+    Under load this turns N separate model calls into one per batch; a
+    lone request waits at most max_wait_ms extra.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def predict_proba(self, row: np.ndarray) -> np.ndarray:
+        """Class probabilities for one (1, n_features) row."""
+        if self._task is None:
+            # Not started (app used without its lifespan): score directly.
+            return (await run_in_threadpool(predict_proba, row))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            X = np.vstack([row for row, _ in batch])
+            try:
+                proba = await run_in_threadpool(predict_proba, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), row_proba in zip(batch, proba):
+                # A client may have disconnected and cancelled its future.
+                if not future.done():
+                    future.set_result(row_proba)
+
+
+_BATCHER = _MicroBatcher(PREDICT_MAX_BATCH_SIZE, PREDICT_MAX_WAIT_MS)
 
 
 # ---------------------------------------------------------
@@ -131,11 +452,14 @@ async def health():
     """
     Lightweight health endpoint for uptime checks.
     """
+    _, class_names = get_classes()
+    onnx = get_onnx_session() is not None
     return {
         "status": "ok",
-        "model_loaded": MODEL is not None,
+        "model_loaded": onnx or get_model() is not None,
+        "backend": "onnxruntime" if onnx else "sklearn",
         "n_features": int(len(FEATURE_COLUMNS)),
-        "classes": CLASS_NAMES,
+        "classes": class_names,
     }
 
 
@@ -144,39 +468,83 @@ async def health():
 # ---------------------------------------------------------
 
 
+# Scoring goes through the micro-batcher: concurrent requests share one
+# predict_proba call, which runs in a worker thread so the event loop stays
+# free. For more cores, run several processes (`uvicorn ... --workers N`).
 @app.post("/predict")
 async def predict(flow: FlowInput):
     # Build vector in correct order
     X = build_features(flow)
 
-    # Model prediction (integer class index)
-    raw_pred = MODEL.predict(X)[0]
-    pred_idx = int(raw_pred)
-    pred_label = decode_label(pred_idx)
-
-    # Probabilities over all known classes
-    prob_arr = MODEL.predict_proba(X)[0]
-    # prob_arr is a numpy array; convert to Python floats
-    probs = {
-        decode_label(int(cls_idx)): float(p)
-        for cls_idx, p in zip(CLASS_INDEXES, prob_arr)
-    }
+    # Probabilities over all known classes. predict() is just the argmax of
+    # these, so one predict_proba call gives us both (and the trees are
+    # only walked once per request).
+    prob_arr = await _BATCHER.predict_proba(X)
+    class_indexes, class_names = get_classes()
+    pred_pos = int(prob_arr.argmax())
+    pred_idx = class_indexes[pred_pos]
+    pred_label = class_names[pred_pos]
+
+    # prob_arr is a numpy array; one tolist() gives plain Python floats
+    prob_list = prob_arr.tolist()
+    probs = dict(zip(class_names, prob_list))
 
     # Confidence for the predicted class
-    pred_pos = CLASS_INDEXES.index(pred_idx)
-    confidence = float(prob_arr[pred_pos])
+    confidence = prob_list[pred_pos]
 
     return {
         "input": flow.model_dump(),
         "prediction": {
             "class_label": pred_label,
-            "class_index": int(pred_idx),
+            "class_index": pred_idx,
             "confidence": confidence,
-            "probs": {k: float(v) for k, v in probs.items()},
+            "probs": probs,
         },
         "model_info": {
-            "feature_columns_used": list(FEATURE_COLUMNS),
-            "class_indexes": [int(x) for x in CLASS_INDEXES],
-            "class_names": CLASS_NAMES,
+            "feature_columns_used": FEATURE_COLUMNS,
+            "class_indexes": class_indexes,
+            "class_names": class_names,
+        },
+    }
+
+
+# ---------------------------------------------------------
+# Batch Prediction Endpoint
+# ---------------------------------------------------------
+
+
+@app.post("/predict_batch")
+def predict_batch(batch: FlowBatch):
+    """
+    Score many flows in one request.
+
+    All flows go through the model in a single predict_proba call on one
+    stacked matrix, so the per-call overhead is paid once per batch rather
+    than once per flow.
+    """
+    class_indexes, class_names = get_classes()
+
+    if not batch.flows:
+        predictions = []
+    else:
+        proba = predict_proba(build_feature_matrix(batch.flows))
+        pred_pos = proba.argmax(axis=1)
+
+        predictions = [
+            {
+                "class_label": class_names[pos],
+                "class_index": class_indexes[pos],
+                "confidence": row[pos],
+                "probs": dict(zip(class_names, row)),
+            }
+            for pos, row in zip(pred_pos.tolist(), proba.tolist())
+        ]
+
+    return {
+        "predictions": predictions,
+        "model_info": {
+            "feature_columns_used": FEATURE_COLUMNS,
+            "class_indexes": class_indexes,
+            "class_names": class_names,
         },
     }
@@ -10,14 +10,24 @@ DATA_DIR = ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
 
-# Make sure directories exist
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+def ensure_dirs() -> None:
+    """
+    Create the data directories if they don't exist yet.
+
+    Called by the pipeline steps that write files, not at import time, so
+    importing config (e.g. from the API or tests) never touches the disk.
+    """
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
 
 # ------------------------------------------------------------------
 # Raw flows file (synthetic PCAP-style flows)
 # ------------------------------------------------------------------
-RAW_FLOWS_PATH = RAW_DIR / "flows.csv"
+# Stored as Parquet: typed, compressed columns instead of re-parsed text.
+# Loaders still accept a .csv path for older datasets.
+RAW_FLOWS_PATH = RAW_DIR / "flows.parquet"
 
 # Alias used by other modules (pipeline.py expects FLOWS_PATH)
 FLOWS_PATH = RAW_FLOWS_PATH
@@ -25,8 +35,14 @@ FLOWS_PATH = RAW_FLOWS_PATH
 # ------------------------------------------------------------------
 # Files produced by the feature pipeline and ML training
 # ------------------------------------------------------------------
-FEATURES_PATH = PROCESSED_DIR / "features.csv"
+FEATURES_PATH = PROCESSED_DIR / "features.parquet"
+# Cached train/test row indices for FEATURES_PATH (rebuilt when the
+# features file is newer or has a different number of rows)
+SPLIT_INDEX_PATH = FEATURES_PATH.with_suffix(".split.npz")
+TEST_SIZE = 0.25
 MODEL_PATH = ROOT / "model.joblib"
+# ONNX export of the same model; the API serves from this when present.
+ONNX_MODEL_PATH = MODEL_PATH.with_suffix(".onnx")
 REPORT_PATH = ROOT / "report.json"
 
 # JSON file listing the feature column order the model expects
@@ -41,9 +57,35 @@ FEATURE_COLS_PATH = FEATURE_COLUMNS_PATH
 # Name of the label column in the feature matrix
 LABEL_COLUMN = "label"
 
+# Every behavior class synthetic.py can emit, in the order they are encoded
+# (label_encoded 0..3). Fixed so the class index stays stable across retrains.
+LABELS = ("benign", "brute_force", "c2_beacon", "port_scan")
+
 # Random seed for reproducibility
 RANDOM_SEED = 1337
 
+# Synthetic generation runs the four behavior generators in separate
+# processes once the requested number of sessions reaches this size.
+PARALLEL_GENERATION_MIN_FLOWS = 50_000
+
+# Feature CSVs (legacy format) larger than this are read in chunks of FEATURES_CHUNKSIZE rows
+# instead of in one go, so peak memory stays bounded.
+FEATURES_CHUNK_THRESHOLD_BYTES = 500 * 1024 * 1024
+FEATURES_CHUNKSIZE = 250_000
+
+# Which classifier train_model() builds:
+#   "hist_gb"       -> HistGradientBoostingClassifier (default; fast to train,
+#                      small model file)
+#   "random_forest" -> the original 200-tree RandomForestClassifier
+MODEL_TYPE = "hist_gb"
+
+
+# /predict micro-batching: concurrent requests are scored together in one
+# model call of up to PREDICT_MAX_BATCH_SIZE rows, waiting at most
+# PREDICT_MAX_WAIT_MS for a batch to fill.
+PREDICT_MAX_BATCH_SIZE = 64
+PREDICT_MAX_WAIT_MS = 5
+
 
 def describe_paths() -> None:
     """Small helper to quickly print all important paths."""
@@ -53,7 +95,9 @@ def describe_paths() -> None:
     print("[RedRiver] PROCESSED_DIR      =", PROCESSED_DIR)
     print("[RedRiver] FLOWS_PATH         =", FLOWS_PATH)
     print("[RedRiver] FEATURES_PATH      =", FEATURES_PATH)
+    print("[RedRiver] SPLIT_INDEX_PATH   =", SPLIT_INDEX_PATH)
     print("[RedRiver] MODEL_PATH         =", MODEL_PATH)
+    print("[RedRiver] ONNX_MODEL_PATH    =", ONNX_MODEL_PATH)
     print("[RedRiver] REPORT_PATH        =", REPORT_PATH)
     print("[RedRiver] FEATURE_COLUMNS    =", FEATURE_COLUMNS_PATH)
 
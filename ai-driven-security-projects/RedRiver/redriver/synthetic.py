@@ -22,43 +22,122 @@ so the ML model has something to learn from.
 
 from __future__ import annotations
 
-import ipaddress
-import random
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import List
 
+import numpy as np
 import pandas as pd
 
-from .config import FLOWS_PATH, RANDOM_SEED, RAW_DIR
+from .config import FLOWS_PATH, PARALLEL_GENERATION_MIN_FLOWS, RANDOM_SEED, ensure_dirs
 
 # -------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------
 
+# Private networks we draw "internal" hosts from, as raw uint32 values:
+# (network_int, prefix_mask, num_addresses).
+PRIV_NETS = [
+    (0x0A000000, 0xFF000000, 1 << 24),  # 10.0.0.0/8
+    (0xAC100000, 0xFFF00000, 1 << 20),  # 172.16.0.0/12
+    (0xC0A80000, 0xFFFF0000, 1 << 16),  # 192.168.0.0/16
+]
+
+# Ranges a "public" address must stay out of, as (network_int, mask):
+# private (RFC 1918), loopback, link-local, documentation, benchmarking
+# (RFC 6890), multicast (RFC 3171) and reserved blocks.
+EXCLUDED = [
+    (0x00000000, 0xFF000000),  # 0.0.0.0/8
+    (0x0A000000, 0xFF000000),  # 10.0.0.0/8
+    (0x7F000000, 0xFF000000),  # 127.0.0.0/8
+    (0xA9FE0000, 0xFFFF0000),  # 169.254.0.0/16
+    (0xAC100000, 0xFFF00000),  # 172.16.0.0/12
+    (0xC0000000, 0xFFFFFF00),  # 192.0.0.0/24
+    (0xC0000200, 0xFFFFFF00),  # 192.0.2.0/24
+    (0xC0A80000, 0xFFFF0000),  # 192.168.0.0/16
+    (0xC6120000, 0xFFFE0000),  # 198.18.0.0/15
+    (0xC6336400, 0xFFFFFF00),  # 198.51.100.0/24
+    (0xCB007100, 0xFFFFFF00),  # 203.0.113.0/24
+    (0xE0000000, 0xF0000000),  # 224.0.0.0/4 (multicast)
+    (0xF0000000, 0xF0000000),  # 240.0.0.0/4 (reserved + broadcast)
+]
+
+
+def _ints_to_ips(addr_ints: np.ndarray) -> List[str]:
+    """
+    Turn an array of uint32 addresses into dotted-quad strings.
 
-def random_private_ip(rng: random.Random) -> str:
+    We pack the whole array to big-endian bytes once and let
+    socket.inet_ntoa format each 4-byte chunk.
     """
-    Generate a random private IPv4 address, e.g., 10.x.x.x or 192.168.x.x.
+    raw = np.asarray(addr_ints, dtype=">u4").tobytes()
+    return [socket.inet_ntoa(raw[i : i + 4]) for i in range(0, len(raw), 4)]
+
+
+def random_private_ips(rng: np.random.Generator, n: int) -> List[str]:
     """
-    private_ranges = [
-        ipaddress.IPv4Network("10.0.0.0/8"),
-        ipaddress.IPv4Network("172.16.0.0/12"),
-        ipaddress.IPv4Network("192.168.0.0/16"),
-    ]
-    net = rng.choice(private_ranges)
-    host = rng.randint(0, net.num_addresses - 2)  # avoid broadcast
-    return str(net.network_address + host)
+    Generate n random private IPv4 addresses, e.g., 10.x.x.x or 192.168.x.x.
+
+    Each address picks one of PRIV_NETS, then a host offset inside it
+    (never the broadcast address).
+    """
+    bases = np.array([net for net, _, _ in PRIV_NETS], dtype=np.int64)
+    sizes = np.array([size for _, _, size in PRIV_NETS], dtype=np.int64)
+
+    net_idx = rng.integers(0, len(PRIV_NETS), size=n)
+    hosts = rng.integers(0, sizes[net_idx] - 1)  # avoid broadcast
+    return _ints_to_ips(bases[net_idx] + hosts)
 
 
-def random_public_ip(rng: random.Random) -> str:
+def random_public_ips(rng: np.random.Generator, n: int) -> List[str]:
     """
-    Generate a fake 'public' IPv4 by choosing outside private ranges.
+    Generate n fake 'public' IPv4 addresses outside the EXCLUDED ranges.
     This is just for realism in logs.
+
+    We over-draw candidates, throw away anything inside an excluded range
+    with a bitmask test, and repeat until we have enough.
+    """
+    accepted = np.empty(0, dtype=np.int64)
+    while len(accepted) < n:
+        candidates = rng.integers(1, 0xFFFFFFFF, size=max(2 * (n - len(accepted)), 16))
+        keep = np.ones(len(candidates), dtype=bool)
+        for net, mask in EXCLUDED:
+            keep &= (candidates & mask) != net
+        accepted = np.concatenate([accepted, candidates[keep]])
+    return _ints_to_ips(accepted[:n])
+
+
+def _flows_frame(
+    src_ips,
+    dst_ips,
+    src_ports,
+    dst_ports,
+    protocols,
+    durations,
+    bytes_sent,
+    bytes_received,
+    packets,
+    label: str,
+) -> pd.DataFrame:
+    """
+    Assemble a flow table column-wise from already-drawn arrays.
     """
-    while True:
-        addr_int = rng.randint(1, 0xFFFFFFFF - 1)
-        addr = ipaddress.IPv4Address(addr_int)
-        if not addr.is_private and not addr.is_multicast and not addr.is_reserved:
-            return str(addr)
+    return pd.DataFrame(
+        {
+            "src_ip": src_ips,
+            "dst_ip": dst_ips,
+            "src_port": src_ports,
+            "dst_port": dst_ports,
+            "protocol": protocols,
+            "duration": durations,
+            "bytes_sent": bytes_sent,
+            "bytes_received": bytes_received,
+            "packets": packets,
+            "label": label,
+        }
+    )
 
 
 # -------------------------------------------------------------
@@ -66,154 +145,105 @@ def random_public_ip(rng: random.Random) -> str:
 # -------------------------------------------------------------
 
 
-def generate_benign_flows(rng: random.Random, n: int) -> pd.DataFrame:
+def generate_benign_flows(rng: np.random.Generator, n: int) -> pd.DataFrame:
     """
     Simulate benign user traffic, e.g., web browsing, DNS, etc.
     """
-    records = []
-    for _ in range(n):
-        src_ip = random_private_ip(rng)
-        dst_ip = random_public_ip(rng)
-        src_port = rng.randint(1024, 65535)
-        dst_port = rng.choice([80, 443, 53, 123])  # HTTP/HTTPS/DNS/NTP-ish
-        protocol = rng.choice(["tcp", "udp"])
-
-        duration = abs(rng.gauss(3.0, 1.0))  # ~3 seconds
-        bytes_sent = max(200, int(abs(rng.gauss(5000, 3000))))
-        bytes_received = max(500, int(abs(rng.gauss(10000, 5000))))
-        packets = max(3, int(bytes_sent / 500) + int(bytes_received / 800))
-
-        records.append(
-            {
-                "src_ip": src_ip,
-                "dst_ip": dst_ip,
-                "src_port": src_port,
-                "dst_port": dst_port,
-                "protocol": protocol,
-                "duration": duration,
-                "bytes_sent": bytes_sent,
-                "bytes_received": bytes_received,
-                "packets": packets,
-                "label": "benign",
-            }
-        )
+    src_ips = random_private_ips(rng, n)
+    dst_ips = random_public_ips(rng, n)
+    src_ports = rng.integers(1024, 65536, size=n)
+    dst_ports = rng.choice([80, 443, 53, 123], size=n)  # HTTP/HTTPS/DNS/NTP-ish
+    protocols = rng.choice(["tcp", "udp"], size=n)
+
+    durations = np.abs(rng.normal(3.0, 1.0, n))  # ~3 seconds
+    bytes_sent = np.maximum(200, np.abs(rng.normal(5000, 3000, n)).astype(np.int64))
+    bytes_received = np.maximum(500, np.abs(rng.normal(10000, 5000, n)).astype(np.int64))
+    packets = np.maximum(3, bytes_sent // 500 + bytes_received // 800)
 
-    return pd.DataFrame(records)
+    return _flows_frame(
+        src_ips, dst_ips, src_ports, dst_ports, protocols,
+        durations, bytes_sent, bytes_received, packets, "benign",
+    )
 
 
-def generate_port_scans(rng: random.Random, n: int) -> pd.DataFrame:
+def generate_port_scans(rng: np.random.Generator, n: int) -> pd.DataFrame:
     """
     Simulate port-scanning behavior:
     - Many dst_ports from the same src_ip to the same dst_ip.
     - Short duration, low bytes per flow.
     """
-    records = []
-    for _ in range(n):
-        src_ip = random_private_ip(rng)
-        dst_ip = random_public_ip(rng)
-
-        # Choose a port range to scan
-        base_port = rng.randint(1, 60000)
-        for offset in range(rng.randint(5, 25)):  # small multi-port scan
-            dst_port = base_port + offset
-            src_port = rng.randint(1024, 65535)
-
-            duration = abs(rng.gauss(0.2, 0.1))
-            bytes_sent = rng.randint(40, 300)
-            bytes_received = rng.randint(0, 400)
-            packets = rng.randint(1, 5)
-
-            records.append(
-                {
-                    "src_ip": src_ip,
-                    "dst_ip": dst_ip,
-                    "src_port": src_port,
-                    "dst_port": dst_port,
-                    "protocol": "tcp",
-                    "duration": duration,
-                    "bytes_sent": bytes_sent,
-                    "bytes_received": bytes_received,
-                    "packets": packets,
-                    "label": "port_scan",
-                }
-            )
-    return pd.DataFrame(records)
-
-
-def generate_bruteforce_flows(rng: random.Random, n: int) -> pd.DataFrame:
+    # One "session" per scan: same src/dst, a small contiguous port range.
+    counts = rng.integers(5, 26, size=n)  # small multi-port scan
+    base_ports = rng.integers(1, 60001, size=n)
+    src_ips = np.repeat(random_private_ips(rng, n), counts)
+    dst_ips = np.repeat(random_public_ips(rng, n), counts)
+
+    # Position of each row inside its session (0, 1, ..., count-1), computed
+    # for all sessions at once: row index minus the session's start row.
+    total = int(counts.sum())
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(total) - np.repeat(starts, counts)
+    dst_ports = np.repeat(base_ports, counts) + offsets
+
+    src_ports = rng.integers(1024, 65536, size=total)
+    durations = np.abs(rng.normal(0.2, 0.1, total))
+    bytes_sent = rng.integers(40, 301, size=total)
+    bytes_received = rng.integers(0, 401, size=total)
+    packets = rng.integers(1, 6, size=total)
+
+    return _flows_frame(
+        src_ips, dst_ips, src_ports, dst_ports, "tcp",
+        durations, bytes_sent, bytes_received, packets, "port_scan",
+    )
+
+
+def generate_bruteforce_flows(rng: np.random.Generator, n: int) -> pd.DataFrame:
     """
     Simulate brute-force login attempts:
     - Many flows from same src_ip to the same dst_ip:22 or :3389 or :445.
     - Short duration, repetitive patterns.
     """
-    records = []
-    for _ in range(n):
-        src_ip = random_private_ip(rng)
-        dst_ip = random_public_ip(rng)
-        dst_port = rng.choice([22, 3389, 445])
-
-        for _ in range(rng.randint(10, 50)):  # repeated attempts
-            src_port = rng.randint(1024, 65535)
-            duration = abs(rng.gauss(1.0, 0.4))
-            bytes_sent = rng.randint(200, 1000)
-            bytes_received = rng.randint(50, 800)
-            packets = rng.randint(2, 10)
-
-            records.append(
-                {
-                    "src_ip": src_ip,
-                    "dst_ip": dst_ip,
-                    "src_port": src_port,
-                    "dst_port": dst_port,
-                    "protocol": "tcp",
-                    "duration": duration,
-                    "bytes_sent": bytes_sent,
-                    "bytes_received": bytes_received,
-                    "packets": packets,
-                    "label": "brute_force",
-                }
-            )
-
-    return pd.DataFrame(records)
-
-
-def generate_c2_beacons(rng: random.Random, n: int) -> pd.DataFrame:
+    counts = rng.integers(10, 51, size=n)  # repeated attempts
+    src_ips = np.repeat(random_private_ips(rng, n), counts)
+    dst_ips = np.repeat(random_public_ips(rng, n), counts)
+    dst_ports = np.repeat(rng.choice([22, 3389, 445], size=n), counts)
+
+    total = int(counts.sum())
+    src_ports = rng.integers(1024, 65536, size=total)
+    durations = np.abs(rng.normal(1.0, 0.4, total))
+    bytes_sent = rng.integers(200, 1001, size=total)
+    bytes_received = rng.integers(50, 801, size=total)
+    packets = rng.integers(2, 11, size=total)
+
+    return _flows_frame(
+        src_ips, dst_ips, src_ports, dst_ports, "tcp",
+        durations, bytes_sent, bytes_received, packets, "brute_force",
+    )
+
+
+def generate_c2_beacons(rng: np.random.Generator, n: int) -> pd.DataFrame:
     """
     Simulate beacon-like C2 flows:
     - Regular intervals (we just encode as similar durations).
     - Small, steady payload sizes.
     """
-    records = []
-    for _ in range(n):
-        src_ip = random_private_ip(rng)
-        dst_ip = random_public_ip(rng)
-        dst_port = rng.choice([443, 8080, 8443])
-
-        # multiple beacons along a "session"
-        beacon_count = rng.randint(5, 30)
-        for _ in range(beacon_count):
-            src_port = rng.randint(1024, 65535)
-            duration = abs(rng.gauss(0.5, 0.2))
-            bytes_sent = rng.randint(80, 400)
-            bytes_received = rng.randint(100, 800)
-            packets = rng.randint(2, 8)
-
-            records.append(
-                {
-                    "src_ip": src_ip,
-                    "dst_ip": dst_ip,
-                    "src_port": src_port,
-                    "dst_port": dst_port,
-                    "protocol": "tcp",
-                    "duration": duration,
-                    "bytes_sent": bytes_sent,
-                    "bytes_received": bytes_received,
-                    "packets": packets,
-                    "label": "c2_beacon",
-                }
-            )
-
-    return pd.DataFrame(records)
+    # multiple beacons along a "session"
+    counts = rng.integers(5, 31, size=n)
+    src_ips = np.repeat(random_private_ips(rng, n), counts)
+    dst_ips = np.repeat(random_public_ips(rng, n), counts)
+    dst_ports = np.repeat(rng.choice([443, 8080, 8443], size=n), counts)
+
+    total = int(counts.sum())
+    src_ports = rng.integers(1024, 65536, size=total)
+    durations = np.abs(rng.normal(0.5, 0.2, total))
+    bytes_sent = rng.integers(80, 401, size=total)
+    bytes_received = rng.integers(100, 801, size=total)
+    packets = rng.integers(2, 9, size=total)
+
+    return _flows_frame(
+        src_ips, dst_ips, src_ports, dst_ports, "tcp",
+        durations, bytes_sent, bytes_received, packets, "c2_beacon",
+    )
 
 
 # -------------------------------------------------------------
@@ -221,12 +251,21 @@ def generate_c2_beacons(rng: random.Random, n: int) -> pd.DataFrame:
 # -------------------------------------------------------------
 
 
+def _run_generator(generator, seed_seq: np.random.SeedSequence, n: int) -> pd.DataFrame:
+    """
+    Worker entrypoint: rebuild a Generator from its own child seed and run
+    one behavior generator. Module-level so it can be pickled to a process.
+    """
+    return generator(np.random.default_rng(seed_seq), n)
+
+
 def generate_flows(
     num_benign: int = 2000,
     num_port_scans: int = 80,
     num_bruteforce: int = 80,
     num_c2: int = 80,
     seed: int = RANDOM_SEED,
+    parallel: bool | None = None,
 ) -> pd.DataFrame:
     """
     Generate a combined synthetic dataset of flows.
@@ -234,25 +273,65 @@ def generate_flows(
     In plain English:
     - Build a big table of flows with mixed behaviors.
     - Shuffle the rows so attacks are mixed among benign.
+
+    The four behaviors are independent, so each one gets its own child seed
+    (SeedSequence.spawn) and, for large datasets, its own worker process.
+    Because the seeds don't depend on scheduling, the output is identical
+    whether it runs in parallel or not. parallel=None decides automatically
+    from PARALLEL_GENERATION_MIN_FLOWS and the CPU count: for small datasets
+    (or a single core), starting the processes costs more than the
+    generation itself.
     """
-    rng = random.Random(seed)
+    jobs = [
+        (generate_benign_flows, num_benign),
+        (generate_port_scans, num_port_scans),
+        (generate_bruteforce_flows, num_bruteforce),
+        (generate_c2_beacons, num_c2),
+    ]
+    child_seeds = np.random.SeedSequence(seed).spawn(len(jobs))
 
-    benign_df = generate_benign_flows(rng, num_benign)
-    scan_df = generate_port_scans(rng, num_port_scans)
-    brute_df = generate_bruteforce_flows(rng, num_bruteforce)
-    c2_df = generate_c2_beacons(rng, num_c2)
+    if parallel is None:
+        parallel = (
+            sum(n for _, n in jobs) >= PARALLEL_GENERATION_MIN_FLOWS
+            and (os.cpu_count() or 1) > 1
+        )
 
-    df = pd.concat([benign_df, scan_df, brute_df, c2_df], ignore_index=True)
-    df = df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    if parallel:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [
+                pool.submit(_run_generator, generator, child, n)
+                for (generator, n), child in zip(jobs, child_seeds)
+            ]
+            benign_df, scan_df, brute_df, c2_df = [f.result() for f in futures]
+    else:
+        benign_df, scan_df, brute_df, c2_df = [
+            _run_generator(generator, child, n)
+            for (generator, n), child in zip(jobs, child_seeds)
+        ]
+
+    df = pd.concat([benign_df, scan_df, brute_df, c2_df], ignore_index=True, copy=False)
+
+    # Shuffle with one positional take and a fresh RangeIndex; cheaper than
+    # df.sample(frac=1.0) followed by reset_index(drop=True).
+    perm = np.random.default_rng(seed).permutation(len(df))
+    df = df.take(perm)
+    df.index = pd.RangeIndex(len(df))
     return df
 
 
 def save_flows(df: pd.DataFrame, path=FLOWS_PATH) -> str:
     """
-    Save the synthetic flows to CSV under data/raw/.
+    Save the synthetic flows under data/raw/.
+
+    Parquet (zstd-compressed) is the default: it keeps the column types and
+    is much smaller and faster to read back than CSV. A path ending in .csv
+    still writes CSV.
     """
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    ensure_dirs()
+    if Path(path).suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(path, index=False)
     return str(path)
 
 
@@ -260,9 +339,10 @@ def run_synthetic_pipeline() -> str:
     """
     High-level entrypoint:
     - Generate synthetic flows
-    - Save them to CSV
+    - Save them to disk (Parquet by default)
     - Print where they went
     """
+    ensure_dirs()
     print("[RedRiver] Generating synthetic flows...")
     df = generate_flows()
     out_path = save_flows(df)
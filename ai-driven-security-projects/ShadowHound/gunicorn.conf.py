@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for serving the ShadowHound API with several workers.
+
+Usage (from the ShadowHound directory):
+
+    gunicorn shadowhound.api:app -c gunicorn.conf.py
+
+In plain English:
+- preload_app imports shadowhound.api (and so loads the model) once, in the
+  gunicorn master, before any workers exist.
+- Each worker is then fork()ed from the master. On Linux the forked workers
+  share the master's memory pages copy-on-write, and the model is never
+  written to while serving, so those pages stay shared.
+- Without preload, every worker loads its own copy of the model, so RSS
+  grows by roughly one model size per worker. With preload, workers after
+  the first add almost nothing on top of the shared model.
+"""
+
+import os
+
+bind = os.environ.get("SHADOWHOUND_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("SHADOWHOUND_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own onnxruntime session.
+
+    onnxruntime's thread pool does not survive fork(), so a session created
+    in the master cannot be used safely by the children. The session is
+    small next to the joblib model, so reopening it per worker is cheap.
+    """
+    from shadowhound import api
+
+    api.ONNX_SESSION = api._load_onnx_session()
@@ -4,38 +4,43 @@ ShadowHound API
 FastAPI service that exposes the trained ShadowHound model over HTTP.
 
 High-level idea in plain English:
-- We load the trained RandomForest model from disk.
+- We load the trained model from disk.
 - We load the list of feature columns the model expects.
 - We accept a JSON body that describes a single AD node (user / computer / group).
-- We turn that JSON into a one-row pandas DataFrame.
-- We make sure the columns line up with what the model saw during training.
+- We turn that JSON into a one-row numpy array whose columns line up with
+  what the model saw during training.
 - We ask the model to predict a risk label + probabilities.
 - We return a friendly JSON response for dashboards or other tools.
 """
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 
 import json
 import joblib
-import pandas as pd
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 # Import paths from the ShadowHound config so everything stays in one place.
-from .config import MODEL_PATH, FEATURE_COLS_PATH
+from .config import MODEL_PATH, ONNX_MODEL_PATH, FEATURE_COLS_PATH
 
 # ---------------------------------------------------------------------------
 # FastAPI app metadata
 # ---------------------------------------------------------------------------
 
+# ORJSONResponse: responses are serialized by orjson (C) instead of the
+# stdlib json encoder, which dominates latency for small /predict payloads.
 app = FastAPI(
     title="ShadowHound API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     description=(
         "Graph-based Active Directory attack path risk scorer.\n\n"
         "This service takes features about a single AD node (user / computer / group) "
-        "and uses a trained RandomForest model to predict whether that node looks "
+        "and uses a trained tree-ensemble model to predict whether that node looks "
         "low-risk or high-risk in the attack graph."
     ),
 )
@@ -50,7 +55,9 @@ class NodeFeatures(BaseModel):
     This describes the shape of the JSON payload a client must send.
 
     All fields here are numeric or 0/1 flags so they're easy to plug into
-    a machine-learning model.
+    a machine-learning model. The flags are validated to 0 or 1 (anything
+    else is a 422), which also keeps them inside the int8 record fields
+    /predict_batch packs them into.
     """
 
     # Basic graph structure
@@ -89,6 +96,8 @@ class NodeFeatures(BaseModel):
 
     is_target_group_member: int = Field(
         ...,
+        ge=0,
+        le=1,
         description="1 if this node is directly in a high-value / target group, else 0.",
         example=0,
     )
@@ -96,18 +105,24 @@ class NodeFeatures(BaseModel):
     # One-hot encoded node type flags
     is_user: int = Field(
         ...,
+        ge=0,
+        le=1,
         description="1 if this node represents a user account, else 0.",
         example=1,
     )
 
     is_group: int = Field(
         ...,
+        ge=0,
+        le=1,
         description="1 if this node represents a group object, else 0.",
         example=0,
     )
 
     is_computer: int = Field(
         ...,
+        ge=0,
+        le=1,
         description="1 if this node represents a computer object, else 0.",
         example=0,
     )
@@ -122,13 +137,25 @@ def _load_artifacts():
     Load the trained model and the list of feature columns from disk.
 
     In plain English:
-    - model.joblib: the RandomForest we trained.
+    - model.joblib: the classifier we trained.
     - feature_columns.json: the exact column order the model saw during training.
+
+    The model is opened with mmap_mode="r": the numpy arrays behind the trees
+    are memory-mapped from the file instead of copied onto the heap, so
+    several API workers share the same pages. This only works because
+    save_artifacts() writes the model uncompressed.
     """
-    model = joblib.load(MODEL_PATH)
+    model = joblib.load(MODEL_PATH, mmap_mode="r")
+
+    # We always hand the model a plain numpy row laid out in feature_cols
+    # order, so the column names stored at fit time are redundant. Dropping
+    # them stops scikit-learn from warning about "missing feature names"
+    # on every request.
+    if hasattr(model, "feature_names_in_"):
+        del model.feature_names_in_
 
     with open(FEATURE_COLS_PATH, "r", encoding="utf-8") as f:
-        feature_cols: List[str] = json.load(f)
+        feature_cols: Tuple[str, ...] = tuple(json.load(f))
 
     return model, feature_cols
 
@@ -136,46 +163,166 @@ def _load_artifacts():
 # Load artifacts once at import time so we don't reload on every request.
 MODEL, FEATURE_COLUMNS = _load_artifacts()
 
+# Column name -> position in the model's input row. Anything not in here is
+# a field the model never saw and is simply ignored.
+COL_INDEX: Dict[str, int] = {col: i for i, col in enumerate(FEATURE_COLUMNS)}
+N_COLS = len(FEATURE_COLUMNS)
+
+# Class labels never change after load, so convert them to strings once
+# instead of copying MODEL.classes_ into a new list on every request.
+CLASSES = MODEL.classes_
+CLASSES_STR: Tuple[str, ...] = tuple(str(c) for c in CLASSES)
+
+
+def _load_onnx_session():
+    """
+    Open the ONNX export of the model with onnxruntime, if we can.
+
+    In plain English:
+    - onnxruntime evaluates all trees in one fused, vectorized op, which is
+      several times faster than scikit-learn's per-tree loop.
+    - If onnxruntime isn't installed or no model.onnx was exported, we
+      return None and keep using the joblib model.
+    - One intra-op thread: requests are a handful of rows, where spinning
+      up a thread pool per call costs more than it saves. Scale with API
+      workers instead.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    if not ONNX_MODEL_PATH.exists():
+        return None
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = 1
+    return ort.InferenceSession(
+        str(ONNX_MODEL_PATH), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+
+
+ONNX_SESSION = _load_onnx_session()
+ONNX_INPUT_NAME = ONNX_SESSION.get_inputs()[0].name if ONNX_SESSION else None
+
+
+def _predict_proba(X: np.ndarray) -> np.ndarray:
+    """
+    Class probabilities for a float32 (N, N_COLS) matrix, via onnxruntime
+    when available and scikit-learn otherwise. Column order matches CLASSES
+    either way (the ONNX export keeps model.classes_ order).
+    """
+    if ONNX_SESSION is not None:
+        _, proba = ONNX_SESSION.run(None, {ONNX_INPUT_NAME: X})
+        return proba
+    return MODEL.predict_proba(X)
+
 
 # ---------------------------------------------------------------------------
-# Helper: turn a NodeFeatures object into a model-ready DataFrame
+# Helper: turn a NodeFeatures object into a model-ready row
 # ---------------------------------------------------------------------------
 
-def _build_feature_frame(sample: NodeFeatures) -> pd.DataFrame:
+def _compile_row_filler(columns: Tuple[str, ...]):
     """
-    Convert the incoming JSON (NodeFeatures) into a 1-row DataFrame that matches
-    the training-time feature layout.
+    Generate a function that copies a request dict into a (1, N) row for
+    this exact column layout.
 
-    Steps:
-    1. Convert Pydantic model -> Python dict.
-    2. Build a one-row pandas DataFrame.
-    3. Add any missing columns with default value 0 (safety).
-    4. Drop any extra columns the model never saw.
-    5. Reorder columns to exactly match FEATURE_COLUMNS.
+    FEATURE_COLUMNS is fixed once the model is loaded, so instead of looking
+    every field up in COL_INDEX per request, we write out one straight-line
+    assignment per column, e.g.:
+
+        def _fill(d, x):
+            x[0, 0] = d.get('degree', 0.0)
+            x[0, 1] = d.get('num_admin_edges', 0.0)
+            ...
+
+    Columns missing from the request default to 0; request fields the model
+    never saw are simply never read.
+    """
+    lines = ["def _fill(d, x):"]
+    lines += [f"    x[0, {i}] = d.get({col!r}, 0.0)" for i, col in enumerate(columns)]
+    if not columns:
+        lines.append("    pass")
+
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_fill"]
+
+
+_fill_row = _compile_row_filler(FEATURE_COLUMNS)
+
+
+def _build_feature_frame(sample: NodeFeatures) -> np.ndarray:
+    """
+    Convert the incoming JSON (NodeFeatures) into a (1, N_COLS) float32 array
+    that matches the training-time feature layout.
+
+    We skip pandas here on purpose: for a single request, building a
+    DataFrame costs far more than walking the trees. The row is a fresh
+    array per call (not a shared scratch buffer) so concurrent requests
+    can't overwrite each other.
     """
+    x = np.empty((1, N_COLS), dtype=np.float32)
+    _fill_row(sample.model_dump(), x)
+    return x
 
-    # 1) Pydantic model -> plain dict
-    data = sample.model_dump()
 
-    # 2) One-row DataFrame
-    X = pd.DataFrame([data])
+# 0/1 flag fields of NodeFeatures. In the compact record below they take one
+# byte each (int8) instead of an 8-byte int; everything else is float32.
+BOOL_COLS = frozenset({"is_target_group_member", "is_user", "is_group", "is_computer"})
 
-    # 3) Add missing columns (if we ever extend the model, this keeps things robust)
-    missing = [c for c in FEATURE_COLUMNS if c not in X.columns]
-    for col in missing:
-        X[col] = 0
+_FIELDS: Tuple[str, ...] = tuple(NodeFeatures.model_fields)
+_RECORD_DTYPE = np.dtype(
+    [(name, np.int8 if name in BOOL_COLS else np.float32) for name in _FIELDS]
+)
+
+# Which record fields feed the model, and where they land in its input row.
+_SRC_IDX = np.array([j for j, name in enumerate(_FIELDS) if name in COL_INDEX], dtype=np.intp)
+_DST_IDX = np.array([COL_INDEX[name] for name in _FIELDS if name in COL_INDEX], dtype=np.intp)
 
-    # 4) Drop any unexpected columns
-    extra = [c for c in X.columns if c not in FEATURE_COLUMNS]
-    if extra:
-        X = X.drop(columns=extra)
 
-    # 5) Reorder columns to training-time order
-    X = X[FEATURE_COLUMNS]
+def _build_feature_matrix(samples: List[NodeFeatures]) -> np.ndarray:
+    """
+    Convert a list of NodeFeatures into an (N, N_COLS) float32 array.
 
+    Steps:
+    1. Pack all samples into one compact structured array (_RECORD_DTYPE),
+       one tuple per sample - no per-cell Python assignments.
+    2. Widen the whole thing to float32 in a single call.
+    3. Scatter the known fields into their training-time columns; columns
+       the request doesn't provide stay 0, fields the model never saw are
+       skipped.
+    """
+    records = np.array(
+        [tuple(getattr(sample, name) for name in _FIELDS) for sample in samples],
+        dtype=_RECORD_DTYPE,
+    )
+    values = structured_to_unstructured(records, dtype=np.float32)
+
+    X = np.zeros((len(samples), N_COLS), dtype=np.float32)
+    X[:, _DST_IDX] = values[:, _SRC_IDX]
     return X
 
 
+def _format_prediction(proba: np.ndarray) -> Dict[str, Any]:
+    """
+    Turn one row of predict_proba output into the JSON "prediction" block.
+    """
+    # Find the most likely class
+    best_idx = int(proba.argmax())
+
+    # proba.tolist() hands back Python floats in one C call, so no
+    # per-element float() is needed for the probability dict.
+    probs = proba.tolist()
+
+    return {
+        "class_label": CLASSES_STR[best_idx],
+        "class_index": best_idx,
+        "confidence": probs[best_idx],
+        "probs": dict(zip(CLASSES_STR, probs)),
+    }
+
+
 # ---------------------------------------------------------------------------
 # API routes
 # ---------------------------------------------------------------------------
@@ -192,7 +339,7 @@ def healthcheck() -> Dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/predict", tags=["inference"])
+@app.post("/predict", tags=["inference"], response_class=ORJSONResponse)
 def predict_risk(sample: NodeFeatures):
     """
     Core prediction endpoint.
@@ -208,30 +355,51 @@ def predict_risk(sample: NodeFeatures):
       - A per-class probability dictionary.
     """
 
-    # Turn the JSON payload into a model-ready DataFrame
+    # Turn the JSON payload into a model-ready row vector
     X = _build_feature_frame(sample)
 
-    # Ask the RandomForest for class probabilities.
+    # Ask the model for class probabilities.
     # predict_proba returns: array([[p(class_0), p(class_1), ...]])
-    proba = MODEL.predict_proba(X)[0]
-    classes = list(MODEL.classes_)
-
-    # Find the most likely class
-    best_idx = int(proba.argmax())
-    best_label = str(classes[best_idx])
-    best_confidence = float(proba[best_idx])
-
-    # Build a nicer dict of probabilities
-    prob_dict = {str(cls): float(p) for cls, p in zip(classes, proba)}
+    proba = _predict_proba(X)[0]
 
     return {
         "input": sample.model_dump(),
-        "prediction": {
-            "class_label": best_label,
-            "class_index": best_idx,
-            "confidence": best_confidence,
-            "probs": prob_dict,
+        "prediction": _format_prediction(proba),
+        "model_info": {
+            "feature_columns_used": FEATURE_COLUMNS,
         },
+    }
+
+
+@app.post("/predict_batch", tags=["inference"], response_class=ORJSONResponse)
+def predict_risk_batch(samples: List[NodeFeatures]):
+    """
+    Score many AD nodes in one call.
+
+    Input:
+      - JSON list of node descriptions (each one shaped like NodeFeatures).
+
+    Output:
+      - One entry per input, in the same order, with the same "input" and
+        "prediction" blocks that /predict returns.
+
+    In plain English:
+    - All rows go through the model in a single predict_proba call.
+    - Tree traversal is dominated by reading the tree arrays from memory;
+      scoring a batch together reuses those arrays while they're still in
+      cache instead of re-reading them for every HTTP request.
+    """
+    predictions = []
+    if samples:
+        X = _build_feature_matrix(samples)
+        proba = _predict_proba(X)
+        predictions = [
+            {"input": sample.model_dump(), "prediction": _format_prediction(row)}
+            for sample, row in zip(samples, proba)
+        ]
+
+    return {
+        "predictions": predictions,
         "model_info": {
             "feature_columns_used": FEATURE_COLUMNS,
         },
@@ -12,20 +12,37 @@ DATA_DIR = ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
 
-# Where our synthetic BloodHound-style edges live
-RAW_GRAPH_PATH = RAW_DIR / "ad_edges.json"
+# Where our synthetic BloodHound-style edges live. Parquet keeps the
+# categorical edge/node type columns dictionary-encoded on disk; loaders
+# still accept a CSV path (such as the SNAPSHOT_PATH sample).
+RAW_GRAPH_PATH = RAW_DIR / "ad_edges.parquet"
+
+
+def ensure_dirs() -> None:
+    """
+    Create the data directories on demand.
+
+    Pipelines that write files call this; importing config alone (API,
+    tests) no longer touches the filesystem.
+    """
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 # -------------------------------------------------------------------
 # Files ShadowHound will read/write
 # -------------------------------------------------------------------
 SNAPSHOT_PATH = RAW_DIR / "ad_edges.json"
-FEATURES_PATH = PROCESSED_DIR / "features.csv"
+# Parquet keeps column dtypes and compresses well; loaders still accept a
+# .csv path for older feature files.
+FEATURES_PATH = PROCESSED_DIR / "features.parquet"
 
 # Where ML training stores the model & report
 MODEL_PATH = ROOT / "model.joblib"
+
+# Same model exported to ONNX for onnxruntime inference (written when
+# skl2onnx is installed; the API falls back to MODEL_PATH otherwise)
+ONNX_MODEL_PATH = MODEL_PATH.with_suffix(".onnx")
 REPORT_PATH = ROOT / "report.json"
 
 # JSON file storing the list of model features
@@ -44,6 +61,14 @@ LABEL_COLUMN = "risk_label"
 # -------------------------------------------------------------------
 RANDOM_SEED = 1337
 
+# -------------------------------------------------------------------
+# Which classifier ml.train_model() builds:
+#   "hist_gb"       -> HistGradientBoostingClassifier (default; bins each
+#                      feature once, much faster to train and score)
+#   "random_forest" -> the original 160-tree RandomForestClassifier
+# -------------------------------------------------------------------
+MODEL_TYPE = "hist_gb"
+
 # -------------------------------------------------------------------
 # Debug helper — prints out paths when called manually
 # -------------------------------------------------------------------
@@ -52,9 +77,11 @@ def describe_paths() -> None:
     print("[ShadowHound] DATA_DIR =", DATA_DIR)
     print("[ShadowHound] RAW_DIR =", RAW_DIR)
     print("[ShadowHound] PROCESSED_DIR =", PROCESSED_DIR)
+    print("[ShadowHound] RAW_GRAPH_PATH =", RAW_GRAPH_PATH)
     print("[ShadowHound] SNAPSHOT_PATH =", SNAPSHOT_PATH)
     print("[ShadowHound] FEATURES_PATH =", FEATURES_PATH)
     print("[ShadowHound] MODEL_PATH =", MODEL_PATH)
+    print("[ShadowHound] ONNX_MODEL_PATH =", ONNX_MODEL_PATH)
     print("[ShadowHound] REPORT_PATH =", REPORT_PATH)
     print("[ShadowHound] FEATURE_COLUMNS_PATH =", FEATURE_COLUMNS_PATH)
 
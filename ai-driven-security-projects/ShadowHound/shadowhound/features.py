@@ -8,24 +8,19 @@ from shadowhound.config import (
     RAW_GRAPH_PATH,
     FEATURES_PATH,
     FEATURE_COLS_PATH,
-    LABEL_COLUMN
+    LABEL_COLUMN,
+    ensure_dirs,
 )
 
 ENCODERS_PATH = Path(FEATURES_PATH).parent / "encoders.joblib"
 
 
 def load_edges(path: str) -> pd.DataFrame:
+    if Path(path).suffix == ".parquet":
+        return pd.read_parquet(path, engine="pyarrow")
     return pd.read_csv(path)
 
 
-def build_graph(edges: pd.DataFrame):
-    import networkx as nx
-    G = nx.DiGraph()
-    for _, r in edges.iterrows():
-        G.add_edge(r["src"], r["dst"], edge_type=r["edge_type"])
-    return G
-
-
 def add_risk_labels(df: pd.DataFrame) -> pd.DataFrame:
     df[LABEL_COLUMN] = (df["num_admin_edges"] > 0).astype(int)
     return df
@@ -34,47 +29,64 @@ def add_risk_labels(df: pd.DataFrame) -> pd.DataFrame:
 def encode_categoricals(df: pd.DataFrame):
     """
     Convert any non-numeric feature columns into numeric encodings.
-    Saves encoders so inference stays consistent.
+    Saves the categories of each column so inference stays consistent.
+
+    Each text column becomes a pandas category and is replaced by its
+    integer codes - one vectorized pass per column, with no sklearn
+    LabelEncoder objects to fit or load. ENCODERS_PATH holds
+    {column: [categories...]}; at inference time
+    pd.Categorical(values, categories=categories[col]).codes gives the
+    same codes back (-1 for values never seen in training).
     """
-    from sklearn.preprocessing import LabelEncoder
-
-    encoders = {}
-
-    for col in df.columns:
-        if col == LABEL_COLUMN:
-            continue
+    # "string" catches pandas' dedicated str dtype as well as plain object.
+    cat_cols = df.select_dtypes(include=["object", "string"]).columns.difference([LABEL_COLUMN])
 
-        if df[col].dtype == object:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col].astype(str))
-            encoders[col] = le
+    categories = {}
+    for col in cat_cols:
+        cat = df[col].astype("category")
+        categories[col] = list(cat.cat.categories)
+        df[col] = cat.cat.codes.astype("int32")
 
-    # Save all encoders for later inference
-    joblib.dump(encoders, ENCODERS_PATH)
+    # Save the category lists for later inference
+    joblib.dump(categories, ENCODERS_PATH)
 
     return df
 
 
 def extract_features(df_edges: pd.DataFrame) -> pd.DataFrame:
-    import networkx as nx
-    G = build_graph(df_edges)
-
-    rows = []
-    for node in G.nodes():
-        degree = G.degree(node)
-        admin_edges = sum(1 for _, _, d in G.out_edges(node, data=True)
-                          if d.get("edge_type") == "admin")
-        group_edges = sum(1 for _, _, d in G.out_edges(node, data=True)
-                          if d.get("edge_type") == "member_of")
-
-        rows.append({
-            "node": node,
-            "degree": degree,
-            "num_admin_edges": admin_edges,
-            "num_group_edges": group_edges,
-        })
-
-    df = pd.DataFrame(rows)
+    """
+    Per-node graph features computed straight from the edge table.
+
+    This gives the same numbers as walking a networkx DiGraph node by node
+    (a repeated src -> dst pair is one edge, and its last edge_type wins),
+    but as a few groupby/value_counts passes over the edges instead of
+    scanning each node's out-edges in Python.
+    """
+    # Node order matches G.nodes(): first appearance, src before dst.
+    nodes = pd.unique(df_edges[["src", "dst"]].to_numpy().ravel())
+
+    edges = df_edges.drop_duplicates(["src", "dst"], keep="last")
+
+    # In + out degree (a self-loop counts twice, as in networkx).
+    degree = pd.concat([edges["src"], edges["dst"]]).value_counts()
+
+    out_by_type = edges.groupby(["src", "edge_type"]).size().unstack(fill_value=0)
+
+    df = (
+        pd.DataFrame(
+            {
+                "degree": degree,
+                "num_admin_edges": out_by_type.get("admin", 0),
+                "num_group_edges": out_by_type.get("member_of", 0),
+            }
+        )
+        .reindex(nodes)
+        .fillna(0)
+        .astype("int32")
+        .rename_axis("node")
+        .reset_index()
+    )
+
     df = add_risk_labels(df)
     df = encode_categoricals(df)
 
@@ -84,11 +96,15 @@ def extract_features(df_edges: pd.DataFrame) -> pd.DataFrame:
 def save_features(df: pd.DataFrame, path: str) -> str:
     out = Path(path)
     out.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out, index=False)
+    if out.suffix == ".parquet":
+        df.to_parquet(out, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(out, index=False)
     return str(out)
 
 
 def run_feature_pipeline():
+    ensure_dirs()
     print("[ShadowHound] Loading raw AD edges...")
     edges = load_edges(RAW_GRAPH_PATH)
 
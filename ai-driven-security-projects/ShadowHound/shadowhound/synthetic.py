@@ -11,54 +11,73 @@ In plain English:
 - We label nodes as higher or lower risk depending on whether they can
   reach those targets through admin-like paths.
 
-The output is a CSV saved to RAW_GRAPH_PATH with:
+The output is a Parquet file saved to RAW_GRAPH_PATH with:
   src, dst, edge_type, src_type, dst_type
 """
 
 from __future__ import annotations
 
-import random
 from dataclasses import dataclass
-from typing import List
+from typing import Tuple
 
-import networkx as nx
+import numpy as np
 import pandas as pd
 
 from .config import (
-    RAW_DIR,
     RAW_GRAPH_PATH,
     RANDOM_SEED,
+    ensure_dirs,
 )
 
 
+NODE_TYPES = ("user", "group", "computer")
+EDGE_TYPES = ("member_of", "admin_to", "session_on")
+
+
 # ---------------------------
 # Simple dataclass definitions
 # ---------------------------
 
 @dataclass
-class Node:
-    """Represents a single AD object (user, group, computer)."""
-    name: str
-    node_type: str  # "user", "group", "computer"
+class Nodes:
+    """All AD objects (users, groups, computers), one array entry per object."""
+    names: np.ndarray       # object names, e.g. "user_3"
+    node_type: np.ndarray   # codes into NODE_TYPES
 
 
 @dataclass
-class Edge:
-    """Represents a relationship between two objects."""
-    src: str
-    dst: str
-    edge_type: str  # "member_of", "admin_to", "session_on", etc.
+class Edges:
+    """All relationships, as node indices plus a type code per edge."""
+    src: np.ndarray         # indices into Nodes.names
+    dst: np.ndarray         # indices into Nodes.names
+    edge_type: np.ndarray   # codes into EDGE_TYPES
 
 
 # ---------------------------
 # Synthetic graph generator
 # ---------------------------
 
+def _sample_rows(
+    rng: np.random.Generator, k: np.ndarray, n_items: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each row i, pick k[i] distinct items out of n_items.
+
+    Vectorized version of calling random.sample(items, k[i]) once per row:
+    shuffle every row at once (argsort of a random matrix) and keep the
+    first k[i] columns. Returns (row_index, item_index) pairs.
+    """
+    order = rng.random((len(k), n_items)).argsort(axis=1)
+    keep = np.arange(n_items) < k[:, None]
+    rows = np.nonzero(keep)[0]
+    return rows, order[keep]
+
+
 def build_synthetic_ad(
     num_users: int = 60,
     num_groups: int = 10,
     num_computers: int = 25,
-) -> tuple[List[Node], List[Edge]]:
+) -> Tuple[Nodes, Edges]:
     """
     Build a toy AD-style environment.
 
@@ -67,21 +86,32 @@ def build_synthetic_ad(
     - Make nested groups.
     - Add admin rights on some computers.
     - Add user sessions on computers (like they’re logged in).
-    """
-    random.seed(RANDOM_SEED)
 
-    nodes: List[Node] = []
-    edges: List[Edge] = []
+    Every kind of edge is drawn for all objects at once with NumPy's
+    random generator, as arrays of node indices, so no per-edge Python
+    objects are built.
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
 
     # --- Create users, groups, computers ---
-
-    users = [Node(f"user_{i}", "user") for i in range(num_users)]
-    groups = [Node(f"group_{i}", "group") for i in range(num_groups)]
-    computers = [Node(f"comp_{i}", "computer") for i in range(num_computers)]
-
-    nodes.extend(users)
-    nodes.extend(groups)
-    nodes.extend(computers)
+    # Nodes are laid out as [users | groups | computers]; these offsets turn
+    # a per-kind index into a node index.
+    users = np.arange(num_users)
+    groups = num_users + np.arange(num_groups)
+    computers = num_users + num_groups + np.arange(num_computers)
+
+    nodes = Nodes(
+        names=np.array(
+            [f"user_{i}" for i in range(num_users)]
+            + [f"group_{i}" for i in range(num_groups)]
+            + [f"comp_{i}" for i in range(num_computers)],
+            dtype=object,
+        ),
+        node_type=np.repeat(
+            np.arange(len(NODE_TYPES), dtype=np.int8),
+            [num_users, num_groups, num_computers],
+        ),
+    )
 
     # Pick a few "crown jewel" targets:
     # - A high-priv group (like Domain Admins)
@@ -89,70 +119,49 @@ def build_synthetic_ad(
     da_group = groups[0]                 # pretend this is "Domain Admins"
     tier0_computers = computers[:3]      # pretend these are DCs / Tier-0
 
-    # --- Group nesting (group -> group, member_of) ---
+    src_parts, dst_parts, type_parts = [], [], []
 
-    for child_idx in range(1, len(groups)):
-        # Point some groups to parent groups to create depth
-        parent_idx = random.randint(0, child_idx - 1)
-        edges.append(
-            Edge(
-                src=groups[child_idx].name,
-                dst=groups[parent_idx].name,
-                edge_type="member_of",
-            )
-        )
+    def add(src: np.ndarray, dst: np.ndarray, edge_type: str) -> None:
+        src_parts.append(src)
+        dst_parts.append(dst)
+        type_parts.append(np.full(len(src), EDGE_TYPES.index(edge_type), dtype=np.int8))
 
-    # --- Users -> groups (member_of) ---
+    # --- Group nesting (group -> group, member_of) ---
+    # Point each group after the first to a random earlier group to create depth.
+    child = np.arange(1, num_groups)
+    parent = (rng.random(len(child)) * child).astype(np.int64)
+    add(groups[child], groups[parent], "member_of")
 
-    for user in users:
-        # Each user belongs to 1–3 groups
-        group_memberships = random.sample(groups, k=random.randint(1, 3))
-        for g in group_memberships:
-            edges.append(
-                Edge(
-                    src=user.name,
-                    dst=g.name,
-                    edge_type="member_of",
-                )
-            )
+    # --- Users -> groups (member_of) ---
+    # Each user belongs to 1–3 groups
+    k = rng.integers(1, min(3, num_groups), endpoint=True, size=num_users)
+    rows, picks = _sample_rows(rng, k, num_groups)
+    add(users[rows], groups[picks], "member_of")
 
     # --- Admin rights (principal -> computer, admin_to) ---
-
     # Some groups have local admin on many computers
-    admin_groups = random.sample(groups, k=min(3, len(groups)))
-    for g in admin_groups:
-        for comp in random.sample(computers, k=random.randint(3, len(computers))):
-            edges.append(
-                Edge(
-                    src=g.name,
-                    dst=comp.name,
-                    edge_type="admin_to",
-                )
-            )
+    admin_groups = rng.choice(groups, size=min(3, num_groups), replace=False)
+    k = rng.integers(3, num_computers, endpoint=True, size=len(admin_groups))
+    rows, picks = _sample_rows(rng, k, num_computers)
+    add(admin_groups[rows], computers[picks], "admin_to")
 
     # Make DA group very powerful: admin on Tier-0 and many others
-    for comp in tier0_computers + random.sample(computers, k=5):
-        edges.append(
-            Edge(
-                src=da_group.name,
-                dst=comp.name,
-                edge_type="admin_to",
-            )
-        )
+    da_targets = np.concatenate(
+        [tier0_computers, rng.choice(computers, size=5, replace=False)]
+    )
+    add(np.full(len(da_targets), da_group), da_targets, "admin_to")
 
     # --- User sessions (user -> computer, session_on) ---
-
-    # Pretend users are logged into random machines
-    for user in users:
-        for comp in random.sample(computers, k=random.randint(1, 4)):
-            edges.append(
-                Edge(
-                    src=user.name,
-                    dst=comp.name,
-                    edge_type="session_on",
-                )
-            )
-
+    # Pretend users are logged into 1–4 random machines
+    k = rng.integers(1, min(4, num_computers), endpoint=True, size=num_users)
+    rows, picks = _sample_rows(rng, k, num_computers)
+    add(users[rows], computers[picks], "session_on")
+
+    edges = Edges(
+        src=np.concatenate(src_parts),
+        dst=np.concatenate(dst_parts),
+        edge_type=np.concatenate(type_parts),
+    )
     return nodes, edges
 
 
@@ -160,28 +169,30 @@ def build_synthetic_ad(
 # Helper: convert to DataFrame
 # ---------------------------
 
-def to_edge_dataframe(nodes: List[Node], edges: List[Edge]) -> pd.DataFrame:
+def to_edge_dataframe(nodes: Nodes, edges: Edges) -> pd.DataFrame:
     """
-    Convert our Node/Edge lists into a CSV-friendly table.
+    Convert the node/edge arrays into a table.
 
     We include src_type/dst_type so we don't have to look this up later.
-    """
-    node_type_map = {n.name: n.node_type for n in nodes}
 
-    records = []
-    for e in edges:
-        records.append(
-            {
-                "src": e.src,
-                "dst": e.dst,
-                "edge_type": e.edge_type,
-                "src_type": node_type_map.get(e.src, "unknown"),
-                "dst_type": node_type_map.get(e.dst, "unknown"),
-            }
-        )
-
-    df = pd.DataFrame.from_records(records)
-    return df
+    Names and types are looked up for all edges at once by indexing the
+    node arrays with the edge index arrays. The repeated-string columns
+    (edge_type, src_type, dst_type) are stored as categories: small integer
+    codes plus one copy of each distinct string.
+    """
+    return pd.DataFrame(
+        {
+            "src": nodes.names[edges.src],
+            "dst": nodes.names[edges.dst],
+            "edge_type": pd.Categorical.from_codes(edges.edge_type, categories=EDGE_TYPES),
+            "src_type": pd.Categorical.from_codes(
+                nodes.node_type[edges.src], categories=NODE_TYPES
+            ),
+            "dst_type": pd.Categorical.from_codes(
+                nodes.node_type[edges.dst], categories=NODE_TYPES
+            ),
+        }
+    )
 
 
 # ---------------------------
@@ -196,15 +207,18 @@ def generate_and_save() -> None:
     - Build the fake environment.
     - Turn it into a table.
     - Make sure the raw directory exists.
-    - Save it as a CSV so the rest of the pipeline can use it.
+    - Save it as Parquet so the rest of the pipeline can use it. The
+      category columns are written as small codes plus a dictionary of
+      distinct strings, and load back with their types - no CSV text to
+      format here or tokenize again in features.py.
     """
     print("[ShadowHound] Building synthetic AD graph...")
     nodes, edges = build_synthetic_ad()
 
     df = to_edge_dataframe(nodes, edges)
 
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
-    df.to_csv(RAW_GRAPH_PATH, index=False)
+    ensure_dirs()
+    df.to_parquet(RAW_GRAPH_PATH, engine="pyarrow", compression="zstd", index=False)
 
     print(f"[ShadowHound] Wrote graph to {RAW_GRAPH_PATH}")
     print(f"[ShadowHound] Num edges: {len(df)}")
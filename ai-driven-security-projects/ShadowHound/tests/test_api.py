@@ -0,0 +1,46 @@
+"""
+Basic tests for the ShadowHound API.
+
+These tests are intentionally lightweight:
+- They send requests through FastAPI's TestClient against the trained
+  model shipped with the project.
+- They check that bad input is rejected with a 422, not a server error.
+"""
+
+from fastapi.testclient import TestClient
+
+from shadowhound.api import app
+
+
+client = TestClient(app)
+
+VALID_NODE = {
+    "degree": 5.0,
+    "num_admin_edges": 1.0,
+    "num_group_edges": 2.0,
+    "shortest_path_to_target": 2.0,
+    "can_reach_target_steps": 2.0,
+    "is_target_group_member": 0,
+    "is_user": 1,
+    "is_group": 0,
+    "is_computer": 0,
+}
+
+
+def test_out_of_range_flag_is_rejected():
+    """
+    A 0/1 flag outside 0..1 is a validation error on both endpoints.
+
+    In plain English:
+    - /predict_batch packs the flags into one-byte fields, so a value like
+      300 used to overflow and come back as a 500.
+    - Now both endpoints answer 422 for it, and valid nodes still score.
+    """
+    for bad_value in (300, -200, 2):
+        bad_node = {**VALID_NODE, "is_user": bad_value}
+
+        assert client.post("/predict", json=bad_node).status_code == 422
+        assert client.post("/predict_batch", json=[VALID_NODE, bad_node]).status_code == 422
+
+    assert client.post("/predict", json=VALID_NODE).status_code == 200
+    assert client.post("/predict_batch", json=[VALID_NODE, VALID_NODE]).status_code == 200
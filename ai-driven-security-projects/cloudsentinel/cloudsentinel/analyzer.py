@@ -12,8 +12,9 @@ The API layer will call analyze_policy() and return that result as JSON.
 
 from __future__ import annotations
 
-from dataclasses import asdict
-from typing import Any, Dict, List, Tuple
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from .rules import Finding, evaluate_policy
 
@@ -32,7 +33,14 @@ SEVERITY_WEIGHTS: Dict[str, int] = {
 }
 
 
-def _score_findings(findings: List[Finding]) -> Tuple[int, str]:
+def _severity_counts(findings: List[Finding]) -> Counter:
+    """Count findings per (lower-cased) severity in one pass."""
+    return Counter(f.severity.lower() for f in findings)
+
+
+def _score_findings(
+    findings: List[Finding], sev_counts: Optional[Counter] = None
+) -> Tuple[int, str]:
     """
     Convert a list of findings into:
     - an integer "risk score"
@@ -41,10 +49,12 @@ def _score_findings(findings: List[Finding]) -> Tuple[int, str]:
     In plain English:
     - Each finding adds points based on severity.
     - We sum those points and map them into a simple risk bucket.
+
+    Pass sev_counts (from _severity_counts) to reuse counts you already have.
     """
-    score = 0
-    for f in findings:
-        score += SEVERITY_WEIGHTS.get(f.severity.lower(), 1)
+    if sev_counts is None:
+        sev_counts = _severity_counts(findings)
+    score = sum(SEVERITY_WEIGHTS.get(sev, 1) * n for sev, n in sev_counts.items())
 
     # Map the numeric score into a risk level.
     if score == 0:
@@ -65,8 +75,35 @@ def _score_findings(findings: List[Finding]) -> Tuple[int, str]:
 # Feature extraction
 # -----------------------------
 
+# rule_id prefix -> category flag it sets in the features dict.
+_RULE_FLAG_MAP: Dict[str, str] = {
+    "R01_WILDCARD_ACTION": "has_wildcard_action",
+    "R02_WILDCARD_RESOURCE": "has_wildcard_resource",
+    "R03_HIGH_RISK_WILDCARD": "has_high_risk_wildcard",
+    "R04_PRIV_ESC_": "has_priv_esc_pattern",
+    "R04_ASSUME_ROLE": "has_priv_esc_pattern",
+    "R05_ADMIN_LIKE_ACTION": "has_admin_like_action",
+}
+
 
-def _build_features(findings: List[Finding], num_statements: int) -> Dict[str, Any]:
+@lru_cache(maxsize=None)
+def _rule_flag(rule_id: str) -> Optional[str]:
+    """
+    Feature flag for a rule_id, or None if it doesn't map to one.
+
+    The prefix scan runs once per distinct rule_id; the rule engine only
+    emits a handful of them, so after warm-up every finding is a single
+    cached dict lookup.
+    """
+    for prefix, flag in _RULE_FLAG_MAP.items():
+        if rule_id.startswith(prefix):
+            return flag
+    return None
+
+
+def _build_features(
+    findings: List[Finding], num_statements: int, sev_counts: Optional[Counter] = None
+) -> Dict[str, Any]:
     """
     Build a small numeric feature vector from the findings.
 
@@ -75,13 +112,16 @@ def _build_features(findings: List[Finding], num_statements: int) -> Dict[str, A
     - We set flags for specific rule types (wildcards, priv-esc, etc.).
     - This can be used later by a machine learning model or for reporting.
     """
+    if sev_counts is None:
+        sev_counts = _severity_counts(findings)
+
     features: Dict[str, Any] = {
         "num_statements": num_statements,
         "num_findings": len(findings),
-        "num_low": 0,
-        "num_medium": 0,
-        "num_high": 0,
-        "num_critical": 0,
+        "num_low": sev_counts.get("low", 0),
+        "num_medium": sev_counts.get("medium", 0),
+        "num_high": sev_counts.get("high", 0),
+        "num_critical": sev_counts.get("critical", 0),
         # Flags for specific categories of rules.
         "has_wildcard_action": 0,
         "has_wildcard_resource": 0,
@@ -90,23 +130,11 @@ def _build_features(findings: List[Finding], num_statements: int) -> Dict[str, A
         "has_admin_like_action": 0,
     }
 
+    # Use rule_id prefixes to set category flags.
     for f in findings:
-        sev = f.severity.lower()
-        if sev in ("low", "medium", "high", "critical"):
-            key = f"num_{sev}"
-            features[key] += 1
-
-        # Use rule_id prefixes to set category flags.
-        if f.rule_id.startswith("R01_WILDCARD_ACTION"):
-            features["has_wildcard_action"] = 1
-        elif f.rule_id.startswith("R02_WILDCARD_RESOURCE"):
-            features["has_wildcard_resource"] = 1
-        elif f.rule_id.startswith("R03_HIGH_RISK_WILDCARD"):
-            features["has_high_risk_wildcard"] = 1
-        elif f.rule_id.startswith("R04_PRIV_ESC_") or f.rule_id.startswith("R04_ASSUME_ROLE"):
-            features["has_priv_esc_pattern"] = 1
-        elif f.rule_id.startswith("R05_ADMIN_LIKE_ACTION"):
-            features["has_admin_like_action"] = 1
+        flag = _rule_flag(f.rule_id)
+        if flag is not None:
+            features[flag] = 1
 
     return features
 
@@ -163,11 +191,13 @@ def analyze_policy(policy: Dict[str, Any], include_features: bool = True) -> Dic
     else:
         num_statements = len(raw_statements)
 
-    # Score findings and get overall risk level.
-    risk_score, risk_level = _score_findings(findings)
+    # Score findings and get overall risk level. The severity counts are
+    # shared with _build_features so findings are only tallied once.
+    sev_counts = _severity_counts(findings)
+    risk_score, risk_level = _score_findings(findings, sev_counts)
 
     # Convert Finding dataclasses to plain dicts so they can be serialized to JSON.
-    findings_payload = [asdict(f) for f in findings]
+    findings_payload = [f.to_dict() for f in findings]
 
     result: Dict[str, Any] = {
         "risk_level": risk_level,
@@ -178,6 +208,6 @@ def analyze_policy(policy: Dict[str, Any], include_features: bool = True) -> Dic
     }
 
     if include_features:
-        result["features"] = _build_features(findings, num_statements)
+        result["features"] = _build_features(findings, num_statements, sev_counts)
 
     return result
@@ -11,25 +11,32 @@ In plain English:
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Dict, List, Optional, Tuple
 
 import json
 
 import joblib
-import pandas as pd
-from fastapi import FastAPI, HTTPException
+import numpy as np
+import orjson
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-from .config import MODEL_PATH, FEATURES_PATH
-from .analyzer import analyze_policy
-from .ml import predict_risk
-
-
-app = FastAPI(
-    title="CloudSentinel API",
-    description="Analyze AWS IAM policies for misconfigurations and risk.",
-    version="0.1.0",
+from .config import (
+    MODEL_PATH,
+    ONNX_MODEL_PATH,
+    FEATURES_PATH,
+    ANALYZE_MAX_BATCH_SIZE,
+    ANALYZE_MAX_WAIT_MS,
+    ANALYZE_CACHE_SIZE,
 )
+from .analyzer import analyze_policy
+from .ml import flatten_forest, onnx_class_names, predict_risk_flat, predict_risk_onnx
 
 
 class PolicyInput(BaseModel):
@@ -48,16 +55,54 @@ def _load_model(path: str | None = None):
     Load the trained ML model from disk.
 
     We call this once at startup so the model stays in memory.
+    mmap_mode="r" maps the model's arrays from the file instead of copying
+    them, so several API workers share one copy through the OS page cache.
     """
     model_path = MODEL_PATH if path is None else path
     try:
-        return joblib.load(model_path)
+        model = joblib.load(model_path, mmap_mode="r")
     except FileNotFoundError as exc:
         raise RuntimeError(
             f"Model file not found at {model_path}. "
             "Run 'python -m cloudsentinel.pipeline' first to train the model."
         ) from exc
 
+    # Requests are scored as plain numpy rows already in training-column
+    # order, so drop the stored column names; otherwise scikit-learn warns
+    # about missing feature names on every prediction.
+    if hasattr(model, "feature_names_in_"):
+        del model.feature_names_in_
+
+    # Trained with n_jobs=-1; for one policy per request, a joblib thread
+    # pool per call costs more than the trees. Scale with API workers.
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    return model
+
+
+def _load_onnx_session():
+    """
+    Open the ONNX export of the model, if there is one.
+
+    Returns None when onnxruntime isn't installed or training didn't write
+    ONNX_MODEL_PATH; the API then scores with the joblib model instead.
+    One intra-op thread: requests are a handful of rows, where spinning up
+    a thread pool per call costs more than it saves. Scale with API workers.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    if not ONNX_MODEL_PATH.exists():
+        return None
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = 1
+    return ort.InferenceSession(
+        str(ONNX_MODEL_PATH), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+
 
 def _load_feature_columns(path: str | None = None) -> List[str]:
     """
@@ -80,10 +125,172 @@ def _load_feature_columns(path: str | None = None) -> List[str]:
     return cols
 
 
-# Load model + feature schema once when the API starts.
-MODEL = _load_model()
+# Load model + feature schema once when the API starts. With an ONNX
+# export available the joblib model isn't needed at all.
+ONNX_SESSION = _load_onnx_session()
+ONNX_CLASS_NAMES = onnx_class_names(ONNX_SESSION) if ONNX_SESSION is not None else None
+MODEL = _load_model() if ONNX_SESSION is None else None
+# Without onnxruntime, score from the forest packed into flat arrays
+# (see ml.flatten_forest) instead of sklearn's tree-by-tree predict_proba.
+FLAT_FOREST = flatten_forest(MODEL) if MODEL is not None else None
 FEATURE_COLUMNS = _load_feature_columns()
 
+# Column name -> position in the model's input row.
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+N_FEATURES = len(FEATURE_COLUMNS)
+
+
+def _feature_row(features: Dict[str, Any]) -> np.ndarray:
+    """
+    One (1, N_FEATURES) float32 row in training-column order.
+
+    In plain English:
+    - Start from all zeros, so features the analyzer didn't return count
+      as 0.
+    - Write each known feature into its column; features the model has
+      never seen are skipped.
+    - No pandas: for a single row, building and reindexing a DataFrame
+      costs far more than the model call itself.
+    """
+    x = np.zeros((1, N_FEATURES), dtype=np.float32)
+    for name, value in features.items():
+        i = FEATURE_INDEX.get(name)
+        if i is not None:
+            x[0, i] = value
+    return x
+
+
+def _score_rows(X: np.ndarray) -> List[Tuple[str, Dict[str, float]]]:
+    """(predicted risk level, class probabilities) for each row of X."""
+    if ONNX_SESSION is not None:
+        result = predict_risk_onnx(ONNX_SESSION, X, ONNX_CLASS_NAMES)
+    else:
+        result = predict_risk_flat(FLAT_FOREST, X)
+    return list(zip(result["predicted_levels"], result["probabilities"]))
+
+
+class _MicroBatcher:
+    """
+    Collects concurrent /analyze rows and scores them in one model call.
+
+    In plain English:
+    - Each request puts its (1, n_features) row on a queue and waits.
+    - A background task takes the first row, then keeps taking rows until
+      it has max_batch_size of them or max_wait_ms has passed.
+    - It stacks them into one matrix, runs the model once (in a worker
+      thread), and hands each request back its own result.
+
+    A RandomForest call has a large fixed cost per call compared to the
+    cost per extra row, so under load this turns N model calls into one
+    per batch; a lone request waits at most max_wait_ms extra.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def score(self, row: np.ndarray) -> Tuple[str, Dict[str, float]]:
+        """(risk level, probabilities) for one (1, n_features) row."""
+        if self._task is None:
+            # Not started (app used without its lifespan): score directly.
+            return (await run_in_threadpool(_score_rows, row))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            X = np.vstack([row for row, _ in batch])
+            try:
+                results = await run_in_threadpool(_score_rows, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                # A client may have disconnected and cancelled its future.
+                if not future.done():
+                    future.set_result(result)
+
+
+_BATCHER = _MicroBatcher(ANALYZE_MAX_BATCH_SIZE, ANALYZE_MAX_WAIT_MS)
+
+
+# Canonical policy JSON -> serialized /analyze response, in LRU order.
+# Only touched from the event loop, so no lock is needed.
+_RESPONSE_CACHE: "OrderedDict[bytes, bytes]" = OrderedDict()
+
+
+def _policy_cache_key(policy: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Canonical bytes for a policy: the same policy always gives the same key,
+    whatever order its JSON keys arrived in. None if it can't be encoded
+    (e.g. integers beyond 64 bits); such requests simply aren't cached.
+    """
+    try:
+        return orjson.dumps(policy, option=orjson.OPT_SORT_KEYS)
+    except orjson.JSONEncodeError:
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _BATCHER.start()
+    yield
+    await _BATCHER.stop()
+
+
+# ORJSONResponse: responses are serialized by orjson (C) instead of the
+# stdlib json encoder. /analyze already returns orjson-encoded bytes (see
+# _RESPONSE_CACHE); this covers every other route.
+app = FastAPI(
+    title="CloudSentinel API",
+    description="Analyze AWS IAM policies for misconfigurations and risk.",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# Policies with many statements produce long findings lists; compress
+# those for clients that accept gzip. Small responses aren't worth it.
+app.add_middleware(GZipMiddleware, minimum_size=4096)
+
 
 @app.get("/health")
 def healthcheck():
@@ -96,7 +303,7 @@ def healthcheck():
 
 
 @app.post("/analyze")
-def analyze(input_data: PolicyInput):
+async def analyze(input_data: PolicyInput):
     """
     Analyze an IAM policy with both rule-based logic and ML risk scoring.
 
@@ -106,18 +313,31 @@ def analyze(input_data: PolicyInput):
         - findings
         - rule-based risk_level and risk_score
         - numeric 'features' describing the policy's risk shape
-    3. Turn features into a one-row pandas DataFrame.
-    4. Align DataFrame columns with the training-time feature order.
+    3–4. Turn features into one numeric row in the training-time
+       feature order.
     5. Pass the aligned features to the ML model to get:
         - predicted risk level
         - class probabilities
+       (scored together with other in-flight requests, see _MicroBatcher)
     6. Return a combined JSON response.
+
+    The analysis and the model are deterministic, so the serialized
+    response is cached by the policy's canonical JSON (_RESPONSE_CACHE);
+    repeat scans of an unchanged policy skip steps 2-6.
     """
     policy = input_data.policy
 
+    cache_key = _policy_cache_key(policy)
+    if cache_key is not None:
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            _RESPONSE_CACHE.move_to_end(cache_key)
+            return Response(content=cached, media_type="application/json")
+
     try:
         # 1–2. Run rule-based analysis and feature extraction.
-        analysis = analyze_policy(policy, include_features=True)
+        # CPU-bound; run it off the event loop so other requests keep moving.
+        analysis = await run_in_threadpool(analyze_policy, policy, include_features=True)
     except Exception as exc:  # pragma: no cover - defensive
         raise HTTPException(status_code=400, detail=f"Error analyzing policy: {exc}")
 
@@ -128,35 +348,16 @@ def analyze(input_data: PolicyInput):
             detail="Analyzer did not return features. Check pipeline configuration.",
         )
 
-    features_dict = analysis["features"]
-
-    # 3. Build a single-row DataFrame.
-    X = pd.DataFrame([features_dict])
-
-    # 4. Align features to the training-time schema.
-    #    - Add missing columns with value 0.
-    #    - Drop extra columns the model has never seen.
-    missing_cols = [c for c in FEATURE_COLUMNS if c not in X.columns]
-    for col in missing_cols:
-        X[col] = 0
-
-    extra_cols = [c for c in X.columns if c not in FEATURE_COLUMNS]
-    if extra_cols:
-        X = X.drop(columns=extra_cols)
-
-    # Reorder to match training.
-    X = X[FEATURE_COLUMNS]
+    # 3–4. Build the model's input row, aligned to the training-time schema
+    #      (missing features = 0, unknown ones dropped).
+    X = _feature_row(analysis["features"])
 
     # 5. Run ML prediction.
     try:
-        ml_result = predict_risk(MODEL, X)
+        ml_level, ml_probs = await _BATCHER.score(X)
     except Exception as exc:  # pragma: no cover - defensive
         raise HTTPException(status_code=500, detail=f"Error during ML prediction: {exc}")
 
-    # We only sent one policy, so grab the first prediction.
-    ml_level = ml_result["predicted_levels"][0]
-    ml_probs = ml_result["probabilities"][0]
-
     # 6. Build combined response.
     response = {
         "rule_based": {
@@ -172,4 +373,10 @@ def analyze(input_data: PolicyInput):
         },
     }
 
-    return response
+    body = orjson.dumps(response, option=orjson.OPT_SERIALIZE_NUMPY)
+    if cache_key is not None:
+        _RESPONSE_CACHE[cache_key] = body
+        if len(_RESPONSE_CACHE) > ANALYZE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+    return Response(content=body, media_type="application/json")
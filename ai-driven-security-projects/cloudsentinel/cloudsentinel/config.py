@@ -24,6 +24,27 @@ RAW_DATA_PATH = DATA_DIR / "raw" / "synthetic_policies.jsonl"
 # Processed artifacts (model, reports, features) live here.
 PROCESSED_DIR = DATA_DIR / "processed"
 MODEL_PATH = PROCESSED_DIR / "model.joblib"
+# ONNX export of the same model (written when skl2onnx is installed); the API
+# serves from it with onnxruntime when present, otherwise from MODEL_PATH.
+ONNX_MODEL_PATH = PROCESSED_DIR / "model.onnx"
 REPORT_PATH = PROCESSED_DIR / "report.json"
 FEATURES_PATH = PROCESSED_DIR / "feature_columns.json"
 
+# Training-time analysis of the policies moves to a process pool once there
+# are at least this many (and more than one CPU). The rule engine takes
+# ~10-20 us per policy, so below this the pool's startup and pickling cost
+# more than they save. Each worker task handles ANALYSIS_CHUNKSIZE policies.
+PARALLEL_ANALYSIS_MIN_POLICIES = 50_000
+ANALYSIS_CHUNKSIZE = 512
+
+# /analyze micro-batching: the ML step of concurrent requests is scored in
+# one model call of up to ANALYZE_MAX_BATCH_SIZE rows, waiting at most
+# ANALYZE_MAX_WAIT_MS for a batch to fill.
+ANALYZE_MAX_BATCH_SIZE = 64
+ANALYZE_MAX_WAIT_MS = 2
+
+# /analyze keeps the serialized responses of this many distinct policies
+# (least recently used are evicted), so re-scanning an unchanged policy is
+# a dict lookup. Restart the API after retraining to clear it.
+ANALYZE_CACHE_SIZE = 4096
+
@@ -10,7 +10,10 @@ In plain English:
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -72,9 +75,13 @@ def train_baseline(X: pd.DataFrame, y: pd.Series) -> Tuple[RandomForestClassifie
 
     # RandomForest is a good default: robust, handles nonlinearities, and
     # works well with small to medium-sized tabular datasets.
+    # The features are small counts and 0/1 flags, so shallow trees already
+    # separate the classes; capping depth and leaf size (and using 100
+    # trees) keeps the model small and every prediction short.
     model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=None,
+        n_estimators=100,
+        max_depth=12,
+        min_samples_leaf=4,
         n_jobs=-1,
         random_state=42,
     )
@@ -110,7 +117,9 @@ def train_baseline(X: pd.DataFrame, y: pd.Series) -> Tuple[RandomForestClassifie
     return model, report
 
 
-def predict_risk(model: RandomForestClassifier, features: pd.DataFrame) -> Dict[str, Any]:
+def predict_risk(
+    model: RandomForestClassifier, features: pd.DataFrame | np.ndarray
+) -> Dict[str, Any]:
     """
     Use a trained model to predict risk level for one or more feature rows.
 
@@ -118,7 +127,7 @@ def predict_risk(model: RandomForestClassifier, features: pd.DataFrame) -> Dict[
     ----------
     model : RandomForestClassifier
         Trained model from train_baseline(). Must have a label_encoder_ attribute.
-    features : pd.DataFrame
+    features : pd.DataFrame or np.ndarray
         Feature rows in the same format and order as used during training.
 
     Returns
@@ -141,23 +150,144 @@ def predict_risk(model: RandomForestClassifier, features: pd.DataFrame) -> Dict[
             "Make sure you trained it with train_baseline()."
         )
 
-    # Predict numeric classes and probabilities.
+    # Predict class probabilities; columns follow label_encoder_.classes_.
     probs = model.predict_proba(features)
-    preds_numeric = np.argmax(probs, axis=1)
+    return _risk_result(probs, list(model.label_encoder_.classes_))
 
-    # Convert numeric classes back to text labels (e.g., 0 -> "low").
-    label_encoder = model.label_encoder_  # type: ignore[assignment]
-    predicted_levels = label_encoder.inverse_transform(preds_numeric)
+
+def onnx_class_names(session: Any) -> Tuple[str, ...]:
+    """
+    Class names stored by export_onnx() in the ONNX file's "classes"
+    metadata, so the joblib model (and its label encoder) doesn't need to
+    be loaded at all.
+    """
+    return tuple(json.loads(session.get_modelmeta().custom_metadata_map["classes"]))
+
+
+def predict_risk_onnx(
+    session: Any, features: np.ndarray, class_names: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Same as predict_risk(), scored by an onnxruntime session from export_onnx().
+
+    Pass class_names (from onnx_class_names()) when calling repeatedly, so
+    the metadata isn't decoded again on every call.
+    """
+    if class_names is None:
+        class_names = onnx_class_names(session)
+    _, probs = session.run(None, {"X": np.asarray(features, dtype=np.float32)})
+    return _risk_result(probs, class_names)
+
+
+def flatten_forest(model: RandomForestClassifier) -> SimpleNamespace:
+    """
+    Pack a model from train_baseline() into flat node arrays for
+    predict_risk_flat().
+
+    In plain English:
+    - scikit-learn's predict_proba visits the trees one at a time (one
+      Cython call plus a joblib dispatch each), a fixed cost per call that
+      dwarfs the work for the few rows a request brings.
+    - Here every tree's nodes are laid end to end in shared arrays, so a
+      batch walks *all* trees one level per step with a handful of
+      whole-array NumPy operations.
+    - Leaves point back at themselves, so rows that reach a leaf early
+      simply stay there for the remaining steps.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    offsets = np.cumsum([0] + [t.node_count for t in trees])
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for t, off in zip(trees, offsets):
+        node_ids = np.arange(t.node_count) + off
+        is_leaf = t.children_left < 0
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        left.append(np.where(is_leaf, node_ids, t.children_left + off))
+        right.append(np.where(is_leaf, node_ids, t.children_right + off))
+        # Per-leaf class fractions, normalized the way tree.predict_proba does.
+        v = t.value[:, 0, :]
+        value.append(v / v.sum(axis=1, keepdims=True))
+
+    return SimpleNamespace(
+        roots=offsets[:-1],
+        depth=max(t.max_depth for t in trees),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        value=np.concatenate(value),
+        classes=tuple(model.label_encoder_.classes_),
+    )
+
+
+def predict_risk_flat(forest: SimpleNamespace, features: np.ndarray) -> Dict[str, Any]:
+    """Same as predict_risk(), scored from flatten_forest()'s arrays."""
+    X = np.asarray(features, dtype=np.float32)
+    rows = np.arange(len(X))[:, None]
+    nodes = np.repeat(forest.roots[None, :], len(X), axis=0)
+    for _ in range(forest.depth):
+        go_left = X[rows, forest.feature[nodes]] <= forest.threshold[nodes]
+        nodes = np.where(go_left, forest.left[nodes], forest.right[nodes])
+    probs = forest.value[nodes].mean(axis=1)
+    return _risk_result(probs, forest.classes)
+
+
+def _risk_result(probs: np.ndarray, class_names: Sequence[str]) -> Dict[str, Any]:
+    """Turn a (n_rows, n_classes) probability array into predict_risk()'s dict."""
+    # Highest-probability class per row, as its text label (e.g., 0 -> "low").
+    # Plain list indexing instead of LabelEncoder.inverse_transform.
+    predicted_levels = [class_names[i] for i in np.argmax(probs, axis=1).tolist()]
 
     # Turn probabilities into a list of dicts for easier JSON usage.
-    class_names = list(label_encoder.classes_)
-    prob_dicts = []
-    for row in probs:
-        prob_dict = {cls: float(p) for cls, p in zip(class_names, row)}
-        prob_dicts.append(prob_dict)
+    # One tolist() converts every probability to a Python float at once.
+    prob_dicts = [dict(zip(class_names, row)) for row in probs.tolist()]
 
     return {
-        "predicted_levels": list(predicted_levels),
+        "predicted_levels": predicted_levels,
         "probabilities": prob_dicts,
     }
 
+
+def export_onnx(model: RandomForestClassifier, n_features: int, path: Path) -> bool:
+    """
+    Save an ONNX copy of a model trained by train_baseline().
+
+    In plain English:
+    - onnxruntime scores every tree in one compiled op instead of
+      scikit-learn visiting the trees one by one, which is much faster for
+      the one-policy-at-a-time requests the API handles.
+    - The text class names (label_encoder_.classes_) are stored in the ONNX
+      metadata under "classes" so predict_risk_onnx() can decode results.
+    - Best-effort: returns False if skl2onnx is missing or can't convert the
+      model, and removes any older export so the API can't serve a stale one.
+    """
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        print("[CloudSentinel] skl2onnx not installed; skipping ONNX export.")
+        path.unlink(missing_ok=True)
+        return False
+
+    try:
+        onx = convert_sklearn(
+            model,
+            initial_types=[("X", FloatTensorType([None, n_features]))],
+            # zipmap=False gives a plain (n_samples, n_classes) probability array
+            options={id(model): {"zipmap": False}},
+        )
+    except Exception as exc:  # converter support lags scikit-learn releases
+        print(f"[CloudSentinel] ONNX export skipped: {type(exc).__name__}")
+        path.unlink(missing_ok=True)
+        return False
+
+    prop = onx.metadata_props.add()
+    prop.key = "classes"
+    prop.value = json.dumps([str(c) for c in model.label_encoder_.classes_])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(onx.SerializeToString())
+    return True
+
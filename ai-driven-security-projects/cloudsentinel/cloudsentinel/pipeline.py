@@ -15,11 +15,17 @@ Run from the CloudSentinel lab root with:
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 import json
+import os
 
 import joblib
+import orjson
 import numpy as np
 import pandas as pd
 
@@ -29,11 +35,14 @@ from .config import (
     RAW_DATA_PATH,
     PROCESSED_DIR,
     MODEL_PATH,
+    ONNX_MODEL_PATH,
     REPORT_PATH,
     FEATURES_PATH,
+    PARALLEL_ANALYSIS_MIN_POLICIES,
+    ANALYSIS_CHUNKSIZE,
 )
 from .analyzer import analyze_policy
-from .ml import train_baseline
+from .ml import export_onnx, train_baseline
 
 
 # -----------------------------
@@ -141,6 +150,12 @@ def _make_critical_policy() -> Dict[str, Any]:
     }
 
 
+# Policy templates and the cumulative probability up to which each is picked:
+# 35% safe, 20% medium, 25% high, 20% critical.
+_TEMPLATES = (_make_safe_policy, _make_medium_policy, _make_high_policy, _make_critical_policy)
+_TEMPLATE_THRESHOLDS = np.array([0.35, 0.55, 0.8, 1.0])
+
+
 def generate_synthetic_policies(path: Path, n_samples: int = 200) -> List[Dict[str, Any]]:
     """
     Generate a mixture of synthetic IAM policies and write them to disk.
@@ -153,31 +168,20 @@ def generate_synthetic_policies(path: Path, n_samples: int = 200) -> List[Dict[s
     """
     rng = np.random.default_rng(seed=42)
 
-    policies: List[Dict[str, Any]] = []
-
     # We choose different policy "templates" with some probabilities,
-    # so we get a mix of risk levels in the dataset.
-    for _ in range(n_samples):
-        r = rng.random()
-        if r < 0.35:
-            policy = _make_safe_policy()
-        elif r < 0.55:
-            policy = _make_medium_policy()
-        elif r < 0.8:
-            policy = _make_high_policy()
-        else:
-            policy = _make_critical_policy()
-
-        policies.append(policy)
+    # so we get a mix of risk levels in the dataset. All the random draws
+    # happen in one call (the same numbers as drawing one per policy), and
+    # searchsorted maps each draw to its template index.
+    draws = rng.random(n_samples)
+    template_idx = np.searchsorted(_TEMPLATE_THRESHOLDS, draws, side="right")
+    policies: List[Dict[str, Any]] = [_TEMPLATES[i]() for i in template_idx]
 
     # Make sure the raw directory exists.
     path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write as JSONL so it's easy to inspect or reuse later.
-    with path.open("w", encoding="utf-8") as f:
-        for p in policies:
-            f.write(json.dumps(p))
-            f.write("\n")
+    # Write as JSONL so it's easy to inspect or reuse later, in one write.
+    with path.open("wb") as f:
+        f.write(b"".join(orjson.dumps(p) + b"\n" for p in policies))
 
     return policies
 
@@ -185,15 +189,63 @@ def generate_synthetic_policies(path: Path, n_samples: int = 200) -> List[Dict[s
 def _load_policies_from_jsonl(path: Path) -> List[Dict[str, Any]]:
     """
     Load policies from a JSONL file created by generate_synthetic_policies().
+
+    The file is read in one go and each line parsed with orjson. The parsed
+    policies take several times the file's size in memory anyway, so
+    holding the raw bytes briefly doesn't change the peak much.
     """
-    policies: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            policies.append(json.loads(line))
-    return policies
+    data = path.read_bytes()
+    return [orjson.loads(line) for line in data.splitlines() if line.strip()]
+
+
+def _analyze_policies(
+    policies: List[Dict[str, Any]], parallel: Optional[bool] = None
+) -> List[Dict[str, Any]]:
+    """
+    analyze_policy(policy, include_features=True) for every policy, in order.
+
+    In plain English:
+    - Every policy is analyzed independently, so for large datasets the
+      work is spread over a process pool (one worker per CPU), in chunks of
+      ANALYSIS_CHUNKSIZE policies to keep the pickling overhead down.
+    - parallel=None decides automatically from
+      PARALLEL_ANALYSIS_MIN_POLICIES and the CPU count; for small datasets
+      (or a single core) starting the processes costs more than it saves.
+    - The results are the same either way.
+    """
+    analyze = partial(analyze_policy, include_features=True)
+
+    if parallel is None:
+        parallel = (
+            len(policies) >= PARALLEL_ANALYSIS_MIN_POLICIES
+            and (os.cpu_count() or 1) > 1
+        )
+
+    if not parallel:
+        return [analyze(policy) for policy in policies]
+
+    with ProcessPoolExecutor() as pool:
+        return list(pool.map(analyze, policies, chunksize=ANALYSIS_CHUNKSIZE))
+
+
+def _feature_matrix(feature_rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Stack the analyzer's feature dicts into one float32 table.
+
+    In plain English:
+    - Every features dict has the same keys (the analyzer builds them from
+      one fixed template), so the first row gives the column order.
+    - np.fromiter fills a preallocated float32 array straight from the
+      values, instead of pandas inferring columns and dtypes from a list
+      of dicts. The model works in float32 internally anyway.
+    """
+    columns = list(feature_rows[0]) if feature_rows else []
+    values = np.fromiter(
+        chain.from_iterable(map(itemgetter(*columns), feature_rows)),
+        dtype=np.float32,
+        count=len(feature_rows) * len(columns),
+    ).reshape(len(feature_rows), len(columns))
+    return pd.DataFrame(values, columns=columns)
 
 
 # -----------------------------
@@ -224,20 +276,16 @@ def run_training(raw_path: Optional[Path] = None) -> None:
     else:
         policies = generate_synthetic_policies(raw_path, n_samples=200)
 
-    feature_rows: List[Dict[str, Any]] = []
-    labels: List[str] = []
+    # 2. Run analyzer on each policy (in parallel for large datasets).
+    # include_features=True gives us:
+    # - "risk_level" and "risk_score"
+    # - "features" (numeric representation)
+    results = _analyze_policies(policies)
+    feature_rows: List[Dict[str, Any]] = [r["features"] for r in results]
+    labels: List[str] = [r["risk_level"] for r in results]
 
-    # 2. Run analyzer on each policy.
-    for policy in policies:
-        # include_features=True gives us:
-        # - "risk_level" and "risk_score"
-        # - "features" (numeric representation)
-        result = analyze_policy(policy, include_features=True)
-        feature_rows.append(result["features"])
-        labels.append(result["risk_level"])
-
-    # 3. Build X (features) and y (labels) using pandas.
-    X = pd.DataFrame(feature_rows)
+    # 3. Build X (features) and y (labels).
+    X = _feature_matrix(feature_rows)
     y = pd.Series(labels, name="risk_level")
 
     # 4. Train model.
@@ -246,12 +294,16 @@ def run_training(raw_path: Optional[Path] = None) -> None:
     # 5. Save artifacts.
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Save model.
-    joblib.dump(model, MODEL_PATH)
+    # Save model (uncompressed, so the API can memory-map it).
+    joblib.dump(model, MODEL_PATH, compress=0)
+
+    # Optional ONNX copy for onnxruntime inference in the API.
+    export_onnx(model, X.shape[1], ONNX_MODEL_PATH)
 
-    # Save training report as JSON.
-    with REPORT_PATH.open("w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2)
+    # Save training report as JSON (orjson: fast C encoder that also
+    # accepts numpy scalars).
+    with REPORT_PATH.open("wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
 
     # Save feature column order so the API can align features at inference time.
     with FEATURES_PATH.open("w", encoding="utf-8") as f:
@@ -12,6 +12,7 @@ We treat each check as a "rule" that can produce one or more findings.
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, List, Iterable, Set
 
 
@@ -20,7 +21,7 @@ from typing import Any, Dict, List, Iterable, Set
 # -----------------------------
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Finding:
     """
     Simple container for a single rule result.
@@ -30,6 +31,10 @@ class Finding:
     - severity: how bad this is from a risk perspective (low / medium / high / critical)
     - message: explanation a human can read
     - location: where we saw the problem (e.g., "Statement[0]" or "Resource: *")
+
+    slots=True: no per-instance __dict__, so each of the many findings
+    built per analysis is smaller and cheaper to create. frozen=True:
+    findings are never modified after a rule creates them.
     """
 
     rule_id: str
@@ -37,6 +42,18 @@ class Finding:
     message: str
     location: str | None = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Plain dict for JSON output (same as dataclasses.asdict, which also
+        deep-copies every field - unnecessary for four strings).
+        """
+        return {
+            "rule_id": self.rule_id,
+            "severity": self.severity,
+            "message": self.message,
+            "location": self.location,
+        }
+
 
 # Some services are more sensitive than others. Wildcards here are especially scary.
 HIGH_RISK_SERVICES: Set[str] = {"iam", "kms", "sts", "organizations"}
@@ -48,6 +65,31 @@ EC2_RUN_INSTANCES = "ec2:RunInstances"
 LAMBDA_CREATE_FUNCTION = "lambda:CreateFunction"
 LAMBDA_UPDATE_FUNCTION = "lambda:UpdateFunctionCode"
 
+# One bit per tracked action (keys lowercased, IAM actions are case-insensitive).
+# A statement's actions OR together into one int, so each "does it allow X?"
+# check in rule_privilege_escalation_patterns is a single `&`.
+PASSROLE_BIT = 1
+ASSUME_ROLE_BIT = 2
+EC2_RUN_BIT = 4
+LAMBDA_CREATE_BIT = 8
+LAMBDA_UPDATE_BIT = 16
+ACTION_BITS: Dict[str, int] = {
+    PASSROLE_ACTION.lower(): PASSROLE_BIT,
+    ASSUME_ROLE_ACTION.lower(): ASSUME_ROLE_BIT,
+    EC2_RUN_INSTANCES.lower(): EC2_RUN_BIT,
+    LAMBDA_CREATE_FUNCTION.lower(): LAMBDA_CREATE_BIT,
+    LAMBDA_UPDATE_FUNCTION.lower(): LAMBDA_UPDATE_BIT,
+}
+
+# Fixed finding messages, shared by every finding that uses them.
+_MSG_WILDCARD_ACTION_ALL = 'Policy allows all actions: "Action": "*"'
+_MSG_WILDCARD_RESOURCE = 'Policy applies to all resources: "Resource": "*"'
+
+# Substrings that make an action look like an admin / full-access grant
+# (rule R05). Lowercased once here rather than on every check.
+ADMIN_KEYWORDS = ("AdministratorAccess", "FullAccess", "PowerUser")
+_ADMIN_KEYWORDS_LOWER = tuple(kw.lower() for kw in ADMIN_KEYWORDS)
+
 
 # -----------------------------
 # Helper functions
@@ -81,6 +123,18 @@ def _extract_resources(statement: Dict[str, Any]) -> List[str]:
     return [str(r) for r in _to_list(statement.get("Resource"))]
 
 
+@lru_cache(maxsize=128)
+def _service_wildcard_msg(service: str) -> str:
+    """R01 message for "<service>:*". Cached: there are only so many services."""
+    return f'Policy allows all actions for service "{service}:*"'
+
+
+@lru_cache(maxsize=128)
+def _high_risk_wildcard_msg(action: str) -> str:
+    """R03 message for a high-risk "<service>:*" action."""
+    return f'High-risk wildcard detected: "{action}"'
+
+
 def _service_prefix(action: str) -> str:
     """
     Return the service part of an action, e.g.:
@@ -90,9 +144,8 @@ def _service_prefix(action: str) -> str:
 
     If the action is just "*" we return "*" to indicate "all services".
     """
-    if ":" not in action:
-        return action
-    return action.split(":", 1)[0]
+    # partition: one call, no list; without a ":" the whole action comes back.
+    return action.partition(":")[0]
 
 
 # -----------------------------
@@ -108,35 +161,33 @@ def rule_wildcard_action(actions: Iterable[str], location: str) -> List[Finding]
     - If an IAM policy says "Action": "*" or "iam:*", it means "do anything".
     - That's usually NOT what you want and is almost always over-privileged.
     """
-    findings: List[Finding] = []
-
-    for action in actions:
-        # Exact wildcard: "*"
-        if action == "*":
-            findings.append(
-                Finding(
-                    rule_id="R01_WILDCARD_ACTION",
-                    severity="critical",
-                    message='Policy allows all actions: "Action": "*"',
-                    location=location,
-                )
-            )
-            continue
-
-        # Service-wide wildcard: "iam:*", "s3:*", etc.
-        if action.endswith(":*"):
-            service = _service_prefix(action)
-            severity = "high" if service in HIGH_RISK_SERVICES else "medium"
-            findings.append(
-                Finding(
-                    rule_id="R01_WILDCARD_ACTION",
-                    severity=severity,
-                    message=f'Policy allows all actions for service "{service}:*"',
-                    location=location,
-                )
-            )
+    return [
+        _wildcard_action_finding(action, location)
+        for action in actions
+        if action == "*" or action.endswith(":*")
+    ]
+
+
+def _wildcard_action_finding(action: str, location: str) -> Finding:
+    """R01 finding for an action that is "*" or ends with ":*"."""
+    # Exact wildcard: "*"
+    if action == "*":
+        return Finding(
+            rule_id="R01_WILDCARD_ACTION",
+            severity="critical",
+            message=_MSG_WILDCARD_ACTION_ALL,
+            location=location,
+        )
 
-    return findings
+    # Service-wide wildcard: "iam:*", "s3:*", etc.
+    service = _service_prefix(action)
+    severity = "high" if service in HIGH_RISK_SERVICES else "medium"
+    return Finding(
+        rule_id="R01_WILDCARD_ACTION",
+        severity=severity,
+        message=_service_wildcard_msg(service),
+        location=location,
+    )
 
 
 def rule_wildcard_resource(resources: Iterable[str], location: str) -> List[Finding]:
@@ -156,7 +207,7 @@ def rule_wildcard_resource(resources: Iterable[str], location: str) -> List[Find
                 Finding(
                     rule_id="R02_WILDCARD_RESOURCE",
                     severity="high",
-                    message='Policy applies to all resources: "Resource": "*"',
+                    message=_MSG_WILDCARD_RESOURCE,
                     location=location,
                 )
             )
@@ -173,23 +224,21 @@ def rule_high_risk_service_wildcard(actions: Iterable[str], location: str) -> Li
     - If we see "iam:*", "kms:*", "sts:*", etc., we call that out separately because
       those services control identity, keys, or cross-account access.
     """
-    findings: List[Finding] = []
+    return [
+        _high_risk_wildcard_finding(action, location)
+        for action in actions
+        if action.endswith(":*") and _service_prefix(action) in HIGH_RISK_SERVICES
+    ]
 
-    for action in actions:
-        if not action.endswith(":*"):
-            continue
-        service = _service_prefix(action)
-        if service in HIGH_RISK_SERVICES:
-            findings.append(
-                Finding(
-                    rule_id="R03_HIGH_RISK_WILDCARD",
-                    severity="critical",
-                    message=f'High-risk wildcard detected: "{action}"',
-                    location=location,
-                )
-            )
 
-    return findings
+def _high_risk_wildcard_finding(action: str, location: str) -> Finding:
+    """R03 finding for a "<service>:*" action on a HIGH_RISK_SERVICES service."""
+    return Finding(
+        rule_id="R03_HIGH_RISK_WILDCARD",
+        severity="critical",
+        message=_high_risk_wildcard_msg(action),
+        location=location,
+    )
 
 
 def rule_privilege_escalation_patterns(actions: Iterable[str], location: str) -> List[Finding]:
@@ -203,14 +252,21 @@ def rule_privilege_escalation_patterns(actions: Iterable[str], location: str) ->
 
     This is not a complete list, but it shows the idea.
     """
-    actions_set = {a.lower() for a in actions}
+    mask = 0
+    for a in actions:
+        mask |= ACTION_BITS.get(a.lower(), 0)
+    return _privilege_escalation_findings(mask, location)
+
+
+def _privilege_escalation_findings(mask: int, location: str) -> List[Finding]:
+    """R04 findings for a statement whose tracked actions OR to `mask` (ACTION_BITS)."""
     findings: List[Finding] = []
 
-    has_passrole = PASSROLE_ACTION.lower() in actions_set
-    has_assumerole = ASSUME_ROLE_ACTION.lower() in actions_set
-    has_ec2_run = EC2_RUN_INSTANCES.lower() in actions_set
-    has_lambda_create = LAMBDA_CREATE_FUNCTION.lower() in actions_set
-    has_lambda_update = LAMBDA_UPDATE_FUNCTION.lower() in actions_set
+    has_passrole = mask & PASSROLE_BIT
+    has_assumerole = mask & ASSUME_ROLE_BIT
+    has_ec2_run = mask & EC2_RUN_BIT
+    has_lambda_create = mask & LAMBDA_CREATE_BIT
+    has_lambda_update = mask & LAMBDA_UPDATE_BIT
 
     # PassRole + EC2:RunInstances
     if has_passrole and has_ec2_run:
@@ -268,21 +324,26 @@ def rule_admin_like_actions(actions: Iterable[str], location: str) -> List[Findi
       such as 'AdministratorAccess', 'PowerUser', or 'FullAccess' in action names.
     - This is a heuristic, not a perfect check.
     """
-    findings: List[Finding] = []
-    keywords = ("AdministratorAccess", "FullAccess", "PowerUser")
+    return [
+        _admin_like_finding(action, location)
+        for action in actions
+        if _is_admin_like(action.lower())
+    ]
 
-    for action in actions:
-        if any(kw.lower() in action.lower() for kw in keywords):
-            findings.append(
-                Finding(
-                    rule_id="R05_ADMIN_LIKE_ACTION",
-                    severity="high",
-                    message=f'Action "{action}" looks like an admin or full-access permission.',
-                    location=location,
-                )
-            )
 
-    return findings
+def _is_admin_like(low: str) -> bool:
+    """R05 test on an already-lowercased action."""
+    return any(kw in low for kw in _ADMIN_KEYWORDS_LOWER)
+
+
+def _admin_like_finding(action: str, location: str) -> Finding:
+    """R05 finding for an action that passed _is_admin_like()."""
+    return Finding(
+        rule_id="R05_ADMIN_LIKE_ACTION",
+        severity="high",
+        message=f'Action "{action}" looks like an admin or full-access permission.',
+        location=location,
+    )
 
 
 # -----------------------------
@@ -299,17 +360,44 @@ def evaluate_statement(statement: Dict[str, Any], index: int) -> List[Finding]:
     - Extract actions and resources.
     - Run each rule.
     - Return a list of findings for that statement.
+
+    Same findings, in the same order, as calling rule_wildcard_action,
+    rule_wildcard_resource, rule_high_risk_service_wildcard,
+    rule_privilege_escalation_patterns and rule_admin_like_actions in turn,
+    but the per-action rules (R01, R03, R04, R05) share a single pass over
+    the actions and a single .lower() per action.
     """
     location = f"Statement[{index}]"
     actions = _extract_actions(statement)
     resources = _extract_resources(statement)
 
-    findings: List[Finding] = []
-    findings.extend(rule_wildcard_action(actions, location))
+    # No actions and no resources: no rule can fire.
+    if not actions and not resources:
+        return []
+
+    wildcard: List[Finding] = []
+    high_risk: List[Finding] = []
+    admin_like: List[Finding] = []
+    mask = 0
+
+    for action in actions:
+        # Same test as `action == "*" or action.endswith(":*")`, but most
+        # actions don't end in "*" and fail on the first, cheapest check.
+        if action[-1:] == "*" and (action == "*" or action[-2] == ":"):
+            wildcard.append(_wildcard_action_finding(action, location))
+            if action != "*" and _service_prefix(action) in HIGH_RISK_SERVICES:
+                high_risk.append(_high_risk_wildcard_finding(action, location))
+
+        low = action.lower()
+        mask |= ACTION_BITS.get(low, 0)
+        if _is_admin_like(low):
+            admin_like.append(_admin_like_finding(action, location))
+
+    findings = wildcard
     findings.extend(rule_wildcard_resource(resources, location))
-    findings.extend(rule_high_risk_service_wildcard(actions, location))
-    findings.extend(rule_privilege_escalation_patterns(actions, location))
-    findings.extend(rule_admin_like_actions(actions, location))
+    findings.extend(high_risk)
+    findings.extend(_privilege_escalation_findings(mask, location))
+    findings.extend(admin_like)
 
     return findings
 
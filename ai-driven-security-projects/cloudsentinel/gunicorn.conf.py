@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for serving the CloudSentinel API with several workers.
+
+Usage (from the cloudsentinel directory):
+
+    gunicorn cloudsentinel.api:app -c gunicorn.conf.py
+
+In plain English:
+- Each uvicorn worker is its own process with its own GIL, so requests are
+  scored on several cores at once instead of queueing behind one.
+- preload_app imports cloudsentinel.api (and so loads the model) once, in
+  the gunicorn master. The forked workers share those memory pages
+  copy-on-write, and the joblib model is memory-mapped, so extra workers
+  add almost nothing on top of it.
+- The model already runs single-threaded per call (onnxruntime with one
+  intra-op thread, or n_jobs=1); the thread-count variables below keep
+  OpenMP / BLAS from also starting a thread per core in every worker.
+- Default: one worker per CPU. Scoring is CPU-bound, so more workers than
+  cores only adds context switching.
+"""
+
+import os
+
+# Set before the app (and NumPy / onnxruntime) is imported by preload_app.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+bind = os.environ.get("CLOUDSENTINEL_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("CLOUDSENTINEL_WORKERS", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own onnxruntime session.
+
+    onnxruntime's thread pool does not survive fork(), so a session created
+    in the master cannot be used safely by the children. The micro-batcher
+    and response cache are per worker already (started by the app's
+    lifespan, which runs in each worker).
+    """
+    from cloudsentinel import api
+
+    if api.ONNX_SESSION is not None:
+        api.ONNX_SESSION = api._load_onnx_session()
@@ -9,29 +9,72 @@ In plain English:
 
 Under the hood, /analyze-pcap:
     1. Saves the uploaded PCAP into data/raw/
-    2. Calls analyzer.analyze_pcap() on it
+    2. Calls analyzer.analyze_pcap() on it, in a worker process
     3. Returns the combined rule + ML detection result
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Optional
 
+import asyncio
+import io
+import os
 import shutil
 import uuid
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from .config import RAW_PCAP_DIR
-from .analyzer import analyze_pcap
+from .config import (
+    RAW_PCAP_DIR,
+    MODEL_PATH,
+    FEATURE_COLUMNS_PATH,
+    ANALYSIS_WORKERS,
+    MAX_UPLOAD_BYTES,
+)
+from .analyzer import analyze_pcap, _ml_available
+from .ml import load_model, load_feature_columns
+
+
+# Worker processes for analyze_pcap(); created by the app's lifespan.
+_ANALYSIS_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _preload_model() -> None:
+    """
+    Pool initializer: load the model once per worker process.
+
+    In plain English:
+    - load_model() / load_feature_columns() cache what they load, but the
+      cache lives in each process. Loading here, when the worker starts,
+      means no upload has to wait for it later.
+    """
+    if _ml_available():
+        load_model(MODEL_PATH)
+        load_feature_columns(FEATURE_COLUMNS_PATH)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _ANALYSIS_POOL
+    _ANALYSIS_POOL = ProcessPoolExecutor(
+        max_workers=ANALYSIS_WORKERS, initializer=_preload_model
+    )
+    yield
+    pool, _ANALYSIS_POOL = _ANALYSIS_POOL, None
+    pool.shutdown(cancel_futures=True)
 
 
 app = FastAPI(
     title="PacketVision API",
     description="AI-powered PCAP traffic classifier and threat detector.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Optional CORS config so tools/frontends can call this API easily.
@@ -44,6 +87,61 @@ app.add_middleware(
 )
 
 
+def _copy_upload(src: BinaryIO, dst: BinaryIO) -> None:
+    """
+    Write the rest of an uploaded file (from its current position) to dst.
+
+    In plain English:
+    - Uploads larger than the server's in-memory spool limit already sit in
+      a temporary file on disk. Those are copied file-to-file inside the
+      kernel with os.sendfile, so the bytes never pass through Python.
+    - Smaller uploads are still in memory (asking them for a file
+      descriptor would first force them onto disk), so they are copied
+      with copyfileobj and a 1 MiB buffer instead of the 16 KiB default.
+    """
+    # SpooledTemporaryFile tracks whether it has moved to disk in _rolled;
+    # any other file object is assumed to be a real file.
+    if hasattr(os, "sendfile") and getattr(src, "_rolled", True):
+        try:
+            src_fd = src.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            src_fd = None
+
+        if src_fd is not None:
+            # sendfile reads the descriptor directly, so push out anything
+            # still sitting in Python-level buffers first.
+            src.flush()
+            dst.flush()
+            offset = src.tell()
+            while True:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, 1 << 30)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+
+    shutil.copyfileobj(src, dst, length=1 << 20)
+
+
+def _upload_size(src: BinaryIO) -> int:
+    """
+    Bytes left to read in an uploaded file, without reading them.
+
+    The upload has already been received (in memory when small, in a
+    temporary file otherwise), so seeking to the end is enough.
+    """
+    pos = src.tell()
+    end = src.seek(0, os.SEEK_END)
+    src.seek(pos)
+    return end - pos
+
+
+def _save_upload(src: BinaryIO, dest_path: Path) -> None:
+    """Write an uploaded file to dest_path with _copy_upload()."""
+    with dest_path.open("wb") as f:
+        _copy_upload(src, f)
+
+
 @app.get("/health")
 async def healthcheck() -> Dict[str, str]:
     """
@@ -69,7 +167,8 @@ async def analyze_pcap_endpoint(file: UploadFile = File(...)) -> Dict[str, Any]:
         4. Return a JSON report
 
     Notes:
-    - This is intentionally simple; in a real system you'd want auth, size limits, etc.
+    - Uploads over MAX_UPLOAD_BYTES are rejected with HTTP 413.
+    - This is intentionally simple; in a real system you'd want auth, rate limits, etc.
     """
 
     if file.content_type not in ("application/vnd.tcpdump.pcap", "application/octet-stream"):
@@ -77,6 +176,13 @@ async def analyze_pcap_endpoint(file: UploadFile = File(...)) -> Dict[str, Any]:
         # This is just a light sanity check.
         pass
 
+    if _upload_size(file.file) > MAX_UPLOAD_BYTES:
+        file.file.close()
+        raise HTTPException(
+            status_code=413,
+            detail=f"PCAP is larger than the {MAX_UPLOAD_BYTES} byte upload limit.",
+        )
+
     RAW_PCAP_DIR.mkdir(parents=True, exist_ok=True)
 
     # Create a unique filename so multiple uploads don't collide.
@@ -84,15 +190,23 @@ async def analyze_pcap_endpoint(file: UploadFile = File(...)) -> Dict[str, Any]:
     dest_path = RAW_PCAP_DIR / unique_name
 
     try:
-        with dest_path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
+        # The copy is blocking file I/O, so it runs in a thread and the event
+        # loop keeps serving other requests while a large PCAP is written.
+        await run_in_threadpool(_save_upload, file.file, dest_path)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {exc}")
     finally:
         file.file.close()
 
     try:
-        report = analyze_pcap(dest_path)
+        # Parsing and scoring are CPU-bound, so they run in a worker process;
+        # the event loop keeps serving other requests meanwhile.
+        if _ANALYSIS_POOL is not None:
+            loop = asyncio.get_running_loop()
+            report = await loop.run_in_executor(_ANALYSIS_POOL, analyze_pcap, dest_path)
+        else:
+            # Not started (app used without its lifespan): run in a thread.
+            report = await run_in_threadpool(analyze_pcap, dest_path)
     except Exception as exc:
         # In plain English:
         # - If anything goes wrong during analysis, we surface a 500 error with the message.
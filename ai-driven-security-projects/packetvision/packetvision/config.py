@@ -10,6 +10,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import os
+
 # BASE_DIR points to the root of this lab, e.g.:
 # .../pentest-portfolio/labs/packetvision
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,8 +24,37 @@ RAW_PCAP_DIR = DATA_DIR / "raw"
 
 # Processed artifacts (features, model, reports) go here.
 PROCESSED_DIR = DATA_DIR / "processed"
-FEATURES_CSV_PATH = PROCESSED_DIR / "flow_features.csv"
+# Inspection copy of the training features (+ label). A ".parquet" path is
+# written as zstd-compressed Parquet; any other suffix as plain CSV.
+FEATURES_PATH = PROCESSED_DIR / "flow_features.parquet"
 MODEL_PATH = PROCESSED_DIR / "model.joblib"
 REPORT_PATH = PROCESSED_DIR / "report.json"
 FEATURE_COLUMNS_PATH = PROCESSED_DIR / "feature_columns.json"
 
+# Which classifier train_packetvision_model() builds:
+#   "hist_gb"       -> HistGradientBoostingClassifier (default). Features are
+#                      bucketed into at most 255 small-integer bins, so the
+#                      model is small and quick to evaluate.
+#   "random_forest" -> the original 200-tree, unlimited-depth RandomForest.
+MODEL_TYPE = "hist_gb"
+
+# Synthetic training data: the four behaviors are generated in separate
+# processes once the requested number of flows reaches this size. Each
+# behavior is a handful of vectorized NumPy draws, so below this the
+# process startup and pickling cost more than they save.
+PARALLEL_GENERATION_MIN_FLOWS = 500_000
+
+# Rule engine: from this many flows on (and with more than one CPU), the
+# rules run side by side in threads. Their NumPy / pandas work releases the
+# GIL, so they overlap; for smaller tables starting threads costs more than
+# the rules themselves.
+PARALLEL_RULES_MIN_FLOWS = 10_000
+
+# API: uploaded PCAPs are analyzed in a pool of this many worker processes,
+# so parsing and scoring never block the event loop (or /health) and
+# several uploads can be analyzed on separate cores at once.
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
+# API: largest PCAP /analyze-pcap accepts (larger uploads get HTTP 413), so a
+# single upload can't fill the disk or tie up an analysis worker for long.
+MAX_UPLOAD_BYTES = 50 << 20  # 50 MiB
@@ -13,20 +13,44 @@ Feature engineering for PacketVision.
 
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict
 
 import numpy as np
 import pandas as pd
 
 
-def _safe_divide(numerator: pd.Series, denominator: pd.Series, eps: float = 1e-6) -> pd.Series:
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, eps: float = 1e-6) -> np.ndarray:
     """
     Helper for safe division.
 
     - Avoids division-by-zero.
     - If duration is 0, we divide by a tiny number instead of crashing.
     """
-    return numerator / (denominator.replace(0, eps))
+    return numerator / np.where(denominator == 0, eps, denominator)
+
+
+# Raw flow columns that are not passed through to the features.
+# IPs are high-cardinality identifiers; for this portfolio ML model we drop
+# them to avoid overfitting on specific addresses.
+_DROPPED_COLUMNS = frozenset({"src_ip", "dst_ip", "protocol", "start_time", "end_time"})
+
+
+def _port_table(ports) -> np.ndarray:
+    """0/1 lookup table over all 65536 port numbers, 1 for the given ports."""
+    table = np.zeros(65536, dtype=np.uint8)
+    table[list(ports)] = 1
+    return table
+
+
+# Port flag lookup tables: a flag is a single gather, table[port], instead of
+# one comparison per listed port plus the ORs between them. Each table is
+# 64 KiB and they are all indexed by the same port array.
+_WEB_PORTS = _port_table([80, 443, 8080])
+_DNS_PORTS = _port_table([53])
+_SSH_PORTS = _port_table([22])
+_SMB_PORTS = _port_table([139, 445])
+_RDP_PORTS = _port_table([3389])
+_HIGH_PORTS = _port_table(range(1024, 65536))
 
 
 def build_features(flows: pd.DataFrame) -> pd.DataFrame:
@@ -61,62 +85,65 @@ def build_features(flows: pd.DataFrame) -> pd.DataFrame:
         # Nothing to do; return an empty DataFrame with no columns.
         return pd.DataFrame()
 
-    df = flows.copy()
+    # The input frame is only read: source columns are pulled out as NumPy
+    # arrays and the result is a new frame, so `flows` is never copied.
+    # The remaining raw flow columns (ports, counts, duration, ...) pass
+    # through unchanged.
+    columns: Dict[str, Any] = {
+        col: flows[col] for col in flows.columns if col not in _DROPPED_COLUMNS
+    }
+
+    packet_count = flows["packet_count"].to_numpy()
+    total_bytes = flows["total_bytes"].to_numpy()
+    duration = flows["duration"].to_numpy(dtype=np.float64)
+    protocol = flows["protocol"].to_numpy()
+    # Ports are 16-bit, so they index the port tables directly.
+    dst_port = flows["dst_port"].to_numpy(dtype=np.uint16)
+    src_port = flows["src_port"].to_numpy(dtype=np.uint16)
 
     # --- Basic rate features -------------------------------------------------
+    # Continuous features are stored as float32: tree models gain nothing
+    # from float64 here, and half-size columns mean half the memory traffic
+    # through fit / predict. The rates are computed in float64 first.
+
     # packets per second (how "chatty" the flow is)
-    df["pkts_per_sec"] = _safe_divide(df["packet_count"], df["duration"])
+    columns["pkts_per_sec"] = _safe_divide(packet_count, duration).astype(np.float32)
 
     # bytes per second (throughput for the flow)
-    df["bytes_per_sec"] = _safe_divide(df["total_bytes"], df["duration"])
+    columns["bytes_per_sec"] = _safe_divide(total_bytes, duration).astype(np.float32)
 
     # We already have avg_packet_size, but ensure it's numeric.
-    df["avg_packet_size"] = df["avg_packet_size"].astype(float)
-
-    # --- Protocol one-hot ----------------------------------------------------
-    # Instead of models learning from the string "TCP" or "UDP", we give them
-    # explicit numeric columns.
-    df["is_tcp"] = (df["protocol"] == "TCP").astype(int)
-    df["is_udp"] = (df["protocol"] == "UDP").astype(int)
-
-    # --- Destination port flags ----------------------------------------------
-    # Simple flags for common service types.
-    dst_port = df["dst_port"].astype(int)
-
-    df["dst_is_web"] = dst_port.isin([80, 443, 8080]).astype(int)
-    df["dst_is_dns"] = (dst_port == 53).astype(int)
-    df["dst_is_ssh"] = (dst_port == 22).astype(int)
-    df["dst_is_smb"] = dst_port.isin([139, 445]).astype(int)
-    df["dst_is_rdp"] = (dst_port == 3389).astype(int)
-
-    # Flag for "high" ephemeral ports (could be C2, scanning, or exfil).
-    df["dst_high_port"] = (dst_port >= 1024).astype(int)
-
-    # --- Source port flags (optional, but can be useful) ---------------------
-    src_port = df["src_port"].astype(int)
-    df["src_high_port"] = (src_port >= 1024).astype(int)
-
-    # --- Flow duration buckets (very short vs long-lived) --------------------
-    # These are rough buckets that might help distinguish scans vs beacons.
-    df["is_short_flow"] = (df["duration"] < 1.0).astype(int)
-    df["is_long_flow"] = (df["duration"] > 60.0).astype(int)
-
-    # --- Drop non-ML-friendly columns ---------------------------------------
-    # IPs are high-cardinality identifiers; for this portfolio ML model we drop
-    # them to avoid overfitting on specific addresses.
-    cols_to_drop: List[str] = [
-        "src_ip",
-        "dst_ip",
-        "protocol",
-        "start_time",
-        "end_time",
-    ]
-    for col in cols_to_drop:
-        if col in df.columns:
-            df = df.drop(columns=[col])
-
-    # Ensure consistent column order (sorted by name for reproducibility).
-    df = df.reindex(sorted(df.columns), axis=1)
-
-    return df
-
+    columns["avg_packet_size"] = flows["avg_packet_size"].to_numpy(dtype=np.float32)
+    columns["duration"] = duration.astype(np.float32)
+
+    # --- Flags -----------------------------------------------------------------
+    # Every flag is a uint8 NumPy array: a plain comparison, or a lookup in
+    # one of the port tables.
+    flags = {
+        # --- Protocol one-hot ------------------------------------------------
+        # Instead of models learning from the string "TCP" or "UDP", we give
+        # them explicit numeric columns.
+        "is_tcp": protocol == "TCP",
+        "is_udp": protocol == "UDP",
+        # --- Destination port flags ------------------------------------------
+        # Simple flags for common service types.
+        "dst_is_web": _WEB_PORTS[dst_port],
+        "dst_is_dns": _DNS_PORTS[dst_port],
+        "dst_is_ssh": _SSH_PORTS[dst_port],
+        "dst_is_smb": _SMB_PORTS[dst_port],
+        "dst_is_rdp": _RDP_PORTS[dst_port],
+        # Flag for "high" ephemeral ports (could be C2, scanning, or exfil).
+        "dst_high_port": _HIGH_PORTS[dst_port],
+        # --- Source port flags (optional, but can be useful) -----------------
+        "src_high_port": _HIGH_PORTS[src_port],
+        # --- Flow duration buckets (very short vs long-lived) ----------------
+        # These are rough buckets that might help distinguish scans vs beacons.
+        "is_short_flow": duration < 1.0,
+        "is_long_flow": duration > 60.0,
+    }
+    for name, flag in flags.items():
+        columns[name] = flag.astype(np.uint8, copy=False)
+
+    # Consistent column order (sorted by name for reproducibility), built
+    # into the frame directly instead of reindexing afterwards.
+    return pd.DataFrame(dict(sorted(columns.items())), index=flows.index)
@@ -13,15 +13,19 @@ We keep ML-specific logic here so that other parts of the project
 
 from __future__ import annotations
 
+import json
+import os
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 
-from .config import MODEL_PATH, FEATURE_COLUMNS_PATH
+from .config import MODEL_PATH, FEATURE_COLUMNS_PATH, MODEL_TYPE
 
 
 # ---------------------------------------------------------------------------
@@ -33,34 +37,55 @@ def train_packetvision_model(
     y_train: pd.Series,
     X_val: pd.DataFrame,
     y_val: pd.Series,
-) -> Tuple[RandomForestClassifier, Dict[str, Any]]:
+    model_type: str = MODEL_TYPE,
+) -> Tuple[ClassifierMixin, Dict[str, Any]]:
     """
-    Train a RandomForest classifier on flow features.
+    Train a classifier on flow features.
 
     Parameters
     ----------
     X_train, y_train : training data
     X_val, y_val     : validation data
+    model_type       : "hist_gb" (default) or "random_forest"
 
     Returns
     -------
-    model : RandomForestClassifier
+    model : ClassifierMixin
         Trained classifier.
     metrics : dict
         Simple metrics about how well the model did.
 
     In plain English:
-    - We fit a RandomForest on the training set.
+    - We fit the model on the training set.
     - We check accuracy and a basic classification report on the validation set.
     - We return both the model and a dictionary of metrics to log/save.
+
+    The default model is HistGradientBoosting. It bins every feature into
+    at most 255 uint8 buckets up front, so each tree node compares a small
+    integer instead of a float threshold, and the trees stay shallow
+    (max_depth=8, so at most 8 comparisons per tree per flow) instead of
+    growing to unlimited depth like the RandomForest's. Training and
+    scoring are both much faster as a result.
     """
 
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=None,
-        random_state=42,
-        n_jobs=-1,
-    )
+    if model_type == "hist_gb":
+        model = HistGradientBoostingClassifier(
+            max_iter=200,
+            max_depth=8,
+            max_bins=255,
+            learning_rate=0.1,
+            early_stopping=True,
+            random_state=42,
+        )
+    elif model_type == "random_forest":
+        model = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=None,
+            random_state=42,
+            n_jobs=-1,
+        )
+    else:
+        raise ValueError(f"Unknown model_type: {model_type!r}")
 
     model.fit(X_train, y_train)
 
@@ -84,25 +109,39 @@ def train_packetvision_model(
 # Model persistence
 # ---------------------------------------------------------------------------
 
-def save_model(model: RandomForestClassifier, path=MODEL_PATH) -> None:
+def save_model(model: ClassifierMixin, path=MODEL_PATH) -> None:
     """
     Save the trained model to disk using joblib.
 
     In plain English:
     - We serialize the model object so we can load it later without retraining.
+    - It is stored uncompressed so load_model() can memory-map it.
     """
     MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, path)
+    joblib.dump(model, path, compress=0)
 
 
-def load_model(path=MODEL_PATH) -> RandomForestClassifier:
+def load_model(path=MODEL_PATH) -> ClassifierMixin:
     """
     Load a previously saved model from disk.
 
     In plain English:
     - This is used at inference time (e.g., in the API) to get a ready-to-use model.
+    - mmap_mode="r" maps the model's numpy arrays straight from the file
+      instead of copying them into memory, so the load is fast and several
+      API workers share the same pages through the OS page cache.
+    - The loaded model is cached per (path, modification time): every
+      /analyze-pcap request calls this, but only the first one (or the
+      first after retraining rewrites the file) actually unpickles it.
+      Callers share the returned object and must not modify it.
     """
-    model: RandomForestClassifier = joblib.load(path)
+    return _load_model_cached(str(path), os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _load_model_cached(path: str, mtime_ns: int) -> ClassifierMixin:
+    """load_model() body; mtime_ns is only part of the cache key."""
+    model: ClassifierMixin = joblib.load(path, mmap_mode="r")
     return model
 
 
@@ -114,8 +153,6 @@ def save_feature_columns(columns: List[str], path=FEATURE_COLUMNS_PATH) -> None:
     - The model expects features in a specific column order.
     - We remember that order so we can re-create it when new data arrives.
     """
-    import json
-
     FEATURE_COLUMNS_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w") as f:
         json.dump(columns, f, indent=2)
@@ -124,12 +161,19 @@ def save_feature_columns(columns: List[str], path=FEATURE_COLUMNS_PATH) -> None:
 def load_feature_columns(path=FEATURE_COLUMNS_PATH) -> List[str]:
     """
     Load feature column names from disk.
+
+    Cached per (path, modification time) like load_model(); each call
+    returns a fresh list, so callers may modify it.
     """
-    import json
+    return list(_load_columns_cached(str(path), os.stat(path).st_mtime_ns))
 
+
+@lru_cache(maxsize=4)
+def _load_columns_cached(path: str, mtime_ns: int) -> Tuple[str, ...]:
+    """load_feature_columns() body; mtime_ns is only part of the cache key."""
     with open(path, "r") as f:
         cols = json.load(f)
-    return list(cols)
+    return tuple(cols)
 
 
 # ---------------------------------------------------------------------------
@@ -164,26 +208,13 @@ def align_features_for_inference(
         A DataFrame matching the training-time feature layout.
     """
 
-    X = X_new.copy()
-
-    # 1) Add missing columns as zeros.
-    for col in feature_columns:
-        if col not in X.columns:
-            X[col] = 0.0
-
-    # 2) Drop any extra columns the model never saw.
-    extra_cols = [c for c in X.columns if c not in feature_columns]
-    if extra_cols:
-        X = X.drop(columns=extra_cols)
-
-    # 3) Reorder columns to match training-time order.
-    X = X[feature_columns]
-
-    return X
+    # One reindex does all three steps: missing columns are added as 0.0,
+    # extra columns are dropped, and the result is in training-time order.
+    return X_new.reindex(columns=feature_columns, fill_value=0.0)
 
 
 def predict_flows(
-    model: RandomForestClassifier,
+    model: ClassifierMixin,
     X_aligned: pd.DataFrame,
 ) -> List[Dict[str, Any]]:
     """
@@ -191,7 +222,7 @@ def predict_flows(
 
     Parameters
     ----------
-    model : RandomForestClassifier
+    model : ClassifierMixin
         Trained classifier.
     X_aligned : pd.DataFrame
         Feature matrix that already matches the expected columns.
@@ -204,7 +235,7 @@ def predict_flows(
             - predicted_proba_per_class
 
     In plain English:
-    - We call model.predict() and model.predict_proba().
+    - We call model.predict_proba() and take the most likely class per flow.
     - We package the results into a list of dictionaries that our API/analyzer
       can turn into JSON later.
     """
@@ -212,21 +243,28 @@ def predict_flows(
     if X_aligned.empty:
         return []
 
-    y_pred = model.predict(X_aligned)
-    proba = model.predict_proba(X_aligned)
-    classes = list(model.classes_)
-
-    results: List[Dict[str, Any]] = []
-    for idx in range(X_aligned.shape[0]):
-        row_proba = proba[idx]
-        proba_dict = {str(cls): float(p) for cls, p in zip(classes, row_proba)}
-
-        results.append(
-            {
-                "predicted_label": str(y_pred[idx]),
-                "probabilities": proba_dict,
-            }
-        )
-
-    return results
-
+    # Scans and brute-force bursts produce many flows with identical
+    # features, so only the distinct rows go through the model and their
+    # results are scattered back to every flow. Rows are compared exactly
+    # (in float64, what the model computes in), so no prediction changes.
+    values = X_aligned.to_numpy(dtype=np.float64)
+    unique_rows, inverse = np.unique(values, axis=0, return_inverse=True)
+    if len(unique_rows) < len(values):
+        unique_X = pd.DataFrame(unique_rows, columns=X_aligned.columns)
+        proba = model.predict_proba(unique_X)[inverse.reshape(-1)]
+    else:
+        proba = model.predict_proba(X_aligned)
+
+    # The predicted label is the highest-probability class (what
+    # model.predict() would compute with a second pass).
+    class_names = [str(cls) for cls in model.classes_]
+    labels = [class_names[i] for i in proba.argmax(axis=1).tolist()]
+
+    # tolist() converts every probability to a Python float in one go.
+    return [
+        {
+            "predicted_label": label,
+            "probabilities": dict(zip(class_names, row)),
+        }
+        for label, row in zip(labels, proba.tolist())
+    ]
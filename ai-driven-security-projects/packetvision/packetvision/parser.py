@@ -19,15 +19,183 @@ than raw packets.
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
-from collections import defaultdict
+import socket
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from scapy.all import rdpcap, IP, TCP, UDP  # type: ignore[import]
+
+try:
+    import dpkt  # type: ignore[import]
+except ImportError:  # optional; without it we fall back to scapy
+    dpkt = None
 
 
 FlowKey = Tuple[str, str, int, int, str]
 
+FLOW_KEY_COLUMNS = ["src_ip", "dst_ip", "src_port", "dst_port", "protocol"]
+
+# Per-packet fields pulled out of the PCAP before aggregation.
+PACKET_COLUMNS = FLOW_KEY_COLUMNS + ["size", "time"]
+PACKET_DTYPES = {
+    "src_port": "int32",
+    "dst_port": "int32",
+    "protocol": "category",
+    # int64 so total_bytes can't overflow on multi-GB flows.
+    "size": "int64",
+    "time": "float64",
+}
+
+# Columns of the flow table returned by parse_pcap_to_flows(), in order.
+FLOW_COLUMNS = FLOW_KEY_COLUMNS + [
+    "packet_count",
+    "total_bytes",
+    "start_time",
+    "end_time",
+    "duration",
+    "avg_packet_size",
+]
+
+
+# pcapng files start with a Section Header Block instead of the pcap magic.
+PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"
+
+# Small integer code per protocol, used inside the packed flow keys.
+PROTOCOL_NAMES = ("TCP", "UDP")
+
+
+def _read_packets_dpkt(pcap_path: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Stream the capture with dpkt into fixed-dtype per-packet arrays.
+
+    In plain English:
+    - dpkt hands us raw (timestamp, bytes) records and only decodes the
+      Ethernet/IP/TCP/UDP headers we ask for, so no heavyweight packet
+      objects are built and nothing is kept once a packet is read.
+    - Addresses stay as raw 4-byte strings in the loop and are turned into
+      one uint32 array at the end (no per-packet string formatting).
+    - Returns None for link types we don't decode here, so the caller can
+      fall back to scapy.
+    """
+    with open(pcap_path, "rb") as f:
+        is_pcapng = f.read(4) == PCAPNG_MAGIC
+        f.seek(0)
+        reader = dpkt.pcapng.Reader(f) if is_pcapng else dpkt.pcap.Reader(f)
+
+        datalink = reader.datalink()
+        if datalink == dpkt.pcap.DLT_EN10MB:
+            decode = dpkt.ethernet.Ethernet
+        elif datalink == dpkt.pcap.DLT_LINUX_SLL:
+            decode = dpkt.sll.SLL
+        elif datalink in (dpkt.pcap.DLT_RAW, 101):  # 101 = LINKTYPE_RAW
+            decode = dpkt.ip.IP
+        else:
+            return None
+
+        ip_type = dpkt.ip.IP
+        tcp_type = dpkt.tcp.TCP
+        udp_type = dpkt.udp.UDP
+
+        srcs: List[bytes] = []
+        dsts: List[bytes] = []
+        sports: List[int] = []
+        dports: List[int] = []
+        protos: List[int] = []
+        sizes: List[int] = []
+        times: List[float] = []
+
+        for ts, buf in reader:
+            try:
+                frame = decode(buf)
+            except dpkt.UnpackError:
+                # Truncated or malformed frame; skip it.
+                continue
+
+            ip = frame if decode is ip_type else frame.data
+            if not isinstance(ip, ip_type):
+                continue
+
+            l4 = ip.data
+            if isinstance(l4, tcp_type):
+                proto = 0  # PROTOCOL_NAMES[0] == "TCP"
+            elif isinstance(l4, udp_type):
+                proto = 1  # PROTOCOL_NAMES[1] == "UDP"
+            else:
+                continue
+
+            srcs.append(ip.src)
+            dsts.append(ip.dst)
+            sports.append(l4.sport)
+            dports.append(l4.dport)
+            protos.append(proto)
+            sizes.append(len(buf))
+            times.append(ts)
+
+    return {
+        "src": np.frombuffer(b"".join(srcs), dtype=">u4").astype(np.uint64),
+        "dst": np.frombuffer(b"".join(dsts), dtype=">u4").astype(np.uint64),
+        "sport": np.array(sports, dtype=np.uint64),
+        "dport": np.array(dports, dtype=np.uint64),
+        "proto": np.array(protos, dtype=np.uint64),
+        "size": np.array(sizes, dtype=np.int64),
+        "time": np.array(times, dtype=np.float64),
+    }
+
+
+def _read_packets_scapy(pcap_path: str) -> Dict[str, Any]:
+    """
+    Same as _read_packets_dpkt(), using scapy's full packet decoding.
+
+    Fields are collected column by column (one list per field) so the
+    packet table can be built straight from them, without a tuple per
+    packet or a dtype-inference pass over mixed rows.
+
+    Timestamps and sizes are pulled out of every packet in two bulk
+    np.fromiter passes up front (scapy's pkt.time is a Decimal, so the
+    conversion is not free); the main loop only extracts flow keys and
+    records which packets it kept.
+    """
+    from scapy.all import rdpcap, IP, TCP, UDP  # type: ignore[import]
+
+    packets = rdpcap(pcap_path)
+    n = len(packets)
+    # len(pkt) is the serialized size; pkt.time is the capture timestamp.
+    all_times = np.fromiter((p.time for p in packets), dtype=np.float64, count=n)
+    all_sizes = np.fromiter((len(p) for p in packets), dtype=np.int64, count=n)
+
+    columns: Dict[str, Any] = {col: [] for col in FLOW_KEY_COLUMNS}
+    src_ips, dst_ips = columns["src_ip"], columns["dst_ip"]
+    src_ports, dst_ports = columns["src_port"], columns["dst_port"]
+    protocols = columns["protocol"]
+    kept: List[int] = []
+
+    for i, pkt in enumerate(packets):
+        # We only care about IP packets with TCP or UDP.
+        if IP not in pkt:
+            continue
+
+        if TCP in pkt:
+            l4 = pkt[TCP]
+            protocol = "TCP"
+        elif UDP in pkt:
+            l4 = pkt[UDP]
+            protocol = "UDP"
+        else:
+            # Ignore non-TCP/UDP IP traffic for now.
+            continue
+
+        ip_layer = pkt[IP]
+        src_ips.append(ip_layer.src)
+        dst_ips.append(ip_layer.dst)
+        src_ports.append(l4.sport)
+        dst_ports.append(l4.dport)
+        protocols.append(protocol)
+        kept.append(i)
+
+    columns["size"] = all_sizes[kept]
+    columns["time"] = all_times[kept]
+    return columns
+
 
 def parse_pcap_to_flows(pcap_path: str) -> pd.DataFrame:
     """
@@ -55,99 +223,103 @@ def parse_pcap_to_flows(pcap_path: str) -> pd.DataFrame:
         - avg_packet_size
 
     In plain English:
-    - We read all packets from the PCAP.
-    - For each TCP/UDP packet with an IP header, we build a flow key.
-    - We keep track of stats per flow (counts, bytes, timestamps).
+    - We read all packets from the PCAP (with dpkt if it's installed,
+      otherwise with scapy).
+    - For each TCP/UDP packet with an IP header, we record its flow key,
+      size and timestamp.
+    - One groupby over those records gives the stats per flow
+      (counts, bytes, timestamps).
     """
 
-    packets = rdpcap(pcap_path)
+    if dpkt is not None:
+        packets = _read_packets_dpkt(pcap_path)
+        if packets is not None:
+            return _flows_from_arrays(packets)
 
-    # We'll aggregate stats into these dicts keyed by flow.
-    packet_counts: Dict[FlowKey, int] = defaultdict(int)
-    total_bytes: Dict[FlowKey, int] = defaultdict(int)
-    first_ts: Dict[FlowKey, float] = {}
-    last_ts: Dict[FlowKey, float] = {}
+    return _flows_from_columns(_read_packets_scapy(pcap_path))
 
-    for pkt in packets:
-        # We only care about IP packets with TCP or UDP.
-        if IP not in pkt:
-            continue
 
-        ip_layer = pkt[IP]
-        protocol: str
+_FLOW_AGGREGATIONS = dict(
+    packet_count=("size", "size"),
+    total_bytes=("size", "sum"),
+    start_time=("time", "min"),
+    end_time=("time", "max"),
+)
 
-        if TCP in pkt:
-            l4 = pkt[TCP]
-            protocol = "TCP"
-        elif UDP in pkt:
-            l4 = pkt[UDP]
-            protocol = "UDP"
-        else:
-            # Ignore non-TCP/UDP IP traffic for now.
-            continue
 
-        src_ip = ip_layer.src
-        dst_ip = ip_layer.dst
-        src_port = int(l4.sport)
-        dst_port = int(l4.dport)
-        key: FlowKey = (src_ip, dst_ip, src_port, dst_port, protocol)
-
-        # Length in bytes. scapy's "len(pkt)" returns the serialized size.
-        size_bytes = len(pkt)
-
-        # Timestamp; scapy stores it on the packet object as "time".
-        ts = float(pkt.time)
-
-        packet_counts[key] += 1
-        total_bytes[key] += size_bytes
-
-        if key not in first_ts:
-            first_ts[key] = ts
-        # Always update last_ts so the final value is the last time we saw this flow.
-        last_ts[key] = ts
-
-    # Build rows for the DataFrame.
-    rows = []
-    for (src_ip, dst_ip, src_port, dst_port, protocol), count in packet_counts.items():
-        bytes_total = total_bytes[(src_ip, dst_ip, src_port, dst_port, protocol)]
-        start = first_ts[(src_ip, dst_ip, src_port, dst_port, protocol)]
-        end = last_ts[(src_ip, dst_ip, src_port, dst_port, protocol)]
-        duration = max(end - start, 0.0)
-        avg_pkt_size = bytes_total / count if count > 0 else 0.0
-
-        rows.append(
-            {
-                "src_ip": src_ip,
-                "dst_ip": dst_ip,
-                "src_port": src_port,
-                "dst_port": dst_port,
-                "protocol": protocol,
-                "packet_count": count,
-                "total_bytes": bytes_total,
-                "start_time": start,
-                "end_time": end,
-                "duration": duration,
-                "avg_packet_size": avg_pkt_size,
-            }
-        )
-
-    if not rows:
+def _uint32_to_ips(values: np.ndarray) -> List[str]:
+    """Dotted-quad strings for an array of IPv4 addresses held as integers."""
+    packed = values.astype(">u4").tobytes()
+    return [socket.inet_ntoa(packed[i : i + 4]) for i in range(0, len(packed), 4)]
+
+
+def _flows_from_arrays(packets: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Aggregate dpkt's per-packet arrays into the flow table.
+
+    The 5-tuple is packed into two uint64 keys - (src_ip << 32 | dst_ip) and
+    (src_port << 24 | dst_port << 8 | protocol) - so the groupby hashes two
+    plain integers per packet instead of five mixed-type columns. The keys
+    are unpacked again once per flow at the end.
+    """
+    if len(packets["size"]) == 0:
+        return pd.DataFrame(columns=FLOW_COLUMNS)
+
+    packets_df = pd.DataFrame(
+        {
+            "addr_key": (packets["src"] << 32) | packets["dst"],
+            "port_key": (packets["sport"] << 24) | (packets["dport"] << 8) | packets["proto"],
+            "size": packets["size"],
+            "time": packets["time"],
+        }
+    )
+
+    agg = packets_df.groupby(["addr_key", "port_key"], sort=False).agg(**_FLOW_AGGREGATIONS)
+
+    addr_key = agg.index.get_level_values("addr_key").to_numpy()
+    port_key = agg.index.get_level_values("port_key").to_numpy()
+
+    flows = pd.DataFrame(
+        {
+            "src_ip": _uint32_to_ips(addr_key >> 32),
+            "dst_ip": _uint32_to_ips(addr_key & 0xFFFFFFFF),
+            "src_port": (port_key >> 24).astype(np.int32),
+            "dst_port": ((port_key >> 8) & 0xFFFF).astype(np.int32),
+            "protocol": pd.Categorical.from_codes(
+                (port_key & 0xFF).astype(np.int8), categories=PROTOCOL_NAMES
+            ),
+        }
+    )
+    for col in _FLOW_AGGREGATIONS:
+        flows[col] = agg[col].to_numpy()
+
+    return _add_derived_columns(flows)
+
+
+def _flows_from_columns(columns: Dict[str, Any]) -> pd.DataFrame:
+    """Aggregate scapy's per-packet columns into the flow table."""
+    if len(columns["size"]) == 0:
         # Return an empty DataFrame with the expected columns if nothing was parsed.
-        return pd.DataFrame(
-            columns=[
-                "src_ip",
-                "dst_ip",
-                "src_port",
-                "dst_port",
-                "protocol",
-                "packet_count",
-                "total_bytes",
-                "start_time",
-                "end_time",
-                "duration",
-                "avg_packet_size",
-            ]
-        )
-
-    return pd.DataFrame(rows)
+        return pd.DataFrame(columns=FLOW_COLUMNS)
+
+    # Each column goes straight into its final dtype.
+    packets_df = pd.DataFrame(
+        {
+            col: pd.Series(values, dtype=PACKET_DTYPES.get(col))
+            for col, values in columns.items()
+        }
+    )
+
+    flows = (
+        packets_df.groupby(FLOW_KEY_COLUMNS, sort=False, observed=True)
+        .agg(**_FLOW_AGGREGATIONS)
+        .reset_index()
+    )
+
+    return _add_derived_columns(flows)
+
 
+def _add_derived_columns(flows: pd.DataFrame) -> pd.DataFrame:
+    flows["duration"] = (flows["end_time"] - flows["start_time"]).clip(lower=0.0)
+    flows["avg_packet_size"] = flows["total_bytes"] / flows["packet_count"]
+    return flows[FLOW_COLUMNS]
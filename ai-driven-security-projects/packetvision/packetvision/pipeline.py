@@ -4,7 +4,7 @@ Training pipeline for PacketVision.
 In plain English:
 - This script generates synthetic flow data for different traffic behaviors.
 - It turns those flows into numeric features.
-- It trains a RandomForest classifier to recognize those behaviors.
+- It trains a classifier (HistGradientBoosting by default) to recognize those behaviors.
 - It saves the model and metadata (feature columns, training report) to disk.
 
 This gives us a repeatable way to build a model WITHOUT needing real PCAPs
@@ -13,23 +13,25 @@ in the repository.
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Optional, Tuple
 
-import json
-import random
+import os
 import time
 
 import numpy as np
+import orjson
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
 from .config import (
     PROCESSED_DIR,
-    FEATURES_CSV_PATH,
+    FEATURES_PATH,
     MODEL_PATH,
     REPORT_PATH,
     FEATURE_COLUMNS_PATH,
+    PARALLEL_GENERATION_MIN_FLOWS,
 )
 from .features import build_features
 from .ml import (
@@ -43,17 +45,39 @@ from .ml import (
 # Synthetic flow generation
 # ---------------------------------------------------------------------------
 
-def _random_ip() -> str:
+def _random_ips(rng: np.random.Generator, n: int) -> np.ndarray:
     """
-    Generate a simple random IPv4 address.
+    Generate n simple random IPv4 addresses (each octet 1-254).
 
     In plain English:
     - This is just for synthetic training data, not for real networking.
+    - All 4*n octets are drawn at once and joined column-wise with
+      np.char.add, instead of formatting one address at a time.
     """
-    return ".".join(str(random.randint(1, 254)) for _ in range(4))
-
-
-def _make_behavior_flows(label: str, n: int) -> pd.DataFrame:
+    octets = rng.integers(1, 255, size=(4, n)).astype(str)
+    ips = octets[0]
+    for column in octets[1:]:
+        ips = np.char.add(np.char.add(ips, "."), column)
+    return ips
+
+
+# Column dtypes of the synthetic flow table. Every behavior produces the
+# same dtypes, so concatenating them needs no upcasting, and the counts /
+# ports / durations take half the memory of int64 / float64. Ports match
+# the parser's int32; start/end times stay float64 (epoch seconds).
+_SYNTHETIC_DTYPES = {
+    "src_port": np.int32,
+    "dst_port": np.int32,
+    "packet_count": np.int32,
+    "total_bytes": np.int64,
+    "duration": np.float32,
+    "avg_packet_size": np.float32,
+}
+
+
+def _make_behavior_flows(
+    label: str, n: int, rng: np.random.Generator, with_ips: bool = False
+) -> pd.DataFrame:
     """
     Create synthetic flows for a specific behavior.
 
@@ -66,63 +90,66 @@ def _make_behavior_flows(label: str, n: int) -> pd.DataFrame:
     In plain English:
     - We don't need perfect realism; we just need patterns that are
       different enough for the model to learn from.
+    - Every column is drawn for all n flows in one NumPy call and the
+      DataFrame is built from those arrays, instead of one dict per row.
+    - src_ip / dst_ip are only generated when with_ips=True: build_features()
+      drops them anyway, so training doesn't need the strings.
     """
 
-    rows: List[Dict[str, Any]] = []
-
-    for _ in range(n):
-        src_ip = _random_ip()
-        dst_ip = _random_ip()
-
-        if label == "benign":
-            # Web / DNS-like traffic.
-            dst_port = random.choice([80, 443, 8080, 53])
-            protocol = random.choice(["TCP", "UDP"])
-            packet_count = random.randint(5, 50)
-            total_bytes = random.randint(1_000, 50_000)
-            duration = random.uniform(0.5, 10.0)
-
-        elif label == "port_scan":
-            # Very short flows to lots of different destination ports.
-            dst_port = random.randint(1, 1024)
-            protocol = "TCP"
-            packet_count = random.randint(1, 3)
-            total_bytes = random.randint(60, 600)
-            duration = random.uniform(0.01, 0.5)
-
-        elif label == "bruteforce":
-            # Lots of traffic to typical admin ports.
-            dst_port = random.choice([22, 3389, 445])
-            protocol = "TCP"
-            packet_count = random.randint(20, 200)
-            total_bytes = random.randint(10_000, 300_000)
-            duration = random.uniform(2.0, 60.0)
-
-        elif label == "dns_tunnel":
-            # High-volume DNS-like traffic (covert channel).
-            dst_port = 53
-            protocol = "UDP"
-            packet_count = random.randint(50, 800)
-            total_bytes = random.randint(100_000, 2_000_000)
-            duration = random.uniform(5.0, 120.0)
-
-        else:
-            # Fallback: treat as benign if unknown.
-            dst_port = random.choice([80, 443, 8080])
-            protocol = "TCP"
-            packet_count = random.randint(5, 50)
-            total_bytes = random.randint(1_000, 50_000)
-            duration = random.uniform(0.5, 10.0)
-
-        # Simple timestamps: pretend flows happen at random times.
-        start_time = time.time() + random.uniform(-3600, 0)
-        end_time = start_time + duration
-        avg_pkt_size = total_bytes / packet_count if packet_count > 0 else 0.0
-
-        row = {
-            "src_ip": src_ip,
-            "dst_ip": dst_ip,
-            "src_port": random.randint(1024, 65535),
+    if label == "benign":
+        # Web / DNS-like traffic.
+        dst_port = rng.choice([80, 443, 8080, 53], size=n)
+        protocol = rng.choice(["TCP", "UDP"], size=n)
+        packet_count = rng.integers(5, 50, size=n, endpoint=True)
+        total_bytes = rng.integers(1_000, 50_000, size=n, endpoint=True)
+        duration = rng.uniform(0.5, 10.0, size=n)
+
+    elif label == "port_scan":
+        # Very short flows to lots of different destination ports.
+        dst_port = rng.integers(1, 1024, size=n, endpoint=True)
+        protocol = np.full(n, "TCP")
+        packet_count = rng.integers(1, 3, size=n, endpoint=True)
+        total_bytes = rng.integers(60, 600, size=n, endpoint=True)
+        duration = rng.uniform(0.01, 0.5, size=n)
+
+    elif label == "bruteforce":
+        # Lots of traffic to typical admin ports.
+        dst_port = rng.choice([22, 3389, 445], size=n)
+        protocol = np.full(n, "TCP")
+        packet_count = rng.integers(20, 200, size=n, endpoint=True)
+        total_bytes = rng.integers(10_000, 300_000, size=n, endpoint=True)
+        duration = rng.uniform(2.0, 60.0, size=n)
+
+    elif label == "dns_tunnel":
+        # High-volume DNS-like traffic (covert channel).
+        dst_port = np.full(n, 53)
+        protocol = np.full(n, "UDP")
+        packet_count = rng.integers(50, 800, size=n, endpoint=True)
+        total_bytes = rng.integers(100_000, 2_000_000, size=n, endpoint=True)
+        duration = rng.uniform(5.0, 120.0, size=n)
+
+    else:
+        # Fallback: treat as benign if unknown.
+        dst_port = rng.choice([80, 443, 8080], size=n)
+        protocol = np.full(n, "TCP")
+        packet_count = rng.integers(5, 50, size=n, endpoint=True)
+        total_bytes = rng.integers(1_000, 50_000, size=n, endpoint=True)
+        duration = rng.uniform(0.5, 10.0, size=n)
+
+    # Simple timestamps: pretend flows happen at random times.
+    start_time = time.time() + rng.uniform(-3600, 0, size=n)
+    end_time = start_time + duration
+    # packet_count is at least 1 in every behavior above.
+    avg_pkt_size = total_bytes / np.maximum(packet_count, 1)
+
+    columns: Dict[str, Any] = {}
+    if with_ips:
+        columns["src_ip"] = _random_ips(rng, n)
+        columns["dst_ip"] = _random_ips(rng, n)
+
+    columns.update(
+        {
+            "src_port": rng.integers(1024, 65535, size=n, endpoint=True),
             "dst_port": dst_port,
             "protocol": protocol,
             "packet_count": packet_count,
@@ -133,9 +160,20 @@ def _make_behavior_flows(label: str, n: int) -> pd.DataFrame:
             "avg_packet_size": avg_pkt_size,
             "label": label,
         }
-        rows.append(row)
+    )
+    for name, dtype in _SYNTHETIC_DTYPES.items():
+        columns[name] = columns[name].astype(dtype, copy=False)
+    return pd.DataFrame(columns)
 
-    return pd.DataFrame(rows)
+
+def _run_behavior(
+    label: str, n: int, seed_seq: np.random.SeedSequence, with_ips: bool
+) -> pd.DataFrame:
+    """
+    Worker entrypoint: rebuild a Generator from its own child seed and
+    generate one behavior. Module-level so it can be pickled to a process.
+    """
+    return _make_behavior_flows(label, n, np.random.default_rng(seed_seq), with_ips)
 
 
 def generate_synthetic_dataset(
@@ -143,6 +181,9 @@ def generate_synthetic_dataset(
     n_port_scan: int = 600,
     n_bruteforce: int = 400,
     n_dns_tunnel: int = 400,
+    seed: int = 42,
+    with_ips: bool = False,
+    parallel: Optional[bool] = None,
 ) -> pd.DataFrame:
     """
     Generate a full synthetic dataset with multiple behaviors.
@@ -150,15 +191,63 @@ def generate_synthetic_dataset(
     In plain English:
     - We create several groups of flows with different statistical patterns.
     - We label each row with the behavior type.
+    - Each behavior gets its own child seed (SeedSequence.spawn) and, for
+      large datasets, its own worker process. Because the seeds don't
+      depend on scheduling, the same seed gives the same flows (apart from
+      the wall-clock-based timestamps) whether it runs in parallel or not.
+    - parallel=None decides automatically from
+      PARALLEL_GENERATION_MIN_FLOWS and the CPU count.
+    - with_ips=True adds synthetic src_ip / dst_ip columns, for looking at
+      the data like parser output; the training pipeline leaves them out.
     """
+    jobs = [
+        ("benign", n_benign),
+        ("port_scan", n_port_scan),
+        ("bruteforce", n_bruteforce),
+        ("dns_tunnel", n_dns_tunnel),
+    ]
+    child_seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+
+    if parallel is None:
+        parallel = (
+            sum(n for _, n in jobs) >= PARALLEL_GENERATION_MIN_FLOWS
+            and (os.cpu_count() or 1) > 1
+        )
+
+    if parallel:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [
+                pool.submit(_run_behavior, label, n, child, with_ips)
+                for (label, n), child in zip(jobs, child_seeds)
+            ]
+            parts = [f.result() for f in futures]
+    else:
+        parts = [
+            _run_behavior(label, n, child, with_ips)
+            for (label, n), child in zip(jobs, child_seeds)
+        ]
+
+    all_flows = pd.concat(parts, ignore_index=True)
+    return all_flows
 
-    benign_df = _make_behavior_flows("benign", n_benign)
-    scan_df = _make_behavior_flows("port_scan", n_port_scan)
-    brute_df = _make_behavior_flows("bruteforce", n_bruteforce)
-    dns_df = _make_behavior_flows("dns_tunnel", n_dns_tunnel)
 
-    all_flows = pd.concat([benign_df, scan_df, brute_df, dns_df], ignore_index=True)
-    return all_flows
+def _save_features(X: pd.DataFrame, y: pd.Series, path: Path) -> None:
+    """
+    Write the feature table plus its label column to path.
+
+    In plain English:
+    - assign() adds the label to a new frame that shares X's column data,
+      instead of copying the whole feature table first.
+    - ".parquet" paths are written as zstd-compressed Parquet (columnar and
+      binary, so much faster and smaller than formatting every float as
+      text); anything else falls back to CSV.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = X.assign(label=y.to_numpy())
+    if path.suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(path, index=False)
 
 
 # ---------------------------------------------------------------------------
@@ -173,7 +262,7 @@ def run_training() -> None:
     1. Generate synthetic flow-level data for benign + attack behaviors.
     2. Build numeric features from those flows.
     3. Split into train/validation sets.
-    4. Train a RandomForest classifier.
+    4. Train a classifier (see ml.train_packetvision_model).
     5. Save the model, feature column list, and a training report.
     """
 
@@ -188,10 +277,8 @@ def run_training() -> None:
     # 2) Build numeric features.
     X = build_features(flows_no_label)
 
-    # Optionally save a copy of features to CSV for inspection.
-    X_with_label = X.copy()
-    X_with_label["label"] = y
-    X_with_label.to_csv(FEATURES_CSV_PATH, index=False)
+    # Save a copy of the features (+ label) for inspection.
+    _save_features(X, y, FEATURES_PATH)
 
     # 3) Train/validation split.
     X_train, X_val, y_train, y_val = train_test_split(
@@ -216,12 +303,14 @@ def run_training() -> None:
         "labels_distribution": y.value_counts().to_dict(),
     }
 
-    with open(REPORT_PATH, "w") as f:
-        json.dump(report, f, indent=2)
+    # orjson: fast C encoder that also accepts numpy scalars and
+    # non-string keys (e.g. integer labels in labels_distribution).
+    with open(REPORT_PATH, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
 
     print(f"[PacketVision] Training complete.")
     print(f"  Saved model to:          {MODEL_PATH}")
-    print(f"  Saved features to:       {FEATURES_CSV_PATH}")
+    print(f"  Saved features to:       {FEATURES_PATH}")
     print(f"  Saved feature columns to:{FEATURE_COLUMNS_PATH}")
     print(f"  Saved report to:         {REPORT_PATH}")
 
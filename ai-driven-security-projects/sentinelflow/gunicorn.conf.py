@@ -0,0 +1,27 @@
+"""
+Gunicorn settings for serving the SentinelFlow API with several workers.
+
+Usage (from the sentinelflow directory):
+
+    gunicorn sentinelflow.api:app -c gunicorn.conf.py
+
+preload_app loads the model once in the gunicorn master. Workers are
+fork()ed from it afterwards and share the model's memory pages
+copy-on-write (the model is read-only while serving), so each extra worker
+adds close to nothing instead of another full copy of the model.
+"""
+
+import os
+
+bind = os.environ.get("SENTINELFLOW_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("SENTINELFLOW_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def post_fork(server, worker):
+    # onnxruntime sessions are not fork-safe (their thread pool does not
+    # survive fork), so each worker reopens its own.
+    from sentinelflow import api
+
+    api.onnx_session = api._load_onnx_session()
@@ -14,13 +14,24 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 
 # Paths for data and model artifacts
 DATA_DIR = BASE_DIR / "data"
-RAW_DATA_PATH = DATA_DIR / "raw" / "sentinelflow_synthetic.csv"
+# Synthetic raw events. A ".parquet" path is written/read as zstd-compressed
+# Parquet (keeps the compact dtypes, no text parsing); any other suffix as CSV.
+RAW_DATA_PATH = DATA_DIR / "raw" / "sentinelflow_synthetic.parquet"
 PROCESSED_DIR = DATA_DIR / "processed"
 
 # Trained model and metrics
 MODEL_PATH = PROCESSED_DIR / "model.joblib"
+
+# ONNX export of the same model, used by the API through onnxruntime when
+# available (falls back to MODEL_PATH otherwise).
+ONNX_MODEL_PATH = PROCESSED_DIR / "model.onnx"
 REPORT_PATH = PROCESSED_DIR / "report.json"
 
 # NEW: where we store the exact feature column order used during training.
 # This lets the API align incoming requests to match the trained model.
 FEATURES_PATH = PROCESSED_DIR / "feature_columns.json"
+
+# Which classifier train_baseline() builds: "hist_gb" for
+# HistGradientBoostingClassifier (default) or "random_forest" for the
+# original RandomForest baseline.
+MODEL_TYPE = "hist_gb"
@@ -2,12 +2,14 @@
 Feature engineering utilities.
 
 This file is responsible for:
-- Loading raw CSV network data
+- Loading raw network data (Parquet or CSV)
 - Building numeric features the model can understand
 - Handling basic encoding for categorical fields
 """
 
-from typing import Tuple
+from typing import Any, Dict, Mapping, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
 
 # Columns that are useful as-is for numbers
@@ -16,16 +18,49 @@ NUMERIC_COLS = ["bytes_in", "bytes_out", "packet_count"]
 # Columns that are text-like and need encoding
 CATEGORICAL_COLS = ["protocol", "dst_port"]
 
+# Raw columns load_raw() keeps: everything build_features() reads.
+USED_COLS = NUMERIC_COLS + CATEGORICAL_COLS + ["label"]
+
+# dtypes for the raw CSV. Ports, byte and packet counts all fit in 32 bits,
+# and the repeated strings are stored once each as categories, which is
+# well under half the memory of pandas' default int64/object columns.
+RAW_DTYPES = {
+    "src_ip": "category",
+    "dst_ip": "category",
+    "src_port": "int32",
+    "dst_port": "int32",
+    "protocol": "category",
+    "bytes_in": "int32",
+    "bytes_out": "int32",
+    "packet_count": "int32",
+    "label": "category",
+}
+
 
 def load_raw(path: str) -> pd.DataFrame:
     """
-    Load a CSV file into a pandas DataFrame.
+    Load a Parquet or CSV file into a pandas DataFrame.
 
     In plain English:
-    - Take the path to a CSV file on disk
+    - Take the path to a data file on disk
     - Read it into memory as a table we can work with
+    - Only read the columns build_features() uses (USED_COLS); the IPs and
+      source port are skipped entirely
+    - Parquet keeps the dtypes it was written with; for CSV, use compact
+      dtypes (RAW_DTYPES) instead of letting pandas guess
     """
-    return pd.read_csv(path)
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        columns = pq.read_schema(path).names
+        return pd.read_parquet(
+            path, engine="pyarrow", columns=[col for col in columns if col in USED_COLS]
+        )
+
+    columns = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in columns if col in USED_COLS]
+    dtypes = {col: RAW_DTYPES[col] for col in usecols if col in RAW_DTYPES}
+    return pd.read_csv(path, usecols=usecols, dtype=dtypes)
 
 
 def build_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
@@ -42,25 +77,101 @@ def build_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
        - X: table of numbers for the model
        - y: the labels (normal / scan / dos), if present
     """
-    df = df.copy()
-
-    # Simple defensive programming: if label doesn't exist, create a dummy one
-    if "label" not in df.columns:
-        df["label"] = "unknown"
-
-    # New numeric feature comparing in vs out traffic.
-    df["byte_ratio"] = (df["bytes_in"] + 1) / (df["bytes_out"] + 1)
-
-    # Select columns we care about for the model.
-    feature_cols = NUMERIC_COLS + ["byte_ratio"] + CATEGORICAL_COLS
-    features = df[feature_cols].copy()
+    # New numeric feature comparing in vs out traffic. Computed on the raw
+    # arrays with NumPy ufuncs, reusing one output buffer for the
+    # denominator and the result instead of allocating a Series per step.
+    # (float64 also keeps the +1 from overflowing the int32 columns.)
+    byte_ratio = np.add(df["bytes_out"].to_numpy(), 1, dtype=np.float64)
+    np.divide(np.add(df["bytes_in"].to_numpy(), 1, dtype=np.float64), byte_ratio, out=byte_ratio)
+
+    # Select columns we care about for the model. Selecting already gives
+    # a new frame, so the caller's df is never copied or modified.
+    features = df[NUMERIC_COLS + CATEGORICAL_COLS]
+    features.insert(len(NUMERIC_COLS), "byte_ratio", byte_ratio)
 
     # One-hot encode protocol and dst_port so the model gets 0/1 columns
     # instead of raw strings or integers treated like continuous values.
     features = pd.get_dummies(features, columns=CATEGORICAL_COLS, drop_first=True)
 
-    # Target labels (normal / scan / dos)
-    y = df["label"]
+    # Target labels (normal / scan / dos). Simple defensive programming:
+    # if label doesn't exist, use a dummy one.
+    if "label" in df.columns:
+        y = df["label"]
+    else:
+        y = pd.Series("unknown", index=df.index, name="label")
 
     return features, y
 
+
+def build_feature_vector(
+    sample: Mapping[str, Any], col_index: Dict[str, int]
+) -> np.ndarray:
+    """
+    Single-event version of build_features() used by the API.
+
+    In plain English:
+    - Takes one raw event as a dict instead of a DataFrame.
+    - Returns a (1, n_features) float32 row laid out using col_index, which
+      maps each training-time column name to its position.
+    - Produces exactly the same numbers build_features() would, just without
+      the pandas overhead that dominates a one-row request.
+    - Fills the one row directly; for a single sample that beats the
+      column-at-a-time NumPy assignments in build_feature_matrix().
+    """
+    x = np.zeros((1, len(col_index)), dtype=np.float32)
+    row = x[0]
+
+    for col in NUMERIC_COLS:
+        i = col_index.get(col)
+        if i is not None:
+            row[i] = sample[col]
+
+    i = col_index.get("byte_ratio")
+    if i is not None:
+        row[i] = (sample["bytes_in"] + 1) / (sample["bytes_out"] + 1)
+
+    for col in CATEGORICAL_COLS:
+        i = col_index.get(f"{col}_{sample[col]}")
+        if i is not None:
+            row[i] = 1.0
+
+    return x
+
+
+def build_feature_matrix(
+    samples: Sequence[Mapping[str, Any]], col_index: Dict[str, int]
+) -> np.ndarray:
+    """
+    Turn a list of raw events (dicts) into an (n_samples, n_features)
+    float32 matrix aligned to the training-time columns.
+
+    One-hot columns that were dropped at training time (drop_first=True) or
+    values never seen in training simply have no slot in col_index, so they
+    stay at 0 like they would after aligning a DataFrame.
+    """
+    X = np.zeros((len(samples), len(col_index)), dtype=np.float32)
+
+    # Filled a column at a time: one list comprehension over the samples
+    # per column, assigned into X in a single NumPy call.
+    for col in NUMERIC_COLS:
+        i = col_index.get(col)
+        if i is not None:
+            X[:, i] = [sample[col] for sample in samples]
+
+    i = col_index.get("byte_ratio")
+    if i is not None:
+        X[:, i] = [
+            (sample["bytes_in"] + 1) / (sample["bytes_out"] + 1) for sample in samples
+        ]
+
+    rows = np.arange(len(samples))
+    for col in CATEGORICAL_COLS:
+        cols = np.fromiter(
+            (col_index.get(f"{col}_{sample[col]}", -1) for sample in samples),
+            dtype=np.intp,
+            count=len(samples),
+        )
+        seen = cols >= 0
+        X[rows[seen], cols[seen]] = 1.0
+
+    return X
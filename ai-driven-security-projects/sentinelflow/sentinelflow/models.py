@@ -3,33 +3,56 @@ Model training logic.
 
 This file focuses on:
 - Splitting data into train/test sets
-- Training a baseline RandomForest classifier
+- Training a baseline classifier (gradient-boosted trees or RandomForest)
 - Producing a simple classification report
 """
 
-from typing import Tuple, Dict, Any
+from pathlib import Path
+from typing import Tuple, Dict, Any, Union
+import os
 
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.metrics import classification_report
 from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+import numpy as np
 import pandas as pd
 
+from .config import MODEL_TYPE
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; fall back to the logical count
+    psutil = None
+
+# Physical core count. Tree models don't benefit from SMT siblings - they
+# just compete for the same caches - so we size thread pools to real cores.
+N_PHYS = (psutil.cpu_count(logical=False) if psutil else None) or os.cpu_count() or 1
+
 
 def train_baseline(
-    X: pd.DataFrame, y: pd.Series
-) -> Tuple[RandomForestClassifier, Dict[str, Any]]:
+    X: pd.DataFrame, y: pd.Series, model_type: str = MODEL_TYPE
+) -> Tuple[Union[HistGradientBoostingClassifier, RandomForestClassifier], Dict[str, Any]]:
     """
-    Train a RandomForest baseline model.
+    Train a baseline model.
 
     In plain English:
     - Split the data into training and testing chunks
-    - Train a forest of decision trees (RandomForest) on the training part
+    - Train a set of decision trees on the training part
     - Evaluate it on the testing part and collect metrics
 
-    RandomForest is a strong default for tabular security data:
+    The default is HistGradientBoosting: it buckets each feature into small
+    integer bins once and grows a handful of shallow trees on those bins.
+    On a table this size it trains much faster than a 200-tree forest and
+    the saved model is far smaller. Pass model_type="random_forest" (or
+    change MODEL_TYPE in config) to get the original RandomForest:
     - Handles mixed numeric/categorical features
     - Reasonably robust and interpretable
     """
+    # Everything downstream (split copies, tree building) moves half the
+    # bytes with float32, and both model types accept it as-is.
+    X = X.astype(np.float32)
+
     X_train, X_test, y_train, y_test = train_test_split(
         X,
         y,
@@ -38,18 +61,77 @@ def train_baseline(
         random_state=42,        # fixed seed for reproducible results
     )
 
-    model = RandomForestClassifier(
-        n_estimators=200,        # number of trees in the forest
-        max_depth=None,         # let trees grow until needed
-        n_jobs=-1,              # use all CPU cores for speed
-        random_state=42,
-    )
+    if model_type == "hist_gb":
+        model = HistGradientBoostingClassifier(
+            max_iter=200,           # upper bound on boosting rounds
+            max_depth=8,            # keep each tree small
+            learning_rate=0.1,
+            early_stopping=True,    # stop once validation score stalls
+            random_state=42,
+        )
+    elif model_type == "random_forest":
+        model = RandomForestClassifier(
+            n_estimators=200,        # number of trees in the forest
+            max_depth=20,           # cap tree size (unbounded trees balloon the model)
+            min_samples_leaf=2,     # no single-sample leaves
+            # Each tree draws 0.63*n rows with replacement: ~47% distinct
+            # rows, vs ~63% for a full-size bootstrap, so smaller trees.
+            max_samples=0.63,
+            # One worker per physical core. Forest fit already builds its
+            # trees on joblib threads (prefer="threads"), so X is shared, not
+            # copied per worker, and no parallel_backend wrapper is needed.
+            n_jobs=N_PHYS,
+            random_state=42,
+        )
+    else:
+        raise ValueError(f"Unknown model_type: {model_type!r}")
 
-    model.fit(X_train, y_train)
+    # Cap the BLAS/OpenMP pools (HistGB's tree building runs on OpenMP) to
+    # physical cores too. Environment variables like OMP_NUM_THREADS would
+    # be too late here: pipeline.py imports numpy/pandas (via .features)
+    # before this module.
+    with threadpool_limits(limits=N_PHYS):
+        model.fit(X_train, y_train)
 
-    # Get a dictionary of precision/recall/F1 scores, etc.
-    y_pred = model.predict(X_test)
+        # Get a dictionary of precision/recall/F1 scores, etc.
+        y_pred = model.predict(X_test)
     report = classification_report(y_test, y_pred, output_dict=True)
 
     return model, report
 
+
+def export_onnx(model: Any, n_features: int, path: Path) -> bool:
+    """
+    Save an ONNX copy of a trained model for fast inference.
+
+    In plain English:
+    - onnxruntime evaluates every tree in a single fused, vectorized op,
+      instead of scikit-learn looping over trees in Python.
+    - The API uses this file when it exists.
+    - Returns False if skl2onnx isn't installed or can't convert this
+      model type, and removes any older export so the API can't serve a
+      stale one; the API then uses the joblib model.
+    """
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        path.unlink(missing_ok=True)
+        return False
+
+    try:
+        onx = convert_sklearn(
+            model,
+            initial_types=[("X", FloatTensorType([None, n_features]))],
+            # zipmap=False gives a plain (n_samples, n_classes) probability array
+            options={id(model): {"zipmap": False}},
+        )
+    except Exception as exc:  # converter support lags scikit-learn releases
+        print(f"[SentinelFlow] ONNX export skipped: {type(exc).__name__}")
+        path.unlink(missing_ok=True)
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(onx.SerializeToString())
+    return True
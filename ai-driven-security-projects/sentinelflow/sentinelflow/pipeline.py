@@ -4,7 +4,7 @@ Training pipeline for SentinelFlow.
 This script:
 1. Generates a synthetic dataset that looks like network traffic.
 2. Builds ML features from that data.
-3. Trains a baseline RandomForest model.
+3. Trains a baseline classifier (HistGradientBoosting by default).
 4. Saves the model, metrics, and feature column order to disk.
 
 Run with:
@@ -18,22 +18,28 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 import joblib
+import orjson
 
 from .config import (
     RAW_DATA_PATH,
     MODEL_PATH,
+    ONNX_MODEL_PATH,
     REPORT_PATH,
     DATA_DIR,
     PROCESSED_DIR,
     FEATURES_PATH,
 )
 from .features import build_features, load_raw
-from .models import train_baseline
+from .models import export_onnx, train_baseline
 
 
 def generate_synthetic_data(path: Path, n_samples: int = 5000) -> None:
     """
     Create a synthetic dataset that looks like network flow data.
+
+    The numeric columns stay plain NumPy arrays while the scan / DoS rows are
+    injected (direct index writes, no pandas .loc alignment), and the
+    DataFrame is built once at the end.
     """
 
     rng = np.random.default_rng(seed=42)
@@ -41,32 +47,56 @@ def generate_synthetic_data(path: Path, n_samples: int = 5000) -> None:
     src_ips = [f"10.0.0.{i}" for i in range(1, 21)]
     dst_ips = [f"192.168.1.{i}" for i in range(1, 21)]
 
+    # Text columns are drawn as indexes into their value lists (the same
+    # random draws as choosing the strings) and stored as categoricals, so
+    # pandas never has to convert millions of individual strings.
+    src_ip = pd.Categorical.from_codes(rng.choice(len(src_ips), n_samples), src_ips)
+    dst_ip = pd.Categorical.from_codes(rng.choice(len(dst_ips), n_samples), dst_ips)
+    # 32-bit ints: every value fits, at half the size of int64
+    src_port = rng.integers(1024, 65535, n_samples).astype(np.int32)
+    dst_port = rng.choice([22, 80, 443, 3389, 8080, 53], n_samples).astype(np.int32)
+    protocol = pd.Categorical.from_codes(rng.choice(2, n_samples), ["TCP", "UDP"])
+    bytes_in = rng.exponential(8000, n_samples).astype(np.int32)
+    bytes_out = rng.exponential(8000, n_samples).astype(np.int32)
+    packet_count = rng.poisson(15, n_samples).astype(np.int32)
+
+    # Labels as small integer codes into LABELS, turned into a categorical
+    # column at the end as well. LABELS is sorted, the category order
+    # load_raw() gets when it parses the labels back from CSV.
+    LABELS = ["dos", "normal", "scan"]
+    label = np.full(n_samples, LABELS.index("normal"), dtype=np.int8)
+
+    scan_idx = rng.choice(n_samples, size=int(0.06 * n_samples), replace=False)
+    packet_count[scan_idx] *= 5
+    label[scan_idx] = LABELS.index("scan")
+
+    # Rows not already used for scans, in ascending order.
+    not_scan = np.ones(n_samples, dtype=bool)
+    not_scan[scan_idx] = False
+    remaining_idx = np.flatnonzero(not_scan)
+    dos_idx = rng.choice(remaining_idx, size=int(0.04 * n_samples), replace=False)
+    bytes_in[dos_idx] *= 10
+    label[dos_idx] = LABELS.index("dos")
+
     df = pd.DataFrame(
         {
-            "src_ip": rng.choice(src_ips, n_samples),
-            "dst_ip": rng.choice(dst_ips, n_samples),
-            "src_port": rng.integers(1024, 65535, n_samples),
-            "dst_port": rng.choice([22, 80, 443, 3389, 8080, 53], n_samples),
-            "protocol": rng.choice(["TCP", "UDP"], n_samples),
-            "bytes_in": rng.exponential(8000, n_samples).astype(int),
-            "bytes_out": rng.exponential(8000, n_samples).astype(int),
-            "packet_count": rng.poisson(15, n_samples),
+            "src_ip": src_ip,
+            "dst_ip": dst_ip,
+            "src_port": src_port,
+            "dst_port": dst_port,
+            "protocol": protocol,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "packet_count": packet_count,
+            "label": pd.Categorical.from_codes(label, LABELS),
         }
     )
 
-    df["label"] = "normal"
-
-    scan_idx = rng.choice(df.index, size=int(0.06 * n_samples), replace=False)
-    df.loc[scan_idx, "packet_count"] *= 5
-    df.loc[scan_idx, "label"] = "scan"
-
-    remaining_idx = df.index.difference(scan_idx)
-    dos_idx = rng.choice(remaining_idx, size=int(0.04 * n_samples), replace=False)
-    df.loc[dos_idx, "bytes_in"] *= 10
-    df.loc[dos_idx, "label"] = "dos"
-
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(path, index=False)
 
 
 def run_training(raw_path: Optional[Path] = None) -> None:
@@ -87,10 +117,15 @@ def run_training(raw_path: Optional[Path] = None) -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-    joblib.dump(model, MODEL_PATH)
+    # Uncompressed on purpose: the API loads this with mmap_mode="r".
+    joblib.dump(model, MODEL_PATH, compress=0)
+
+    # Optional ONNX copy for onnxruntime inference in the API.
+    export_onnx(model, X.shape[1], ONNX_MODEL_PATH)
 
-    with open(REPORT_PATH, "w") as f:
-        json.dump(report, f, indent=2)
+    # orjson: fast C encoder, and numpy scalars in the report are fine as-is.
+    with open(REPORT_PATH, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
 
     # NEW — SAVE FEATURE COLUMNS
     with open(FEATURES_PATH, "w") as f:
@@ -0,0 +1,49 @@
+"""
+Gunicorn settings for serving the ZeroTrace API with several workers.
+
+Usage (from the zerotrace directory):
+
+    gunicorn zerotrace.api:app -c gunicorn.conf.py
+
+In plain English:
+- Each uvicorn worker is its own process, so several /predict requests
+  are scored at once instead of queueing behind one process.
+- preload_app imports zerotrace.api once, in the gunicorn master, with
+  ZEROTRACE_EAGER_LOAD=1, so the model is loaded and warmed up there
+  (pipeline.warmup()) before any worker exists.
+- The workers are fork()ed from the master and share those pages
+  copy-on-write. The joblib model is memory-mapped and read-only while
+  serving, so extra workers add almost nothing on top of it.
+- Default: one worker per CPU. Scoring is CPU-bound, so more workers than
+  cores only adds context switching.
+"""
+
+import os
+
+# Set before the app (and NumPy / onnxruntime) is imported by preload_app.
+os.environ.setdefault("ZEROTRACE_EAGER_LOAD", "1")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+bind = os.environ.get("ZEROTRACE_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("ZEROTRACE_WORKERS", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own onnxruntime session.
+
+    onnxruntime's thread pool does not survive fork(), so a session created
+    in the master (by warmup()) cannot be used safely by the children. The
+    micro-batcher is per worker already (started by the app's lifespan,
+    which runs in each worker).
+    """
+    from zerotrace import pipeline
+
+    if pipeline._ONNX_SESSION is not None:
+        pipeline._ONNX_SESSION = None
+        pipeline._ONNX_CHECKED = False
+        pipeline.load_onnx_session()
@@ -11,21 +11,131 @@ what features the model expects.
 
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Dict, Optional
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
-from .pipeline import predict_sample
-from .config import FEATURE_COLUMNS, MODEL_CLASSES
+from .pipeline import predict_sample, predict_samples, warmup
+from .config import (
+    EAGER_LOAD,
+    FEATURE_COLUMNS,
+    MODEL_CLASSES,
+    PREDICT_MAX_BATCH_SIZE,
+    PREDICT_MAX_WAIT_MS,
+)
 
 
+class _MicroBatcher:
+    """
+    Collects concurrent /predict samples and scores them in one model call.
+
+    In plain English:
+    - Each request puts its sample on a queue and waits.
+    - A background task takes the first sample, then keeps taking samples
+      until it has max_batch_size of them or max_wait_ms has passed.
+    - It scores them all with predict_samples() (in a worker thread) and
+      hands each request back its own result.
+
+    The model has a large fixed cost per call compared to the cost per
+    extra row, so under load this turns N model calls into one per batch;
+    a lone request waits at most max_wait_ms extra.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def predict(self, sample: Dict[str, Any]) -> Dict[str, Any]:
+        """predict_sample()'s result for one sample."""
+        if self._task is None:
+            # Not started (app used without its lifespan): score directly.
+            return await run_in_threadpool(predict_sample, sample)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((sample, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await run_in_threadpool(
+                    predict_samples, [sample for sample, _ in batch]
+                )
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                # A client may have disconnected and cancelled its future.
+                if not future.done():
+                    future.set_result(result)
+
+
+_BATCHER = _MicroBatcher(PREDICT_MAX_BATCH_SIZE, PREDICT_MAX_WAIT_MS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _BATCHER.start()
+    yield
+    await _BATCHER.stop()
+
+
+# Serialize responses with orjson (C) rather than the stdlib json encoder.
 app = FastAPI(
     title="ZeroTrace API",
     version="0.1.0",
     description="AI-powered in-memory process classifier for anomaly and malware detection.",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Optionally load the model now rather than on the first /predict call.
+# Under a preforking server (gunicorn --preload) this runs once in the
+# master, and the memory-mapped model pages are shared by every worker.
+if EAGER_LOAD:
+    warmup()
+
 
 class ProcessSample(BaseModel):
     """
@@ -68,8 +178,10 @@ async def predict_endpoint(sample: ProcessSample) -> Dict:
     Take one process snapshot and return the ZeroTrace model's verdict.
 
     The incoming JSON body maps directly to the ProcessSample fields.
+    Concurrent requests are scored together (see _MicroBatcher), off the
+    event loop.
     """
-    result = predict_sample(sample.dict())
+    result = await _BATCHER.predict(sample.dict())
     return {
         "input": sample.dict(),
         "model_classes": MODEL_CLASSES,
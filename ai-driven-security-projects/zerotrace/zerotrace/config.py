@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Root directory = labs/zerotrace/
@@ -10,11 +11,22 @@ PROCESSED_DIR = DATA_DIR / "processed"
 
 # Files we write/read
 SNAPSHOT_PATH = RAW_DIR / "memory_snapshots.csv"
-FEATURES_PATH = PROCESSED_DIR / "features.csv"   # new
+# Parquet copy of the snapshot (synthetic.save_snapshot_parquet); the feature
+# pipeline reads this instead of the CSV when it is at least as new.
+SNAPSHOT_PARQUET_PATH = RAW_DIR / "memory_snapshots.parquet"
+# Feature matrix (+ label). A ".parquet" path is written as zstd-compressed
+# Parquet, which keeps the column dtypes; any other suffix as plain CSV.
+FEATURES_PATH = PROCESSED_DIR / "features.parquet"
 FEATURES_CSV_PATH = FEATURES_PATH                # <- add this alias
 MODEL_PATH = ROOT / "model.joblib"
+# ONNX export of the same model; pipeline.predict_sample() scores with it
+# through onnxruntime when both exist, and falls back to MODEL_PATH otherwise.
+ONNX_MODEL_PATH = ROOT / "model.onnx"
 FEATURE_COLUMNS_PATH = ROOT / "feature_columns.json"
 REPORT_PATH = ROOT / "report.json"
+# Validation metrics keyed by a hash of (data, model settings), so re-running
+# training on unchanged inputs skips re-evaluating the model
+REPORT_CACHE_DIR = PROCESSED_DIR / "report_cache"
 
 
 # Feature columns the model will use
@@ -40,5 +52,32 @@ MODEL_CLASSES = [
     "injected_loader",
 ]
 
+# Which classifier ml.train_model() builds:
+#   "hist_gb"       -> HistGradientBoostingClassifier (default; bins each
+#                      feature once, much faster to train and score)
+#   "random_forest" -> the original 200-tree RandomForestClassifier
+MODEL_TYPE = "hist_gb"
+
+# How many distinct feature rows pipeline.predict_sample() / predict_samples()
+# keep results for (least recently used are dropped first)
+PREDICTION_CACHE_SIZE = 8192
+
+# Batches of up to this many rows are scored by walking the model's trees as
+# flat NumPy arrays (pipeline.flatten_trees), which has almost no fixed cost
+# per call; larger batches go to the model's own predict_proba, which is
+# faster per row.
+FLAT_TREES_MAX_ROWS = 32
+
+# /predict micro-batching: concurrent requests are scored in one model call
+# of up to PREDICT_MAX_BATCH_SIZE rows, waiting at most PREDICT_MAX_WAIT_MS
+# for a batch to fill.
+PREDICT_MAX_BATCH_SIZE = 64
+PREDICT_MAX_WAIT_MS = 5
+
 NUM_PROCESSES = 800
 SEED = 1337
+
+# Load and warm up the model when the API module is imported, instead of on
+# the first /predict request (set ZEROTRACE_EAGER_LOAD=1). Off by default so
+# importing the API without a trained model still works.
+EAGER_LOAD = os.environ.get("ZEROTRACE_EAGER_LOAD") == "1"
@@ -5,7 +5,7 @@ This script:
 - Loads the synthetic process snapshot (raw memory/process info)
 - Extracts numeric features the ML model will train on
 - Normalizes the `label` column to integers (0..N-1) based on MODEL_CLASSES
-- Saves the final feature matrix to CSV
+- Saves the final feature matrix to Parquet (or CSV, by file suffix)
 """
 
 import pandas as pd
@@ -13,6 +13,7 @@ from pathlib import Path
 
 from .config import (
     SNAPSHOT_PATH,
+    SNAPSHOT_PARQUET_PATH,
     FEATURES_PATH,
     FEATURE_COLUMNS,
     MODEL_CLASSES,
@@ -22,15 +23,59 @@ from .config import (
 # 1. Load raw snapshot (memory/process info)
 # -------------------------------------------------------
 
+# dtypes for the snapshot columns we use. PIDs and counts fit in 32 bits,
+# the measurements in float32, and the 0/1 connection flag is a bool, so
+# pandas doesn't have to infer anything and no column ends up int64/object.
+SNAPSHOT_DTYPES = {
+    "pid": "int32",
+    "ppid": "int32",
+    "num_modules": "int32",
+    "num_unsigned_modules": "int32",
+    "num_rwx_regions": "int32",
+    "avg_entropy": "float32",
+    "has_network_connection": "bool",
+    "num_connections": "int32",
+    "listening_ports": "int32",
+    "high_entropy_strings": "int32",
+    "cpu_usage": "float32",
+    "memory_usage_mb": "float32",
+    "label": "str",
+}
+
 def load_snapshot() -> pd.DataFrame:
     """
     Load the synthetic snapshot CSV produced by zerotrace.synthetic.
     Ensures the 'label' column exists.
+
+    Only FEATURE_COLUMNS and 'label' are parsed (the name/path/user text
+    columns are never used), with the dtypes from SNAPSHOT_DTYPES.
+
+    If the Parquet copy (synthetic.save_snapshot_parquet) exists and is at
+    least as new as the CSV, only those columns are read from it instead:
+    no text parsing at all.
     """
-    if not Path(SNAPSHOT_PATH).exists():
-        raise FileNotFoundError(f"Snapshot file not found at: {SNAPSHOT_PATH}")
+    wanted = set(FEATURE_COLUMNS) | {"label"}
+    parquet_path = Path(SNAPSHOT_PARQUET_PATH)
+    csv_path = Path(SNAPSHOT_PATH)
+
+    if parquet_path.exists() and (
+        not csv_path.exists()
+        or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+    ):
+        import pyarrow.parquet as pq
+
+        header = pq.read_schema(parquet_path).names
+        usecols = [col for col in header if col in wanted]
+        dtypes = {col: SNAPSHOT_DTYPES[col] for col in usecols if col in SNAPSHOT_DTYPES}
+        df = pd.read_parquet(parquet_path, columns=usecols).astype(dtypes)
+    else:
+        if not csv_path.exists():
+            raise FileNotFoundError(f"Snapshot file not found at: {SNAPSHOT_PATH}")
 
-    df = pd.read_csv(SNAPSHOT_PATH)
+        header = pd.read_csv(csv_path, nrows=0).columns
+        usecols = [col for col in header if col in wanted]
+        dtypes = {col: SNAPSHOT_DTYPES[col] for col in usecols if col in SNAPSHOT_DTYPES}
+        df = pd.read_csv(csv_path, usecols=usecols, dtype=dtypes)
 
     if "label" not in df.columns:
         raise ValueError(
@@ -66,21 +111,26 @@ def extract_features(df: pd.DataFrame) -> pd.DataFrame:
     raw_labels = df["label"]
 
     # If labels are strings like "benign", map them to integers via MODEL_CLASSES
-    if raw_labels.dtype == object:
-        family_to_label = {name: idx for idx, name in enumerate(MODEL_CLASSES)}
-        labels = raw_labels.map(family_to_label)
-
-        if labels.isna().any():
-            bad_values = raw_labels[labels.isna()].unique()
+    # (checked as "not numeric": text columns are object or str dtype
+    # depending on the pandas version)
+    if not pd.api.types.is_numeric_dtype(raw_labels):
+        # Categorical codes are each label's position in MODEL_CLASSES,
+        # computed in one vectorized pass (-1 for anything not in the list).
+        codes = pd.Categorical(raw_labels, categories=MODEL_CLASSES).codes
+
+        unknown = codes == -1
+        if unknown.any():
+            bad_values = raw_labels[unknown].unique()
             raise ValueError(
                 f"Found unknown label values {bad_values}. "
-                f"Expected one of: {list(family_to_label.keys())}"
+                f"Expected one of: {MODEL_CLASSES}"
             )
+        labels = codes.astype("int8", copy=False)
     else:
         # Already numeric – just ensure they're integers
-        labels = raw_labels.astype(int)
+        labels = raw_labels.astype(int).values
 
-    features_df["label"] = labels.values
+    features_df["label"] = labels
 
     return features_df
 
@@ -92,13 +142,21 @@ def extract_features(df: pd.DataFrame) -> pd.DataFrame:
 def save_features(df: pd.DataFrame, path: str = FEATURES_PATH) -> str:
     """
     Save the feature matrix (plus label) to disk.
+
+    ".parquet" paths (the default FEATURES_PATH) are written as
+    zstd-compressed Parquet: binary and columnar, so nothing is turned into
+    text and parsed back, and the compact dtypes survive the round trip.
+    Any other suffix is written as CSV, e.g. for inspecting by hand.
     """
     out_path = Path(path)
 
     # Ensure parent directory exists
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    df.to_csv(out_path, index=False)
+    if out_path.suffix == ".parquet":
+        df.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df.to_csv(out_path, index=False)
     return str(out_path)
 
 
@@ -10,19 +10,35 @@ In plain English:
 
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
 
-from .config import MODEL_PATH, FEATURE_COLUMNS, MODEL_CLASSES
+from .config import (
+    MODEL_PATH,
+    ONNX_MODEL_PATH,
+    FEATURE_COLUMNS,
+    MODEL_CLASSES,
+    PREDICTION_CACHE_SIZE,
+    FLAT_TREES_MAX_ROWS,
+)
 
 
 # Global caches so we only load once
 _MODEL = None
+_ONNX_SESSION = None
+_ONNX_CHECKED = False
+_FLAT_TREES = None
+_FLAT_CHECKED = False
 _FEATURE_ORDER = FEATURE_COLUMNS  # Same order we used when training.
+_COL_INDEX = {col: i for i, col in enumerate(_FEATURE_ORDER)}
+_N_FEATS = len(_FEATURE_ORDER)
 
 
 def load_model() -> Any:
@@ -31,7 +47,9 @@ def load_model() -> Any:
 
     In plain English:
     - If we've already loaded the model, reuse it.
-    - Otherwise, read model.joblib from disk.
+    - Otherwise, read model.joblib from disk. mmap_mode="r" maps the
+      model's arrays from the file instead of copying them, so several API
+      workers share one copy through the OS page cache.
     """
     global _MODEL
 
@@ -42,36 +60,270 @@ def load_model() -> Any:
     if not model_path.exists():
         raise FileNotFoundError(f"Model file not found at: {model_path}")
 
-    _MODEL = joblib.load(model_path)
+    _MODEL = joblib.load(model_path, mmap_mode="r")
+
+    # One process snapshot per call: a RandomForest's joblib thread pool
+    # (n_jobs=-1 at training time) costs more than the trees themselves.
+    if hasattr(_MODEL, "n_jobs"):
+        _MODEL.n_jobs = 1
     return _MODEL
 
 
+def load_onnx_session() -> Any:
+    """
+    Open the ONNX export of the model (once), if there is one.
+
+    In plain English:
+    - Returns None when onnxruntime isn't installed or training didn't
+      write model.onnx; predictions then use the joblib model instead.
+    - One intra-op thread: a request is one process (a handful at most),
+      where a thread pool per call costs more than it saves.
+    """
+    global _ONNX_SESSION, _ONNX_CHECKED
+
+    if _ONNX_CHECKED:
+        return _ONNX_SESSION
+    _ONNX_CHECKED = True
+
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    if not Path(ONNX_MODEL_PATH).exists():
+        return None
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = 1
+    _ONNX_SESSION = ort.InferenceSession(
+        str(ONNX_MODEL_PATH), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+    return _ONNX_SESSION
+
+
+def flatten_trees(model: Any) -> Optional[SimpleNamespace]:
+    """
+    Pack a trained tree model into flat node arrays for _predict_proba_flat().
+
+    In plain English:
+    - scikit-learn's predict_proba has a large fixed cost per call (input
+      validation, thread setup, one dispatch per tree) that dwarfs the
+      actual tree walking for the one process a request brings.
+    - Here every tree's nodes are laid end to end in shared arrays, so a
+      batch walks *all* trees one level per step with a handful of
+      whole-array NumPy operations.
+    - Leaves point back at themselves, so rows that reach a leaf early
+      simply stay there for the remaining steps.
+    - Handles HistGradientBoosting (the default model) and RandomForest.
+      Returns None for anything else, or for trees with categorical splits;
+      callers then use model.predict_proba().
+    """
+    predictors = getattr(model, "_predictors", None)
+    if predictors is not None:
+        # HistGradientBoosting: one tree per class per iteration; leaves
+        # hold raw scores that are summed and turned into probabilities.
+        trees = [p.nodes for iteration in predictors for p in iteration]
+        if any(nodes["is_categorical"].any() for nodes in trees):
+            return None
+        feature = [nodes["feature_idx"] for nodes in trees]
+        threshold = [nodes["num_threshold"] for nodes in trees]
+        children = [(nodes["left"], nodes["right"]) for nodes in trees]
+        is_leaf = [nodes["is_leaf"].astype(bool) for nodes in trees]
+        value = [nodes["value"] for nodes in trees]
+        depth = max(int(nodes["depth"].max()) for nodes in trees)
+        extra = {
+            "dtype": np.float64,
+            "baseline": model._baseline_prediction,
+            "trees_per_iteration": model.n_trees_per_iteration_,
+            "loss": model._loss,
+        }
+    elif hasattr(model, "estimators_"):
+        # RandomForest: leaves hold class counts; probabilities are the
+        # per-leaf class fractions averaged over trees.
+        trees = [est.tree_ for est in model.estimators_]
+        feature = [t.feature for t in trees]
+        threshold = [t.threshold for t in trees]
+        children = [(t.children_left, t.children_right) for t in trees]
+        is_leaf = [t.children_left < 0 for t in trees]
+        value = []
+        for t in trees:
+            v = t.value[:, 0, :]
+            value.append(v / v.sum(axis=1, keepdims=True))
+        depth = max(t.max_depth for t in trees)
+        extra = {"dtype": np.float32, "loss": None}
+    else:
+        return None
+
+    offsets = np.cumsum([0] + [len(f) for f in feature])
+    flat_left, flat_right, flat_feature = [], [], []
+    for f, (left, right), leaf, off in zip(feature, children, is_leaf, offsets):
+        node_ids = np.arange(len(f)) + off
+        flat_feature.append(np.where(leaf, 0, f))
+        flat_left.append(np.where(leaf, node_ids, left + off))
+        flat_right.append(np.where(leaf, node_ids, right + off))
+
+    return SimpleNamespace(
+        roots=offsets[:-1],
+        depth=depth,
+        feature=np.concatenate(flat_feature).astype(np.intp),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(flat_left).astype(np.intp),
+        right=np.concatenate(flat_right).astype(np.intp),
+        value=np.concatenate(value),
+        **extra,
+    )
+
+
+def _predict_proba_flat(flat: SimpleNamespace, X: np.ndarray) -> np.ndarray:
+    """Same as model.predict_proba(X), computed from flatten_trees()'s arrays."""
+    # Same input precision as scikit-learn: float64 for HistGradientBoosting,
+    # float32 for RandomForest. X never contains NaN (_fill_feature_row).
+    X = X.astype(flat.dtype, copy=False)
+    rows = np.arange(len(X))[:, None]
+    nodes = np.repeat(flat.roots[None, :], len(X), axis=0)
+    for _ in range(flat.depth):
+        go_left = X[rows, flat.feature[nodes]] <= flat.threshold[nodes]
+        nodes = np.where(go_left, flat.left[nodes], flat.right[nodes])
+    leaves = flat.value[nodes]
+
+    if flat.loss is None:
+        return leaves.mean(axis=1)
+    raw = flat.baseline + leaves.reshape(len(X), -1, flat.trees_per_iteration).sum(axis=1)
+    return flat.loss.predict_proba(raw)
+
+
+def load_flat_trees() -> Optional[SimpleNamespace]:
+    """flatten_trees() of the loaded model, built once and cached."""
+    global _FLAT_TREES, _FLAT_CHECKED
+
+    if not _FLAT_CHECKED:
+        _FLAT_TREES = flatten_trees(load_model())
+        _FLAT_CHECKED = True
+    return _FLAT_TREES
+
+
+def _predict_proba(X: np.ndarray) -> np.ndarray:
+    """
+    Class probabilities for a feature array, columns in MODEL_CLASSES order.
+
+    Uses onnxruntime when the ONNX model is available (float32 input, what
+    the model was trained on). Otherwise, for up to FLAT_TREES_MAX_ROWS rows,
+    the joblib model's trees are walked as flat NumPy arrays
+    (flatten_trees); bigger batches, and model types that can't be
+    flattened, use the model's own predict_proba().
+    """
+    session = load_onnx_session()
+    if session is not None:
+        _, proba = session.run(None, {"X": X.astype(np.float32)})
+        return proba
+    if len(X) <= FLAT_TREES_MAX_ROWS:
+        flat = load_flat_trees()
+        if flat is not None:
+            return _predict_proba_flat(flat, X)
+    return load_model().predict_proba(X)
+
+
+# Feature row (raw float64 bytes) -> class probabilities, in LRU order.
+# predict_sample() / predict_samples() may run in several threads at once
+# (API thread pool), so every access holds the lock.
+_PREDICTION_CACHE: "OrderedDict[bytes, Tuple[float, ...]]" = OrderedDict()
+_PREDICTION_CACHE_LOCK = threading.Lock()
+
+
+def _predict_proba_cached(X: np.ndarray) -> List[Tuple[float, ...]]:
+    """
+    Class probabilities for each float64 row of X, reusing cached results.
+
+    In plain English:
+    - The key is the row itself, so only exactly equal feature vectors
+      share a result; hashing the 12 floats costs far less than scoring.
+    - Rows not in the cache are scored together in one model call and
+      then added; the least recently used rows are dropped beyond
+      PREDICTION_CACHE_SIZE.
+    - The model is loaded once per process, so cached results stay valid
+      for the process's lifetime (restart the API after retraining, as
+      before). Results are tuples, so callers can't modify them.
+    """
+    keys = [row.tobytes() for row in X]
+    results: List[Any] = [None] * len(keys)
+
+    with _PREDICTION_CACHE_LOCK:
+        for i, key in enumerate(keys):
+            cached = _PREDICTION_CACHE.get(key)
+            if cached is not None:
+                _PREDICTION_CACHE.move_to_end(key)
+                results[i] = cached
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        proba = _predict_proba(X[missing]).tolist()
+        with _PREDICTION_CACHE_LOCK:
+            for i, row in zip(missing, proba):
+                results[i] = _PREDICTION_CACHE[keys[i]] = tuple(row)
+            while len(_PREDICTION_CACHE) > PREDICTION_CACHE_SIZE:
+                _PREDICTION_CACHE.popitem(last=False)
+
+    return results
+
+
+def warmup() -> None:
+    """
+    Load the model and score one all-zero row, so the first real request
+    doesn't pay for reading the model or for the first-call setup.
+    """
+    _predict_proba(np.zeros((1, _N_FEATS), dtype=np.float64))
+
+
+def _fill_feature_row(X: np.ndarray, row: int, sample: Dict[str, Any]) -> None:
+    """
+    Write one sample's features into row `row` of X, in training order.
+
+    In plain English:
+    - Only keys that are model features are used; the rest are ignored.
+    - Values are converted with float(); anything that isn't a number
+      (None, "abc", NaN) is left at 0, like pd.to_numeric(errors="coerce")
+      followed by fillna(0) would.
+    """
+    for key, value in sample.items():
+        i = _COL_INDEX.get(key)
+        if i is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if value == value:  # NaN is the only value not equal to itself
+            X[row, i] = value
+
+
+def build_feature_array(sample: Dict[str, Any]) -> np.ndarray:
+    """
+    Turn a flat dict of process features into a (1, n_features) float64
+    array in the training-time feature order.
+
+    In plain English:
+    - Missing features stay 0, extra keys are dropped, bad values become 0.
+    - Same numbers build_feature_frame() gives, but written straight into a
+      NumPy row: no one-row DataFrame, no per-column to_numeric() passes.
+      The model was trained on a plain array, so it takes this directly.
+    """
+    X = np.zeros((1, _N_FEATS), dtype=np.float64)
+    _fill_feature_row(X, 0, sample)
+    return X
+
+
 def build_feature_frame(sample: Dict[str, Any]) -> pd.DataFrame:
     """
     Turn a flat dict of process features into a pandas DataFrame
     that matches the training-time feature layout.
 
     Steps (plain English):
-    - Wrap the dict in a one-row DataFrame.
     - Add any missing feature columns and fill them with 0.
     - Drop any extra keys we don't use for the model.
     - Force everything to numeric, replacing bad values with 0.
+    - All of that is build_feature_array(); this only adds column names.
     """
-    df = pd.DataFrame([sample])  # one row
-
-    # Add missing columns
-    for col in _FEATURE_ORDER:
-        if col not in df.columns:
-            df[col] = 0.0
-
-    # Drop columns the model doesn't know about
-    df = df[_FEATURE_ORDER]
-
-    # Coerce to numeric, fill NaNs with zero
-    for col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-
-    return df
+    return pd.DataFrame(build_feature_array(sample), columns=_FEATURE_ORDER)
 
 
 def predict_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
@@ -91,24 +343,58 @@ def predict_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
           }
         }
     """
-    model = load_model()
-    X = build_feature_frame(sample)
+    X = build_feature_array(sample)
 
-    # Predict class and per-class probabilities
-    proba = model.predict_proba(X)[0]  # one row => 1D array
-    class_idx = int(np.argmax(proba))
+    # Predict class and per-class probabilities. Identical feature rows
+    # (the same baseline svchost.exe in every snapshot) reuse the cached
+    # result instead of running the model again.
+    # The cached row is already a tuple of Python floats, so the rest stays
+    # in plain Python: for four classes, converting back to NumPy for
+    # argmax() and tolist() would cost more than the work itself.
+    proba = _predict_proba_cached(X)[0]
+    class_idx = max(range(len(proba)), key=proba.__getitem__)  # first max, like argmax
 
     # Map numeric index back to friendly label
     class_label = MODEL_CLASSES[class_idx]
 
     # Build probability dict with friendly keys
-    probs_by_name = {
-        MODEL_CLASSES[i]: float(p) for i, p in enumerate(proba)
-    }
+    probs_by_name = dict(zip(MODEL_CLASSES, proba))
 
     return {
         "class_index": class_idx,
         "class_label": class_label,
-        "confidence": float(proba[class_idx]),
+        "confidence": proba[class_idx],
         "probs": probs_by_name,
     }
+
+
+def predict_samples(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Batch version of predict_sample(): one result dict per sample, in order.
+
+    In plain English:
+    - All samples go into one (n_samples, n_features) array.
+    - The model scores the whole array in a single call,
+      instead of one call (and one Python -> C round trip) per process.
+    - Rows seen before come from the same cache predict_sample() uses;
+      only the rest go to the model.
+    """
+    if not samples:
+        return []
+
+    X = np.zeros((len(samples), _N_FEATS), dtype=np.float64)
+    for row, sample in enumerate(samples):
+        _fill_feature_row(X, row, sample)
+
+    proba = _predict_proba_cached(X)
+    class_idx = np.argmax(proba, axis=1).tolist()
+
+    return [
+        {
+            "class_index": idx,
+            "class_label": MODEL_CLASSES[idx],
+            "confidence": row[idx],
+            "probs": dict(zip(MODEL_CLASSES, row)),
+        }
+        for idx, row in zip(class_idx, proba)
+    ]
@@ -10,19 +10,21 @@ each row ~= one process with attributes:
 
 from __future__ import annotations
 
-import random
-from dataclasses import dataclass, asdict
-from typing import List
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List
 
 import numpy as np
 import pandas as pd
 
-from .config import NUM_PROCESSES, SEED, SNAPSHOT_PATH, MODEL_CLASSES
+from .config import NUM_PROCESSES, SEED, SNAPSHOT_PATH, SNAPSHOT_PARQUET_PATH, MODEL_CLASSES
 
 from pathlib import Path
 
-# Use a dataclass just to keep the fields tidy and explicit
-@dataclass
+# Use a dataclass just to keep the fields tidy and explicit (it is the
+# column schema; the snapshot itself is built from column arrays).
+# slots=True / frozen=True: any record that is built is a small, immutable
+# value without a per-instance __dict__.
+@dataclass(slots=True, frozen=True)
 class ProcessRecord:
     pid: int
     ppid: int
@@ -63,189 +65,185 @@ SUSPICIOUS_PROCESSES = [
 ]
 
 
-def _seed_everything(seed: int) -> None:
-    """Set Python & NumPy RNG seeds so runs are reproducible."""
-    random.seed(seed)
-    np.random.seed(seed)
-
-
-def _make_benign_record(pid: int, ppid: int) -> ProcessRecord:
-    """
-    Create a "normal" looking process.
-
-    In plain English:
-    - signed binaries from Microsoft/Google
-    - low number of unsigned modules
-    - little to no RWX memory
-    - moderate entropy (normal code/data)
-    - some network usage, but not extreme
-    """
-    name, path, user, company, signed = random.choice(BENIGN_PROCESSES)
-
-    num_modules = random.randint(10, 80)
-    num_unsigned_modules = random.randint(0, 3)
-    num_rwx_regions = random.randint(0, 1)
-    avg_entropy = round(np.random.normal(5.5, 0.4), 2)  # typical code/data
-    has_net = random.random() < 0.6
-    num_conns = random.randint(0, 10) if has_net else 0
-    listening_ports = random.randint(0, 2)
-    high_entropy_strings = random.randint(0, 3)
-    cpu_usage = round(abs(np.random.normal(4, 2)), 2)
-    mem_mb = round(abs(np.random.normal(120, 40)), 1)
-
-    return ProcessRecord(
-        pid=pid,
-        ppid=ppid,
-        name=name,
-        path=path,
-        user=user,
-        company=company,
-        signed=signed,
-        num_modules=num_modules,
-        num_unsigned_modules=num_unsigned_modules,
-        num_rwx_regions=num_rwx_regions,
-        avg_entropy=max(0.0, min(avg_entropy, 8.0)),
-        has_network_connection=has_net,
-        num_connections=num_conns,
-        listening_ports=listening_ports,
-        high_entropy_strings=high_entropy_strings,
-        cpu_usage=cpu_usage,
-        memory_usage_mb=mem_mb,
-        label="benign",
-    )
-
-
-def _make_infostealer_record(pid: int, ppid: int) -> ProcessRecord:
-    """
-    Simulate an info-stealer:
-
-    - often lives under user profile / AppData
-    - unsigned modules
-    - some RWX memory for loaders/injection
-    - lots of outbound connections
-    - moderate to high entropy (packed/obfuscated code)
+def _split_process_table(processes: List[tuple]) -> Dict[str, np.ndarray]:
     """
-    name, path, user, company, signed = random.choice(SUSPICIOUS_PROCESSES)
-
-    num_modules = random.randint(5, 30)
-    num_unsigned_modules = random.randint(3, 12)
-    num_rwx_regions = random.randint(1, 4)
-    avg_entropy = round(np.random.normal(6.8, 0.4), 2)
-    has_net = True
-    num_conns = random.randint(15, 60)
-    listening_ports = random.randint(0, 1)
-    high_entropy_strings = random.randint(10, 40)
-    cpu_usage = round(abs(np.random.normal(8, 4)), 2)
-    mem_mb = round(abs(np.random.normal(80, 30)), 1)
-
-    return ProcessRecord(
-        pid=pid,
-        ppid=ppid,
-        name=name,
-        path=path,
-        user=user,
-        company=company,
-        signed=False,
-        num_modules=num_modules,
-        num_unsigned_modules=num_unsigned_modules,
-        num_rwx_regions=num_rwx_regions,
-        avg_entropy=max(0.0, min(avg_entropy, 8.5)),
-        has_network_connection=has_net,
-        num_connections=num_conns,
-        listening_ports=listening_ports,
-        high_entropy_strings=high_entropy_strings,
-        cpu_usage=cpu_usage,
-        memory_usage_mb=mem_mb,
-        label="infostealer_like",
-    )
-
-
-def _make_ransomware_record(pid: int, ppid: int) -> ProcessRecord:
+    Turn a list of (name, path, user, company, signed) rows into one array
+    per field, so n random rows are picked per field with a single index
+    array instead of re-splitting a tuple for every process.
     """
-    Simulate ransomware:
-
-    - high CPU and memory
-    - many RWX regions (shellcode, encryptor)
-    - very high entropy (encrypted data, packed code)
-    - some network (C2, exfil)
-    """
-    name, path, user, company, signed = random.choice(SUSPICIOUS_PROCESSES)
-
-    num_modules = random.randint(5, 25)
-    num_unsigned_modules = random.randint(5, 15)
-    num_rwx_regions = random.randint(3, 8)
-    avg_entropy = round(np.random.normal(7.5, 0.3), 2)
-    has_net = random.random() < 0.7
-    num_conns = random.randint(5, 25) if has_net else 0
-    listening_ports = random.randint(0, 2)
-    high_entropy_strings = random.randint(30, 100)
-    cpu_usage = round(abs(np.random.normal(40, 15)), 2)
-    mem_mb = round(abs(np.random.normal(250, 80)), 1)
-
-    return ProcessRecord(
-        pid=pid,
-        ppid=ppid,
-        name=name,
-        path=path,
-        user=user,
-        company=company,
-        signed=False,
-        num_modules=num_modules,
-        num_unsigned_modules=num_unsigned_modules,
-        num_rwx_regions=num_rwx_regions,
-        avg_entropy=max(0.0, min(avg_entropy, 9.0)),
-        has_network_connection=has_net,
-        num_connections=num_conns,
-        listening_ports=listening_ports,
-        high_entropy_strings=high_entropy_strings,
-        cpu_usage=cpu_usage,
-        memory_usage_mb=mem_mb,
-        label="ransomware_like",
-    )
-
-
-def _make_injected_loader_record(pid: int, ppid: int) -> ProcessRecord:
+    names, paths, users, companies, signed = zip(*processes)
+    return {
+        "name": np.array(names, dtype=object),
+        "path": np.array(paths, dtype=object),
+        "user": np.array(users, dtype=object),
+        "company": np.array(companies, dtype=object),
+        "signed": np.array(signed, dtype=bool),
+    }
+
+
+# Column-wise copies of the tables above, built once at import.
+_BENIGN_COLUMNS = _split_process_table(BENIGN_PROCESSES)
+_SUSPICIOUS_COLUMNS = _split_process_table(SUSPICIOUS_PROCESSES)
+
+
+# Per-class generation settings, one entry per label.
+#
+# In plain English:
+# - Integer ranges are inclusive (low, high), like random.randint.
+# - Normal draws are (mean, std); cpu_usage / memory_usage_mb take abs().
+# - avg_entropy is rounded to 2 decimals and clipped to [0, entropy_max].
+# - p_network is the chance the process has network connections at all;
+#   num_connections is 0 for those that don't.
+# - force_unsigned marks the process unsigned whatever its name suggests.
+_CLASS_PARAMS: Dict[str, Dict[str, Any]] = {
+    # "Normal" looking processes: signed binaries from Microsoft/Google,
+    # few unsigned modules, little to no RWX memory, moderate entropy
+    # (normal code/data), some network usage but not extreme.
+    "benign": {
+        "processes": _BENIGN_COLUMNS,
+        "force_unsigned": False,
+        "num_modules": (10, 80),
+        "num_unsigned_modules": (0, 3),
+        "num_rwx_regions": (0, 1),
+        "avg_entropy": (5.5, 0.4),
+        "entropy_max": 8.0,
+        "p_network": 0.6,
+        "num_connections": (0, 10),
+        "listening_ports": (0, 2),
+        "high_entropy_strings": (0, 3),
+        "cpu_usage": (4, 2),
+        "memory_usage_mb": (120, 40),
+    },
+    # Info-stealer: lives under the user profile / AppData, unsigned
+    # modules, some RWX memory for loaders/injection, lots of outbound
+    # connections, moderate to high entropy (packed/obfuscated code).
+    "infostealer_like": {
+        "processes": _SUSPICIOUS_COLUMNS,
+        "force_unsigned": True,
+        "num_modules": (5, 30),
+        "num_unsigned_modules": (3, 12),
+        "num_rwx_regions": (1, 4),
+        "avg_entropy": (6.8, 0.4),
+        "entropy_max": 8.5,
+        "p_network": 1.0,
+        "num_connections": (15, 60),
+        "listening_ports": (0, 1),
+        "high_entropy_strings": (10, 40),
+        "cpu_usage": (8, 4),
+        "memory_usage_mb": (80, 30),
+    },
+    # Ransomware: high CPU and memory, many RWX regions (shellcode,
+    # encryptor), very high entropy (encrypted data, packed code), some
+    # network (C2, exfil).
+    "ransomware_like": {
+        "processes": _SUSPICIOUS_COLUMNS,
+        "force_unsigned": True,
+        "num_modules": (5, 25),
+        "num_unsigned_modules": (5, 15),
+        "num_rwx_regions": (3, 8),
+        "avg_entropy": (7.5, 0.3),
+        "entropy_max": 9.0,
+        "p_network": 0.7,
+        "num_connections": (5, 25),
+        "listening_ports": (0, 2),
+        "high_entropy_strings": (30, 100),
+        "cpu_usage": (40, 15),
+        "memory_usage_mb": (250, 80),
+    },
+    # Injected loader / in-memory implant: may look like a legit process
+    # name, few modules but RWX memory, moderate to high entropy, a small
+    # number of steady C2 connections.
+    "injected_loader": {
+        "processes": _SUSPICIOUS_COLUMNS,
+        "force_unsigned": True,
+        "num_modules": (3, 20),
+        "num_unsigned_modules": (2, 10),
+        "num_rwx_regions": (2, 6),
+        "avg_entropy": (6.5, 0.5),
+        "entropy_max": 8.5,
+        "p_network": 0.9,
+        "num_connections": (3, 15),
+        "listening_ports": (0, 1),
+        "high_entropy_strings": (15, 60),
+        "cpu_usage": (12, 6),
+        "memory_usage_mb": (100, 50),
+    },
+}
+
+
+# Column dtypes of the generated snapshot, sized to the ranges drawn above:
+# pids fit in int32, ppids (200-999) and module counts in int16, the small
+# counts (all <= 100) in int8, and the measurements in float32 (values are
+# rounded to 1-2 decimals, well within float32 precision). Columns not
+# listed keep their natural dtype (text, bool).
+_COLUMN_DTYPES: Dict[str, Any] = {
+    "pid": np.int32,
+    "ppid": np.int16,
+    "num_modules": np.int16,
+    "num_unsigned_modules": np.int8,
+    "num_rwx_regions": np.int8,
+    "avg_entropy": np.float32,
+    "num_connections": np.int8,
+    "listening_ports": np.int8,
+    "high_entropy_strings": np.int8,
+    "cpu_usage": np.float32,
+    "memory_usage_mb": np.float32,
+}
+
+
+def _make_class_block(
+    rng: np.random.Generator, n: int, label: str
+) -> Dict[str, np.ndarray]:
     """
-    Simulate an injected loader / in-memory implant:
+    Create n processes of one class as a dict of column arrays.
 
-    - maybe looks like a legit process name
-    - often has few modules but RWX memory
-    - entropy moderate to high
-    - may have a small number of steady C2 connections
+    In plain English:
+    - Every column is drawn for all n processes in one NumPy call, instead
+      of one random.randint / np.random.normal call per field per process.
+    - Name / path / user / company / signed come from one random row of the
+      class's process table, picked by index for all n at once.
+    - pid is filled in by generate_synthetic_snapshot().
     """
-    name, path, user, company, signed = random.choice(SUSPICIOUS_PROCESSES)
-
-    num_modules = random.randint(3, 20)
-    num_unsigned_modules = random.randint(2, 10)
-    num_rwx_regions = random.randint(2, 6)
-    avg_entropy = round(np.random.normal(6.5, 0.5), 2)
-    has_net = random.random() < 0.9
-    num_conns = random.randint(3, 15) if has_net else 0
-    listening_ports = random.randint(0, 1)
-    high_entropy_strings = random.randint(15, 60)
-    cpu_usage = round(abs(np.random.normal(12, 6)), 2)
-    mem_mb = round(abs(np.random.normal(100, 50)), 1)
-
-    return ProcessRecord(
-        pid=pid,
-        ppid=ppid,
-        name=name,
-        path=path,
-        user=user,
-        company=company,
-        signed=False,
-        num_modules=num_modules,
-        num_unsigned_modules=num_unsigned_modules,
-        num_rwx_regions=num_rwx_regions,
-        avg_entropy=max(0.0, min(avg_entropy, 8.5)),
-        has_network_connection=has_net,
-        num_connections=num_conns,
-        listening_ports=listening_ports,
-        high_entropy_strings=high_entropy_strings,
-        cpu_usage=cpu_usage,
-        memory_usage_mb=mem_mb,
-        label="injected_loader",
-    )
+    params = _CLASS_PARAMS[label]
+
+    def randint(field: str) -> np.ndarray:
+        low, high = params[field]
+        return rng.integers(low, high, size=n, endpoint=True)
+
+    def normal(field: str) -> np.ndarray:
+        mean, std = params[field]
+        return rng.normal(mean, std, size=n)
+
+    processes = params["processes"]
+    which = rng.integers(0, len(processes["name"]), size=n)
+    if params["force_unsigned"]:
+        signed = np.zeros(n, dtype=bool)
+    else:
+        signed = processes["signed"][which]
+
+    has_net = rng.random(n) < params["p_network"]
+
+    return {
+        "ppid": rng.integers(200, 999, size=n, endpoint=True),
+        "name": processes["name"][which],
+        "path": processes["path"][which],
+        "user": processes["user"][which],
+        "company": processes["company"][which],
+        "signed": signed,
+        "num_modules": randint("num_modules"),
+        "num_unsigned_modules": randint("num_unsigned_modules"),
+        "num_rwx_regions": randint("num_rwx_regions"),
+        "avg_entropy": np.clip(
+            np.round(normal("avg_entropy"), 2), 0.0, params["entropy_max"]
+        ),
+        "has_network_connection": has_net,
+        "num_connections": np.where(has_net, randint("num_connections"), 0),
+        "listening_ports": randint("listening_ports"),
+        "high_entropy_strings": randint("high_entropy_strings"),
+        "cpu_usage": np.round(np.abs(normal("cpu_usage")), 2),
+        "memory_usage_mb": np.round(np.abs(normal("memory_usage_mb")), 1),
+        "label": np.full(n, label, dtype=object),
+    }
 
 
 def generate_synthetic_snapshot(n: int | None = None) -> pd.DataFrame:
@@ -257,48 +255,45 @@ def generate_synthetic_snapshot(n: int | None = None) -> pd.DataFrame:
     In plain English:
     - We randomly choose how many benign vs malicious processes to create.
     - We create slightly noisy but believable numbers for modules, entropy, etc.
+    - Each class is generated as whole columns (_make_class_block), the
+      classes are concatenated and shuffled column by column, and the
+      DataFrame is built once from those arrays, in ProcessRecord's field
+      order, with the narrow dtypes from _COLUMN_DTYPES.
+    - One seeded Generator (SEED) drives everything, so the same n always
+      gives the same snapshot.
     """
-    _seed_everything(SEED)
+    rng = np.random.default_rng(SEED)
 
     if n is None:
         n = NUM_PROCESSES
 
-    records: List[ProcessRecord] = []
-
     # Decide how many of each class to make
     n_benign = int(n * 0.75)
     n_infostealer = int(n * 0.10)
     n_ransom = int(n * 0.08)
     n_injected = n - (n_benign + n_infostealer + n_ransom)
 
-    pid_counter = 1000
-
-    # Benign first
-    for _ in range(n_benign):
-        ppid = random.randint(200, 999)
-        records.append(_make_benign_record(pid_counter, ppid))
-        pid_counter += 1
-
-    for _ in range(n_infostealer):
-        ppid = random.randint(200, 999)
-        records.append(_make_infostealer_record(pid_counter, ppid))
-        pid_counter += 1
-
-    for _ in range(n_ransom):
-        ppid = random.randint(200, 999)
-        records.append(_make_ransomware_record(pid_counter, ppid))
-        pid_counter += 1
-
-    for _ in range(n_injected):
-        ppid = random.randint(200, 999)
-        records.append(_make_injected_loader_record(pid_counter, ppid))
-        pid_counter += 1
-
-    # Convert dataclasses -> DataFrame
-    df = pd.DataFrame([asdict(r) for r in records])
-
-    # Shuffle rows so classes are mixed
-    df = df.sample(frac=1.0, random_state=SEED).reset_index(drop=True)
+    # Benign first, then the malicious classes (pids follow this order).
+    blocks = [
+        _make_class_block(rng, n_benign, "benign"),
+        _make_class_block(rng, n_infostealer, "infostealer_like"),
+        _make_class_block(rng, n_ransom, "ransomware_like"),
+        _make_class_block(rng, n_injected, "injected_loader"),
+    ]
+
+    # Shuffle rows so classes are mixed: one permutation, applied to each
+    # column array while it's concatenated, before any DataFrame exists.
+    perm = rng.permutation(n)
+
+    columns: Dict[str, np.ndarray] = {
+        "pid": np.arange(1000, 1000 + n, dtype=_COLUMN_DTYPES["pid"])[perm]
+    }
+    for field in fields(ProcessRecord):
+        if field.name != "pid":
+            columns[field.name] = np.concatenate(
+                [b[field.name] for b in blocks], dtype=_COLUMN_DTYPES.get(field.name)
+            )[perm]
+    df = pd.DataFrame(columns, copy=False)
 
     return df
 
@@ -328,8 +323,35 @@ def save_snapshot_csv(path: str | None = None) -> str:
     return str(out_path)
 
 
+# Low-cardinality text columns, written dictionary-encoded to Parquet.
+_CATEGORY_COLUMNS = ("name", "path", "user", "company", "label")
+
+
+def save_snapshot_parquet(path: str | None = None) -> str:
+    """
+    Generate a synthetic snapshot and save it as zstd-compressed Parquet.
+
+    In plain English:
+    - Parquet is columnar and binary: no float -> text formatting on write,
+      no parsing on read, and column types are kept.
+    - The name/path/user/company/label columns hold a handful of distinct
+      strings, so they are stored as categories: each distinct string is
+      written once and rows only store a small integer code.
+    """
+    out_path = Path(SNAPSHOT_PARQUET_PATH if path is None else path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    df = generate_synthetic_snapshot()
+    df = df.astype({col: "category" for col in _CATEGORY_COLUMNS})
+    df.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
+
+    return str(out_path)
+
+
 if __name__ == "__main__":
     # Manual quick test
     out_path = save_snapshot_csv()
     print(f"Saved synthetic snapshot to: {out_path}")
+    out_path = save_snapshot_parquet()
+    print(f"Saved synthetic snapshot to: {out_path}")
 